@@ -10,6 +10,13 @@ from urllib.request import Request, urlopen
 import ssl
 import requests
 
+try:
+    from scripts import quote_cache
+    from scripts.keyword_matcher import KeywordMatcher
+except ImportError:  # 作为独立脚本运行
+    import quote_cache
+    from keyword_matcher import KeywordMatcher
+
 # 用于构建美股摘要
 US_MARKET_CACHE = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'us_market_cache.json'
@@ -250,34 +257,22 @@ def _load_market_anomalies_summary():
         '101.SI00Y': {'name': 'COMEX白银', 'short': 'COMEX银'},
     }
     try:
-        secids = ','.join(_KEY_TICKERS.keys())
-        url = f'https://push2.eastmoney.com/api/qt/ulist.np/get?fltt=2&fields=f2,f3,f4,f12,f14&secids={secids}'
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-        req = Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urlopen(req, timeout=8, context=ctx) as resp:
-            data = json.loads(resp.read().decode())
-        items = (data.get('data') or {}).get('diff') or []
-        if items:
+        quotes = quote_cache.get_quotes(_KEY_TICKERS)
+        if quotes:
             lines.append('[实时大宗商品/贵金属价格快照]:')
-            for item in items:
-                code = str(item.get('f12', ''))
+            for secid, meta in _KEY_TICKERS.items():
+                item = quotes.get(secid)
+                if item is None or item.get('f3') is None:
+                    continue
                 price = item.get('f2')
                 pct = item.get('f3')
-                if pct is None:
-                    continue
-                # 匹配
-                for secid, meta in _KEY_TICKERS.items():
-                    if secid.split('.')[-1] == code or secid.endswith('.' + code):
-                        direction = '↑' if pct > 0 else '↓' if pct < 0 else '→'
-                        tag = ''
-                        if abs(pct) >= 3:
-                            tag = ' ⚠️大幅波动！'
-                        elif abs(pct) >= 2:
-                            tag = ' ⚡显著波动'
-                        lines.append(f"  {meta['short']}: {price} ({pct:+.2f}%{direction}){tag}")
-                        break
+                direction = '↑' if pct > 0 else '↓' if pct < 0 else '→'
+                tag = ''
+                if abs(pct) >= 3:
+                    tag = ' ⚠️大幅波动！'
+                elif abs(pct) >= 2:
+                    tag = ' ⚡显著波动'
+                lines.append(f"  {meta['short']}: {price} ({pct:+.2f}%{direction}){tag}")
             lines.append('')
     except Exception as e:
         print(f'  [WARN] 实时行情获取失败: {e}')
@@ -365,6 +360,8 @@ _HOT_KEYWORDS = [
     '关税', '贸易战', '美联储', '降息', '加息', '通胀', 'AI', '人工智能',
     '稀土', '锂电', '新能源', '光伏', '特朗普', 'Trump', '俄罗斯', '乌克兰',
 ]
+# 区分大小写，与原先的 kw in title 一致（'AI' 不匹配英文单词里的 ai）
+_HOT_MATCHER = KeywordMatcher(ignore_case=False).add_table('hot', _HOT_KEYWORDS).build()
 
 
 def _build_curated_social_data(items):
@@ -375,7 +372,7 @@ def _build_curated_social_data(items):
     scored = []
     for item in items:
         title = item.get('title', '') + ' ' + item.get('desc', '')
-        score = sum(1 for kw in _HOT_KEYWORDS if kw in title)
+        score = _HOT_MATCHER.count(title, 'hot')
         scored.append((score, item))
 
     # 按关键词匹配度排序，相关的排前面
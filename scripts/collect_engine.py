@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+异步采集引擎（asyncio + 共享 HTTP 连接池）
+- 数据源 = 若干相互独立的子请求（step）+ 合并函数（merge）
+- 所有数据源的所有子请求在同一事件循环里并发调度，按主机限制并发数
+- 全局截止时间到达时取消未完成的子请求，已完成部分照常合并返回（部分结果）
+- 采集总耗时 ≈ 最慢的单个请求，而不是最慢数据源的串行请求链
+
+用法:
+    from scripts.collect_engine import Source, run_sources
+
+    async def hot(fetch):
+        resp = await fetch('https://example.com/hot.json', timeout=10)
+        return parse(resp.json())
+
+    sources = [Source('示例', [('hot', hot), ('search', search)], merge=my_merge)]
+    report = run_sources(sources, deadline=20)
+    report['示例']['items']       # merge 的结果
+    report['示例']['complete']    # 全部子请求是否按时完成
+
+    for name, rep in iter_sources(sources, deadline=20):   # 按完成先后流式产出
+        ...
+
+step 是 ``async def step(fetch) -> payload``；fetch(url, **kw) 与 http_client.get 参数一致，
+返回 http_client.Response。merge(parts) 收到 {step_key: payload}，失败 / 超时的 step 不在其中。
+step 通过 fetch_if_changed 做条件请求时，内容未变的 step 记入 report[name]['unchanged']。
+传入 scope 时按 '{scope}:{name}' 登记到 source_health：熔断中的数据源本轮跳过（report[name]['skipped']），
+其余数据源按结果（有条目即成功）和耗时记账。
+
+对冲数据源 Source(..., hedge_delay=秒, accept=fn)：steps 视为按优先级排列的主 / 备用请求，
+主请求 hedge_delay 秒内没有可用结果（或提前失败）才发出下一个；任一 step 的结果通过 accept 后
+取消其余请求、不再发出后续请求（记入 report[name]['hedged']）。Source(deadline=秒) 为单个数据源的截止时间。
+对冲数据源也可以给 enough=fn：按已完成的 {step_key: payload} 累计判断，够用即提前停止（如"凑够 80 条"），
+此时 accept 缺省为不做单步判定。
+"""
+
+import asyncio
+import functools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    from scripts import http_client, source_health
+except ImportError:  # 作为独立脚本运行
+    import http_client
+    import source_health
+
+DEFAULT_DEADLINE = float(os.environ.get('COLLECT_DEADLINE', '25'))
+DEFAULT_PER_HOST = int(os.environ.get('COLLECT_PER_HOST', '6'))
+MAX_WORKERS = int(os.environ.get('COLLECT_MAX_WORKERS', '32'))
+HEDGE_DELAY = float(os.environ.get('COLLECT_HEDGE_DELAY', '1.5'))
+# iter_sources 在截止时间之后再多等的秒数（取消收尾），超过仍未结束视为引擎卡死
+ITER_MARGIN = float(os.environ.get('COLLECT_ITER_MARGIN', '10'))
+
+# 有限流的主机单独收紧
+HOST_LIMITS = {
+    'api.bilibili.com': 3,
+    'www.xiaohongshu.com': 2,
+}
+
+
+class Source:
+    """一个数据源：steps = [(key, async fn(fetch))]，merge(parts) -> items
+
+    hedge_delay: 设置后 steps 按主 / 备用顺序对冲执行，accept(payload) 判定结果是否可用（默认非空）
+    enough: 对冲时按已完成的 parts 累计判定是否够用；给出 enough 而不给 accept 时不做单步判定
+    deadline: 单个数据源的截止时间（秒），缺省时只受全局截止时间约束
+    """
+
+    def __init__(self, name, steps, merge=None, hedge_delay=None, accept=None, deadline=None, enough=None):
+        self.name = name
+        self.steps = list(steps)
+        self.merge = merge or _merge_concat
+        self.hedge_delay = hedge_delay
+        self.accept = accept or (_never if enough else bool)
+        self.enough = enough
+        self.deadline = deadline
+
+    def __repr__(self):
+        return f'Source({self.name!r}, {len(self.steps)} steps)'
+
+
+class Unchanged:
+    """step 返回值包装：内容与上次相同，payload 为缓存的解析结果"""
+
+    __slots__ = ('payload',)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+
+async def fetch_if_changed(fetch, store, url, parse, headers=None, **kwargs):
+    """条件请求版 fetch：带 ETag / Last-Modified，304 或正文哈希一致时不再解析，返回 Unchanged(payload)"""
+    hdrs = dict(headers or {})
+    hdrs.update(store.request_headers(url))
+    resp = await fetch(url, headers=hdrs, **kwargs)
+    payload, changed = store.resolve(url, resp, parse)
+    return payload if changed else Unchanged(payload)
+
+
+def _never(payload):
+    return False
+
+
+def _merge_concat(parts):
+    items = []
+    for payload in parts.values():
+        items.extend(payload or [])
+    return items
+
+
+def _health_key(scope, name):
+    return f'{scope}:{name}'
+
+
+async def _drive(src, fetch, children, hedged):
+    """调度一个数据源的 steps；children 登记已发出的 step 任务，hedged 登记对冲胜出后放弃的 step"""
+    started = []
+
+    def start(key, step):
+        task = asyncio.ensure_future(step(fetch))
+        children[task] = (src.name, key)
+        started.append(task)
+        return task
+
+    try:
+        if src.hedge_delay is None:
+            await asyncio.wait([start(key, step) for key, step in src.steps])
+            return
+        queue = list(src.steps)
+        running = set()
+        parts = {}
+        while queue or running:
+            # 首轮 / 等满 hedge_delay / 已发出的请求失败或结果不可用：发出下一个备用请求
+            if queue:
+                running.add(start(*queue.pop(0)))
+            done, running = await asyncio.wait(running, timeout=src.hedge_delay if queue else None,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                payload = task.result()
+                if isinstance(payload, Unchanged):
+                    payload = payload.payload
+                parts[children[task][1]] = payload
+                if src.accept(payload) or (src.enough is not None and src.enough(parts)):
+                    for loser in running:
+                        hedged[src.name].append(children[loser][1])
+                        loser.cancel()
+                    hedged[src.name].extend(key for key, _ in queue)
+                    return
+    finally:
+        # 截止时间到达（本任务被取消）时一并取消已发出的 step
+        for task in started:
+            if not task.done():
+                task.cancel()
+
+
+async def _bounded(src, fetch, children, hedged):
+    if not src.deadline:
+        await _drive(src, fetch, children, hedged)
+        return
+    try:
+        await asyncio.wait_for(_drive(src, fetch, children, hedged), src.deadline)
+    except asyncio.TimeoutError:
+        pass
+
+
+def _skipped_report(src):
+    return {
+        'items': [], 'complete': False, 'stepsDone': 0, 'stepsTotal': len(src.steps),
+        'timedOut': [], 'errors': ['熔断中，本轮跳过'], 'unchanged': [], 'hedged': [], 'skipped': True,
+    }
+
+
+def _source_report(src, children, hedged):
+    """children = [(task, key)]：该数据源已发出且均已结束的 step"""
+    parts_by_key = {}
+    errors, timed_out, unchanged = [], [], []
+    for task, key in children:
+        if task.cancelled():
+            if key not in hedged:
+                timed_out.append(key)
+            continue
+        exc = task.exception()
+        if exc is not None:
+            errors.append(f'{key}: {exc}')
+            print(f'  [{src.name}-{key}] {exc}')
+            continue
+        result = task.result()
+        if isinstance(result, Unchanged):
+            unchanged.append(key)
+            result = result.payload
+        parts_by_key[key] = result
+    # 截止前尚未发出的备用请求同样记为超时
+    launched = {key for _, key in children}
+    timed_out.extend(key for key, _ in src.steps if key not in launched and key not in hedged)
+    # 按 step 声明顺序交给 merge，保证去重优先级与串行版本一致
+    parts = {key: parts_by_key[key] for key, _ in src.steps if key in parts_by_key}
+    try:
+        items = src.merge(parts)
+    except Exception as e:
+        errors.append(f'merge: {e}')
+        print(f'  [{src.name}-merge] {e}')
+        items = []
+    return {
+        'items': items,
+        'complete': not timed_out and not errors,
+        'stepsDone': len(parts),
+        'stepsTotal': len(src.steps),
+        'timedOut': timed_out,
+        'errors': errors,
+        'unchanged': unchanged,
+        'hedged': list(hedged),
+        'skipped': False,
+    }
+
+
+async def _run(sources, deadline, per_host, host_limits, max_workers, scope=None, on_report=None):
+    """on_report(name, report)：每个数据源一结束（或被截止时间截断）就回调，不等其余数据源"""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='collect')
+    semaphores = {}
+
+    async def fetch(url, **kwargs):
+        host = urlsplit(url).hostname or ''
+        sem = semaphores.get(host)
+        if sem is None:
+            sem = semaphores[host] = asyncio.Semaphore(host_limits.get(host, per_host))
+        async with sem:
+            return await loop.run_in_executor(executor, functools.partial(http_client.get, url, **kwargs))
+
+    started = time.monotonic()
+    skipped = set()
+    if scope:
+        skipped = {src.name for src in sources if not source_health.allow(_health_key(scope, src.name))}
+    tasks = {}
+    hedged = {src.name: [] for src in sources}
+    report = {}
+
+    def publish(src, rep):
+        report[src.name] = rep
+        if on_report is not None:
+            on_report(src.name, rep)
+
+    async def complete(src, driver):
+        try:
+            await driver
+        except asyncio.CancelledError:
+            pass
+        children = [(task, key) for task, (name, key) in list(tasks.items()) if name == src.name]
+        late = [task for task, _ in children if not task.done()]
+        for task in late:
+            task.cancel()
+        if late:
+            await asyncio.gather(*late, return_exceptions=True)
+        rep = _source_report(src, children, hedged[src.name])
+        if scope:
+            ok = bool(rep['items'])
+            reason = '' if ok else ('; '.join(rep['errors'][:2]) or ('timeout' if rep['timedOut'] else 'empty'))
+            source_health.record(_health_key(scope, src.name), ok, time.monotonic() - started, reason)
+        publish(src, rep)
+
+    drivers = []
+    completions = []
+    for src in sources:
+        if src.name in skipped:
+            publish(src, _skipped_report(src))
+            continue
+        driver = asyncio.ensure_future(_bounded(src, fetch, tasks, hedged))
+        drivers.append(driver)
+        completions.append(asyncio.ensure_future(complete(src, driver)))
+
+    if drivers:
+        _, late_drivers = await asyncio.wait(drivers, timeout=deadline)
+        for driver in late_drivers:
+            driver.cancel()
+    if completions:
+        await asyncio.gather(*completions)
+    # 已发出的阻塞请求在后台线程里自然结束，不再等待
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.monotonic() - started
+    late = sum(len(rep['timedOut']) for rep in report.values())
+    if late:
+        print(f'  ⏰ 采集截止 {deadline:g}s: {late} 个子请求未完成，按部分结果返回')
+    return {src.name: report[src.name] for src in sources}, {'elapsed': round(elapsed, 2), 'deadline': deadline}
+
+
+def run_sources(sources, deadline=None, per_host=None, host_limits=None, max_workers=None, with_meta=False,
+                scope=None):
+    """同步入口：在独立事件循环中运行全部数据源，返回 {name: {...}}
+
+    scope: 健康度 / 熔断登记的命名空间（如 'sentiment'），缺省时不做熔断
+    """
+    coro_args = (
+        list(sources),
+        DEFAULT_DEADLINE if deadline is None else deadline,
+        per_host or DEFAULT_PER_HOST,
+        {**HOST_LIMITS, **(host_limits or {})},
+        max_workers or MAX_WORKERS,
+        scope,
+    )
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        report, meta = asyncio.run(_run(*coro_args))
+    else:
+        # 调用方自身处于事件循环中：换一个线程跑，避免嵌套 asyncio.run
+        box = {}
+        worker = threading.Thread(target=lambda: box.update(result=asyncio.run(_run(*coro_args))))
+        worker.start()
+        worker.join()
+        report, meta = box['result']
+    return (report, meta) if with_meta else report
+
+
+def run_source(source, deadline=None):
+    """单个数据源的同步入口（保留旧的 fetch_xxx() 调用方式）"""
+    return run_sources([source], deadline=deadline)[source.name]['items']
+
+
+def iter_sources(sources, deadline=None, per_host=None, host_limits=None, max_workers=None, scope=None):
+    """流式入口：按完成先后逐个产出 (name, report)，调用方不必等最慢的数据源
+
+    事件循环在后台线程运行；全局截止时间到达后未完成的数据源以部分结果产出，随后迭代结束。
+    引擎内部异常在调用方线程重新抛出；截止时间 + ITER_MARGIN 秒后仍未结束则抛 TimeoutError。
+    """
+    sources = list(sources)
+    deadline = DEFAULT_DEADLINE if deadline is None else deadline
+    reports = queue.Queue()
+    done = object()
+    coro = _run(
+        sources,
+        deadline,
+        per_host or DEFAULT_PER_HOST,
+        {**HOST_LIMITS, **(host_limits or {})},
+        max_workers or MAX_WORKERS,
+        scope,
+        on_report=lambda name, rep: reports.put((name, rep)),
+    )
+
+    def work():
+        # 无论正常结束还是异常，都要给调用方一个结束信号，避免 reports.get() 永远阻塞
+        try:
+            asyncio.run(coro)
+        except BaseException as exc:
+            reports.put(exc)
+        else:
+            reports.put(done)
+
+    stop_at = time.monotonic() + deadline + ITER_MARGIN
+
+    def take():
+        try:
+            item = reports.get(timeout=max(0.0, stop_at - time.monotonic()))
+        except queue.Empty:
+            raise TimeoutError(f'采集引擎超过 {deadline + ITER_MARGIN:g}s 未结束') from None
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    threading.Thread(target=work, name='collect-stream', daemon=True).start()
+    for remaining in range(len(sources), 0, -1):
+        item = take()
+        if item is done:
+            raise RuntimeError(f'采集引擎提前结束，{remaining} 个数据源没有结果')
+        if remaining == 1:
+            # 最后一个数据源：等事件循环收尾（截止汇总日志）后再交给调用方
+            take()
+        yield item
+
+
+class Unique:
+    """同源多个子请求合并时按 key 去重（保持先到先得的顺序）"""
+
+    def __init__(self):
+        self.seen = set()
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def extend(self, pairs):
+        for key, item in pairs or []:
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            self.items.append(item)
+        return self
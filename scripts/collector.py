@@ -6,12 +6,26 @@
 
 import json, re, os, time, hashlib, traceback
 from datetime import datetime, timedelta, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import requests
+
+try:
+    from scripts import http_client
+    from scripts.collect_engine import HEDGE_DELAY, Source, Unique, run_source, run_sources
+    from scripts.item_model import Item
+    from scripts.item_store import ItemStore
+    from scripts.keyword_matcher import KeywordMatcher
+    from scripts.text_rules import RuleSet
+except ImportError:  # 作为独立脚本运行: python scripts/collector.py
+    import http_client
+    from collect_engine import HEDGE_DELAY, Source, Unique, run_source, run_sources
+    from item_model import Item
+    from item_store import ItemStore
+    from keyword_matcher import KeywordMatcher
+    from text_rules import RuleSet
 
 # ==================== 常量 ====================
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
 CACHE_FILE = os.path.join(DATA_DIR, 'sentiment_cache.json')
+STORE_FILE = os.path.join(DATA_DIR, 'sentiment_store.json')
 UA = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 HEADERS = {'User-Agent': UA}
 TIMEOUT = 15
@@ -77,25 +91,13 @@ NOISE_CATEGORY_KW = [
     # 其他噪音
     '搞笑', '段子', '鬼畜', '整蛊', '挑战', '变装',
 ]
-_noise_kw_lower = [kw.lower() for kw in NOISE_CATEGORY_KW]
-
-_kw_lower = [kw.lower() for kw in FINANCE_KW]
-
 def is_finance(text):
-    if not text:
-        return False
-    t = text.lower()
-    return any(kw in t for kw in _kw_lower)
+    return _MATCHER.has(text, 'finance')
 
 def is_noise_category(text):
     """检测是否属于娱乐/体育等无关类别 (应被排除)"""
-    if not text:
-        return False
-    t = text.lower()
-    noise_count = sum(1 for kw in _noise_kw_lower if kw in t)
-    finance_count = sum(1 for kw in _kw_lower if kw in t)
-    # 如果噪音关键词 > 财经关键词, 视为无关内容
-    return noise_count > 0 and finance_count == 0
+    # 命中噪音关键词且没有任何财经关键词, 视为无关内容
+    return _MATCHER.has(text, 'noise') and not _MATCHER.has(text, 'finance')
 
 # ==================== 趋势主题提取 ====================
 TREND_THEMES = [
@@ -117,6 +119,12 @@ TREND_THEMES = [
     {'id': 'dividend',      'name': '高股息/红利',     'icon': '🎁', 'keywords': ['红利', '高股息', '银行', '保险', '券商', '分红']},
 ]
 
+# 财经 / 噪音 / 趋势主题关键词编译进同一个自动机, 每条文本只扫描一遍
+_MATCHER = KeywordMatcher().add_table('finance', FINANCE_KW).add_table('noise', NOISE_CATEGORY_KW)
+for _th in TREND_THEMES:
+    _MATCHER.add_table('trend', _th['keywords'], label=_th['id'])
+_MATCHER.build()
+
 def extract_trends(items):
     """从采集数据中提取趋势主题, 按热度排序"""
     theme_data = {}
@@ -127,6 +135,7 @@ def extract_trends(items):
             'icon': th['icon'],
             'mention_count': 0,
             'total_engagement': 0,
+            'engagement_velocity': 0,
             'platforms': set(),
             'sentiments': {'bullish': 0, 'bearish': 0, 'neutral': 0},
             'sample_titles': [],
@@ -134,24 +143,25 @@ def extract_trends(items):
         }
 
     for item in items:
-        text = (item.get('title', '') + ' ' + item.get('summary', '')).lower()
-        sentiment = item.get('sentiment', '中性')
-        platform = item.get('platform', '')
-        likes = item.get('likes', 0) or 0
+        item = Item.from_dict(item)
+        sentiment = item.sentiment or '中性'
+        platform = item.platform or ''
+        likes = item.likes or 0
+
+        hit_themes = set()
+        for theme_id, kw in _MATCHER.hits(item.keyword_hits(_MATCHER), 'trend'):
+            hit_themes.add(theme_id)
+            theme_data[theme_id]['keywords_hit'].add(kw)
 
         for th in TREND_THEMES:
-            matched = False
-            for kw in th['keywords']:
-                if kw.lower() in text:
-                    matched = True
-                    theme_data[th['id']]['keywords_hit'].add(kw)
-            if matched:
+            if th['id'] in hit_themes:
                 td = theme_data[th['id']]
                 td['mention_count'] += 1
                 td['total_engagement'] += likes
+                td['engagement_velocity'] += item.get('likes_velocity', 0)
                 td['platforms'].add(platform)
                 if len(td['sample_titles']) < 5:
-                    title = item.get('title', '')
+                    title = item.title
                     if title and title not in td['sample_titles']:
                         td['sample_titles'].append(title)
                 # sentiment classification
@@ -167,9 +177,10 @@ def extract_trends(items):
     for td in theme_data.values():
         if td['mention_count'] == 0:
             continue
-        # Compute heat score: mentions × 10 + log(engagement)
+        # Compute heat score: mentions × 10 + log(engagement) + log(互动增速)
         import math
         heat = td['mention_count'] * 10 + (math.log10(td['total_engagement'] + 1) * 5)
+        heat += math.log10(max(td['engagement_velocity'], 0) + 1) * 3
         # Determine dominant sentiment
         s = td['sentiments']
         total_s = s['bullish'] + s['bearish'] + s['neutral']
@@ -188,6 +199,7 @@ def extract_trends(items):
             'icon': td['icon'],
             'mention_count': td['mention_count'],
             'heat_score': round(heat, 1),
+            'engagement_velocity': round(td['engagement_velocity'], 1),
             'platforms': sorted(td['platforms']),
             'sentiment': dom_sentiment,
             'sentiment_detail': td['sentiments'],
@@ -198,20 +210,20 @@ def extract_trends(items):
     results.sort(key=lambda x: x['heat_score'], reverse=True)
     return results[:15]
 
+# 情绪规则表：按顺序第一条命中的生效
+SENTIMENT_RULES = [
+    (r'暴涨|疯涨|大涨|飙升|涨停|全仓|梭哈|起飞|爆发|牛市|创新高|狂热', '极度看多'),
+    (r'上涨|走高|反弹|利好|加仓|机会|突破|看好|推荐|配置|走强', '偏多'),
+    (r'暴跌|崩盘|大跌|跳水|清仓|割肉|熊市|腰斩', '极度悲观'),
+    (r'下跌|走低|利空|减仓|风险|警惕|谨慎|回调|承压|重挫', '偏空'),
+    (r'震荡|分歧|观望|持平|稳定|盘整', '中性'),
+]
+_SENTIMENT = RuleSet().add_table('sentiment', SENTIMENT_RULES, pick='first').compile()
+
 def estimate_sentiment(text):
     if not text:
         return '中性'
-    if re.search(r'暴涨|疯涨|大涨|飙升|涨停|全仓|梭哈|起飞|爆发|牛市|创新高|狂热', text):
-        return '极度看多'
-    if re.search(r'上涨|走高|反弹|利好|加仓|机会|突破|看好|推荐|配置|走强', text):
-        return '偏多'
-    if re.search(r'暴跌|崩盘|大跌|跳水|清仓|割肉|熊市|腰斩', text):
-        return '极度悲观'
-    if re.search(r'下跌|走低|利空|减仓|风险|警惕|谨慎|回调|承压|重挫', text):
-        return '偏空'
-    if re.search(r'震荡|分歧|观望|持平|稳定|盘整', text):
-        return '中性'
-    return '中性偏多'
+    return _SENTIMENT.evaluate(text)['sentiment'] or '中性偏多'
 
 def now_iso():
     return datetime.now(timezone.utc).isoformat()
@@ -287,511 +299,495 @@ def safe_int(v, default=0):
 
 # ==================== 各数据源采集 ====================
 
-def fetch_douyin():
-    """抖音热搜 + 头条热搜 + 头条财经频道（同属字节跳动）— 目标 30+"""
-    items = []
-    seen = set()
-
-    # Source 1: 抖音热搜 API (finance filtered)
-    try:
-        r = requests.get('https://aweme.snssdk.com/aweme/v1/hot/search/list/',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        word_list = (data.get('data') or {}).get('word_list') or data.get('word_list') or []
-        for item in word_list:
-            word = item.get('word') or item.get('content') or ''
-            hot = safe_int(item.get('hot_value') or item.get('score'))
-            if word and is_finance(word) and word not in seen:
-                seen.add(word)
-                items.append({
-                    'title': word[:80],
-                    'summary': word,
-                    'likes': hot,
-                    'platform': '抖音',
-                    'source_type': '热搜',
-                    'sentiment': estimate_sentiment(word),
-                    'creator_type': '社交热搜',
-                    'publish_time': now_iso(),
-                })
-    except Exception as e:
-        print(f'[抖音] {e}')
-
-    # Source 2: 头条热搜 API（字节跳动旗下）(finance filtered)
-    try:
-        r = requests.get('https://www.toutiao.com/hot-event/hot-board/?origin=toutiao_pc',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in data.get('data') or []:
-            title = item.get('Title') or ''
-            hot = safe_int(item.get('HotValue'))
-            if title and is_finance(title) and title not in seen:
-                seen.add(title)
-                items.append({
-                    'title': title[:80],
-                    'summary': title,
-                    'likes': hot,
-                    'platform': '抖音',
-                    'source_type': '头条热搜',
-                    'sentiment': estimate_sentiment(title),
-                    'creator_type': '社交热搜',
-                    'publish_time': now_iso(),
-                })
-    except Exception as e:
-        print(f'[头条] {e}')
-
-    # Source 3: 头条财经频道信息流（分页获取，每页10条，取3页=30条）
+def _json_step(url, parse, headers=None, **kwargs):
+    """单个 JSON 子请求：GET → parse(data) -> [(key, item)]"""
+    async def step(fetch):
+        r = await fetch(url, headers=headers or HEADERS, timeout=TIMEOUT, **kwargs)
+        return parse(r.json())
+    return step
+
+
+def _enough_pairs(pairs):
+    """对冲数据源的采纳条件：主请求拿到 30 条以上即不再请求备用接口"""
+    return len(pairs or []) >= 30
+
+
+def _parse_douyin_hot(data):
+    pairs = []
+    word_list = (data.get('data') or {}).get('word_list') or data.get('word_list') or []
+    for item in word_list:
+        word = item.get('word') or item.get('content') or ''
+        hot = safe_int(item.get('hot_value') or item.get('score'))
+        if word and is_finance(word):
+            pairs.append((word, Item(
+                title=word[:80],
+                summary=word,
+                likes=hot,
+                platform='抖音',
+                source_type='热搜',
+                sentiment=estimate_sentiment(word),
+                creator_type='社交热搜',
+                publish_time=now_iso(),
+            )))
+    return pairs
+
+
+def _parse_toutiao_hot(data):
+    pairs = []
+    for item in data.get('data') or []:
+        title = item.get('Title') or ''
+        hot = safe_int(item.get('HotValue'))
+        if title and is_finance(title):
+            pairs.append((title, Item(
+                title=title[:80],
+                summary=title,
+                likes=hot,
+                platform='抖音',
+                source_type='头条热搜',
+                sentiment=estimate_sentiment(title),
+                creator_type='社交热搜',
+                publish_time=now_iso(),
+            )))
+    return pairs
+
+
+async def _toutiao_finance_pages(fetch):
+    """头条财经频道信息流（按 max_behot_time 游标翻页，每页10条，取3页=30条）"""
+    pairs = []
     max_behot = 0
     for page_idx in range(3):
         try:
-            r = requests.get(
+            r = await fetch(
                 f'https://www.toutiao.com/api/pc/feed/?category=news_finance&max_behot_time={max_behot}&widen=1&tadrequire=true',
                 headers=HEADERS, timeout=TIMEOUT)
             data = r.json()
-            feed_items = data.get('data') or []
-            for item in feed_items:
-                if not isinstance(item, dict):
-                    continue
-                title = (item.get('title') or '').strip()
-                abstract = (item.get('abstract') or '').strip()
-                if not title or title in seen:
-                    continue
-                seen.add(title)
-                items.append({
-                    'title': title[:80],
-                    'summary': (abstract[:200] or title),
-                    'likes': safe_int(item.get('hot', 0)),
-                    'platform': '抖音',
-                    'source_type': '头条财经',
-                    'sentiment': estimate_sentiment(title + ' ' + abstract),
-                    'creator_type': '财经资讯平台',
-                    'publish_time': _pubdate_to_iso(item.get('publish_time') or item.get('behot_time')),
-                })
-                bt = item.get('behot_time', 0)
-                if bt:
-                    max_behot = bt
         except Exception as e:
             print(f'[头条财经-page{page_idx+1}] {e}')
             break
-
-    return items
-
-def fetch_weibo():
-    """微博热搜 — 通过 Tophub 聚合 API + 官方 API（财经过滤）— 目标 30+"""
-    items = []
-    seen = set()
-
-    # Approach 1: Tophub 聚合 API（稳定可用，全量采集 ~51条）
-    try:
-        r = requests.get('https://api.codelife.cc/api/top/list?lang=cn&id=KqndgxeLl9',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
         for item in data.get('data') or []:
-            word = (item.get('title') or '').strip()
-            hot_str = item.get('hotValue') or ''
-            # 解析 "108万" → 1080000
-            hot = 0
-            m = re.match(r'([\d.]+)\s*万', hot_str)
-            if m:
-                hot = int(float(m.group(1)) * 10000)
-            else:
-                hot = safe_int(re.sub(r'[^\d]', '', hot_str))
-            if word and is_finance(word) and word not in seen:
-                seen.add(word)
-                items.append({
-                    'title': word[:80],
-                    'summary': word,
-                    'likes': hot,
-                    'platform': '微博',
-                    'source_type': '热搜',
-                    'sentiment': estimate_sentiment(word),
-                    'creator_type': '微博热搜',
-                    'publish_time': now_iso(),
-                })
-    except Exception as e:
-        print(f'[微博-tophub] {e}')
-
-    # Approach 2: 官方 ajax API 兜底
-    if len(items) < 30:
-        try:
-            r = requests.get('https://weibo.com/ajax/side/hotSearch',
-                             headers=HEADERS, timeout=TIMEOUT)
-            data = r.json()
-            for item in (data.get('data') or {}).get('realtime') or []:
-                word = item.get('word') or item.get('note') or ''
-                hot = safe_int(item.get('raw_hot') or item.get('num'))
-                if word and is_finance(word) and word not in seen:
-                    seen.add(word)
-                    items.append({
-                        'title': word[:80],
-                        'summary': word,
-                        'likes': hot,
-                        'platform': '微博',
-                        'source_type': '热搜',
-                        'sentiment': estimate_sentiment(word),
-                        'creator_type': '微博热搜',
-                        'publish_time': now_iso(),
-                    })
-        except Exception as e:
-            print(f'[微博-ajax] {e}')
-
-    return items
-
-def fetch_eastmoney():
-    """东方财富 7x24 快讯 + Tophub 东方财富热榜 — 目标 30+"""
-    items = []
-    seen = set()
-
-    # Source 1: 7x24 快讯 API (finance focused, ~10 items)
-    try:
-        url = f'https://np-listapi.eastmoney.com/comm/web/getNewsByColumns?client=web&biz=web_724&column=350&pageSize=50&maxNewsId=0&type=0&req_trace=sa_{int(time.time())}'
-        r = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in (data.get('data') or {}).get('list') or []:
+            if not isinstance(item, dict):
+                continue
             title = (item.get('title') or '').strip()
-            content = (item.get('content') or '').strip()
-            text = title or content[:100]
-            if text and len(text) >= 4 and text not in seen:
-                seen.add(text)
-                items.append({
-                    'title': text[:80],
-                    'summary': (content[:200] or text),
-                    'likes': 0,
-                    'platform': '东方财富',
-                    'source_type': '快讯',
-                    'sentiment': estimate_sentiment(text + ' ' + content),
-                    'creator_type': '财经资讯平台',
-                    'publish_time': item.get('showTime') or now_iso(),
-                })
-    except Exception as e:
-        print(f'[东方财富-7x24] {e}')
-
-    # Source 2: Tophub 东方财富热榜 (~20 items)
-    try:
-        r = requests.get('https://api.codelife.cc/api/top/list?lang=cn&id=Y2KeDGQdNP',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in data.get('data') or []:
+            abstract = (item.get('abstract') or '').strip()
+            if not title:
+                continue
+            pairs.append((title, Item(
+                title=title[:80],
+                summary=(abstract[:200] or title),
+                likes=safe_int(item.get('hot', 0)),
+                platform='抖音',
+                source_type='头条财经',
+                sentiment=estimate_sentiment(title + ' ' + abstract),
+                creator_type='财经资讯平台',
+                publish_time=_pubdate_to_iso(item.get('publish_time') or item.get('behot_time')),
+            )))
+            bt = item.get('behot_time', 0)
+            if bt:
+                max_behot = bt
+    return pairs
+
+
+def _douyin_source():
+    """抖音热搜 + 头条热搜 + 头条财经频道（同属字节跳动）— 目标 30+"""
+    return Source('抖音', [
+        ('抖音', _json_step('https://aweme.snssdk.com/aweme/v1/hot/search/list/', _parse_douyin_hot)),
+        ('头条', _json_step('https://www.toutiao.com/hot-event/hot-board/?origin=toutiao_pc', _parse_toutiao_hot)),
+        ('头条财经', _toutiao_finance_pages),
+    ], merge=lambda parts: Unique().extend(parts.get('抖音')).extend(parts.get('头条')).extend(parts.get('头条财经')).items)
+
+
+def _parse_weibo_tophub(data):
+    pairs = []
+    for item in data.get('data') or []:
+        word = (item.get('title') or '').strip()
+        hot_str = item.get('hotValue') or ''
+        # 解析 "108万" → 1080000
+        hot = 0
+        m = re.match(r'([\d.]+)\s*万', hot_str)
+        if m:
+            hot = int(float(m.group(1)) * 10000)
+        else:
+            hot = safe_int(re.sub(r'[^\d]', '', hot_str))
+        if word and is_finance(word):
+            pairs.append((word, Item(
+                title=word[:80],
+                summary=word,
+                likes=hot,
+                platform='微博',
+                source_type='热搜',
+                sentiment=estimate_sentiment(word),
+                creator_type='微博热搜',
+                publish_time=now_iso(),
+            )))
+    return pairs
+
+
+def _parse_weibo_ajax(data):
+    pairs = []
+    for item in (data.get('data') or {}).get('realtime') or []:
+        word = item.get('word') or item.get('note') or ''
+        hot = safe_int(item.get('raw_hot') or item.get('num'))
+        if word and is_finance(word):
+            pairs.append((word, Item(
+                title=word[:80],
+                summary=word,
+                likes=hot,
+                platform='微博',
+                source_type='热搜',
+                sentiment=estimate_sentiment(word),
+                creator_type='微博热搜',
+                publish_time=now_iso(),
+            )))
+    return pairs
+
+
+def _merge_weibo(parts):
+    acc = Unique().extend(parts.get('tophub'))
+    # 官方 ajax API 兜底（对冲请求：Tophub 慢 / 失败 / 不足 30 条时才发出）
+    if len(acc) < 30:
+        acc.extend(parts.get('ajax'))
+    return acc.items
+
+
+def _weibo_source():
+    """微博热搜 — 通过 Tophub 聚合 API + 官方 API（财经过滤）— 目标 30+"""
+    return Source('微博', [
+        ('tophub', _json_step('https://api.codelife.cc/api/top/list?lang=cn&id=KqndgxeLl9', _parse_weibo_tophub)),
+        ('ajax', _json_step('https://weibo.com/ajax/side/hotSearch', _parse_weibo_ajax)),
+    ], merge=_merge_weibo, hedge_delay=HEDGE_DELAY, accept=_enough_pairs)
+
+
+def _parse_eastmoney_724(data):
+    pairs = []
+    for item in (data.get('data') or {}).get('list') or []:
+        title = (item.get('title') or '').strip()
+        content = (item.get('content') or '').strip()
+        text = title or content[:100]
+        if text and len(text) >= 4:
+            pairs.append((text, Item(
+                title=text[:80],
+                summary=(content[:200] or text),
+                likes=0,
+                platform='东方财富',
+                source_type='快讯',
+                sentiment=estimate_sentiment(text + ' ' + content),
+                creator_type='财经资讯平台',
+                publish_time=item.get('showTime') or now_iso(),
+            )))
+    return pairs
+
+
+def _parse_eastmoney_tophub(data):
+    pairs = []
+    for item in data.get('data') or []:
+        title = (item.get('title') or '').strip()
+        if title:
+            pairs.append((title, Item(
+                title=title[:80],
+                summary=title,
+                likes=0,
+                platform='东方财富',
+                source_type='热榜',
+                sentiment=estimate_sentiment(title),
+                creator_type='财经资讯平台',
+                publish_time=now_iso(),
+            )))
+    return pairs
+
+
+def _eastmoney_search_step(kw):
+    """东方财富关键词搜索 (主动搜索贵金属/热门板块)"""
+    async def step(fetch):
+        r = await fetch(
+            f'https://search-api-web.eastmoney.com/search/jsonp?cb=&param=%7B%22uid%22%3A%22%22%2C%22keyword%22%3A%22{kw}%22%2C%22type%22%3A%5B%22cmsArticleWebOld%22%5D%2C%22client%22%3A%22web%22%2C%22clientType%22%3A%22web%22%2C%22clientVersion%22%3A%22curr%22%2C%22param%22%3A%7B%22cmsArticleWebOld%22%3A%7B%22searchScope%22%3A%22default%22%2C%22sort%22%3A%22default%22%2C%22pageIndex%22%3A1%2C%22pageSize%22%3A10%2C%22preTag%22%3A%22%22%2C%22postTag%22%3A%22%22%7D%7D%7D',
+            headers=HEADERS, timeout=TIMEOUT)
+        text = r.text.strip().lstrip('(').rstrip(');')
+        data = json.loads(text)
+        pairs = []
+        for item in (data.get('result') or {}).get('cmsArticleWebOld') or []:
             title = (item.get('title') or '').strip()
-            if title and title not in seen:
-                seen.add(title)
-                items.append({
-                    'title': title[:80],
-                    'summary': title,
-                    'likes': 0,
-                    'platform': '东方财富',
-                    'source_type': '热榜',
-                    'sentiment': estimate_sentiment(title),
-                    'creator_type': '财经资讯平台',
-                    'publish_time': now_iso(),
-                })
-    except Exception as e:
-        print(f'[东方财富-tophub] {e}')
-
-    # Source 3: 东方财富关键词搜索 (主动搜索贵金属/热门板块)
-    search_kw_em = ['黄金', '白银', '贵金属', '原油', '铁矿石', '钢铁', '天然气', '煤炭', '大豆', '生猪']
-    for kw in search_kw_em:
-        try:
-            r = requests.get(
-                f'https://search-api-web.eastmoney.com/search/jsonp?cb=&param=%7B%22uid%22%3A%22%22%2C%22keyword%22%3A%22{kw}%22%2C%22type%22%3A%5B%22cmsArticleWebOld%22%5D%2C%22client%22%3A%22web%22%2C%22clientType%22%3A%22web%22%2C%22clientVersion%22%3A%22curr%22%2C%22param%22%3A%7B%22cmsArticleWebOld%22%3A%7B%22searchScope%22%3A%22default%22%2C%22sort%22%3A%22default%22%2C%22pageIndex%22%3A1%2C%22pageSize%22%3A10%2C%22preTag%22%3A%22%22%2C%22postTag%22%3A%22%22%7D%7D%7D',
-                headers=HEADERS, timeout=TIMEOUT)
-            text = r.text.strip().lstrip('(').rstrip(');')
-            data = json.loads(text)
-            articles = (data.get('result') or {}).get('cmsArticleWebOld') or []
-            for item in articles:
-                title = (item.get('title') or '').strip()
-                summary = (item.get('content') or '')[:200].strip()
-                if title and title not in seen:
-                    seen.add(title)
-                    items.append({
-                        'title': title[:80],
-                        'summary': summary or title,
-                        'likes': 0,
-                        'platform': '东方财富',
-                        'source_type': f'搜索-{kw}',
-                        'sentiment': estimate_sentiment(title + ' ' + summary),
-                        'creator_type': '财经资讯平台',
-                        'publish_time': item.get('date') or now_iso(),
-                    })
-        except Exception as e:
-            print(f'[东方财富-搜索-{kw}] {e}')
-
+            summary = (item.get('content') or '')[:200].strip()
+            if title:
+                pairs.append((title, Item(
+                    title=title[:80],
+                    summary=summary or title,
+                    likes=0,
+                    platform='东方财富',
+                    source_type=f'搜索-{kw}',
+                    sentiment=estimate_sentiment(title + ' ' + summary),
+                    creator_type='财经资讯平台',
+                    publish_time=item.get('date') or now_iso(),
+                )))
+        return pairs
+    return step
+
+
+EASTMONEY_SEARCH_KW = ['黄金', '白银', '贵金属', '原油', '铁矿石', '钢铁', '天然气', '煤炭', '大豆', '生猪']
+
+
+def _eastmoney_source():
+    """东方财富 7x24 快讯 + Tophub 东方财富热榜 + 关键词搜索 — 目标 30+"""
+    url_724 = f'https://np-listapi.eastmoney.com/comm/web/getNewsByColumns?client=web&biz=web_724&column=350&pageSize=50&maxNewsId=0&type=0&req_trace=sa_{int(time.time())}'
+    steps = [
+        ('7x24', _json_step(url_724, _parse_eastmoney_724)),
+        ('tophub', _json_step('https://api.codelife.cc/api/top/list?lang=cn&id=Y2KeDGQdNP', _parse_eastmoney_tophub)),
+    ]
+    steps += [(f'搜索-{kw}', _eastmoney_search_step(kw)) for kw in EASTMONEY_SEARCH_KW]
+
+    def merge(parts):
+        acc = Unique()
+        for key, _ in steps:
+            acc.extend(parts.get(key))
+        return acc.items
+    return Source('东方财富', steps, merge=merge)
+
+
+def _parse_cailian(data):
+    items = []
+    for item in (data.get('data') or {}).get('roll_data') or []:
+        title = (item.get('title') or '').strip()
+        content = re.sub(r'<[^>]+>', '', item.get('content') or '').strip()
+        text = title or content[:100]
+        if text and len(text) >= 4:
+            pub_time = now_iso()
+            if item.get('ctime'):
+                pub_time = datetime.fromtimestamp(item['ctime'], tz=timezone.utc).isoformat()
+            items.append(Item(
+                title=text[:80],
+                summary=(content[:200] or text),
+                likes=0,
+                platform='财联社',
+                source_type='电报',
+                sentiment=estimate_sentiment(text + ' ' + content),
+                creator_type='财经资讯平台',
+                publish_time=pub_time,
+            ))
     return items
 
-def fetch_cailian():
+
+def _cailian_source():
     """财联社电报 — 目标 50 条"""
-    items = []
-    try:
-        r = requests.get(
-            'https://www.cls.cn/nodeapi/updateTelegraphList?app=CailianpressWeb&os=web&sv=8.4.6&rn=50',
-            headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in (data.get('data') or {}).get('roll_data') or []:
-            title = (item.get('title') or '').strip()
-            content = re.sub(r'<[^>]+>', '', item.get('content') or '').strip()
-            text = title or content[:100]
-            if text and len(text) >= 4:
-                pub_time = now_iso()
-                if item.get('ctime'):
-                    pub_time = datetime.fromtimestamp(item['ctime'], tz=timezone.utc).isoformat()
-                items.append({
-                    'title': text[:80],
-                    'summary': (content[:200] or text),
-                    'likes': 0,
-                    'platform': '财联社',
-                    'source_type': '电报',
-                    'sentiment': estimate_sentiment(text + ' ' + content),
-                    'creator_type': '财经资讯平台',
-                    'publish_time': pub_time,
-                })
-    except Exception as e:
-        print(f'[财联社] 采集失败: {e}')
-    return items
+    return Source('财联社', [
+        ('电报', _json_step('https://www.cls.cn/nodeapi/updateTelegraphList?app=CailianpressWeb&os=web&sv=8.4.6&rn=50', _parse_cailian)),
+    ])
 
-def fetch_zhihu():
-    """知乎热榜 — 财经过滤，目标 50 条"""
+
+def _parse_zhihu(data):
     items = []
-    try:
-        r = requests.get('https://api.zhihu.com/topstory/hot-lists/total?limit=50',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in data.get('data') or []:
-            target = item.get('target') or {}
-            title = target.get('title') or ''
-            excerpt = target.get('excerpt') or ''
-            detail = item.get('detail_text') or ''
-            hot = safe_int(re.sub(r'[^\d]', '', detail))
-            if title and is_finance(title + ' ' + excerpt):
-                items.append({
-                    'title': title[:80],
-                    'summary': (excerpt[:200] or title),
-                    'likes': hot,
-                    'platform': '知乎',
-                    'source_type': '热榜',
-                    'sentiment': estimate_sentiment(title + ' ' + excerpt),
-                    'creator_type': '聚合热榜',
-                    'publish_time': now_iso(),
-                })
-    except Exception as e:
-        print(f'[知乎] 采集失败: {e}')
+    for item in data.get('data') or []:
+        target = item.get('target') or {}
+        title = target.get('title') or ''
+        excerpt = target.get('excerpt') or ''
+        detail = item.get('detail_text') or ''
+        hot = safe_int(re.sub(r'[^\d]', '', detail))
+        if title and is_finance(title + ' ' + excerpt):
+            items.append(Item(
+                title=title[:80],
+                summary=(excerpt[:200] or title),
+                likes=hot,
+                platform='知乎',
+                source_type='热榜',
+                sentiment=estimate_sentiment(title + ' ' + excerpt),
+                creator_type='聚合热榜',
+                publish_time=now_iso(),
+            ))
     return items
 
-def fetch_baidu():
-    """百度热搜 (realtime 财经过滤 + 财经频道) — 目标 30+"""
-    items = []
-    seen = set()
 
-    def _parse_baidu(data):
-        flat = []
-        for card in (data.get('data') or {}).get('cards') or []:
-            for c in card.get('content') or []:
-                if isinstance(c.get('content'), list):
-                    flat.extend(c['content'])
-                elif c.get('word'):
-                    flat.append(c)
-        return flat
-
-    # Source 1: 实时热搜（财经过滤）
-    try:
-        r = requests.get('https://top.baidu.com/api/board?platform=wise&tab=realtime',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in _parse_baidu(data):
+def _zhihu_source():
+    """知乎热榜 — 财经过滤，目标 50 条"""
+    return Source('知乎', [
+        ('热榜', _json_step('https://api.zhihu.com/topstory/hot-lists/total?limit=50', _parse_zhihu)),
+    ])
+
+
+def _flatten_baidu(data):
+    flat = []
+    for card in (data.get('data') or {}).get('cards') or []:
+        for c in card.get('content') or []:
+            if isinstance(c.get('content'), list):
+                flat.extend(c['content'])
+            elif c.get('word'):
+                flat.append(c)
+    return flat
+
+
+def _parse_baidu(source_type, finance_only):
+    def parse(data):
+        pairs = []
+        for item in _flatten_baidu(data):
             word = item.get('word') or ''
             desc = item.get('desc') or ''
             hot = safe_int(item.get('hotScore'))
-            if word and is_finance(word + ' ' + desc) and word not in seen:
-                seen.add(word)
-                items.append({
-                    'title': word[:80],
-                    'summary': (desc[:200] or word),
-                    'likes': hot,
-                    'platform': '百度',
-                    'source_type': '热搜',
-                    'sentiment': estimate_sentiment(word + ' ' + desc),
-                    'creator_type': '聚合热榜',
-                    'publish_time': now_iso(),
-                })
-    except Exception as e:
-        print(f'[百度-realtime] {e}')
-
-    # Source 2: 财经热搜（补充财经专题）
-    if len(items) < 30:
-        try:
-            r = requests.get('https://top.baidu.com/api/board?platform=wise&tab=finance',
-                             headers=HEADERS, timeout=TIMEOUT)
-            data = r.json()
-            for item in _parse_baidu(data):
-                word = item.get('word') or ''
-                desc = item.get('desc') or ''
-                hot = safe_int(item.get('hotScore'))
-                if word and word not in seen:
-                    seen.add(word)
-                    items.append({
-                        'title': word[:80],
-                        'summary': (desc[:200] or word),
-                        'likes': hot,
-                        'platform': '百度',
-                        'source_type': '财经热搜',
-                        'sentiment': estimate_sentiment(word + ' ' + desc),
-                        'creator_type': '聚合热榜',
-                        'publish_time': now_iso(),
-                    })
-        except Exception as e:
-            print(f'[百度-finance] {e}')
-
-    return items
+            if word and (not finance_only or is_finance(word + ' ' + desc)):
+                pairs.append((word, Item(
+                    title=word[:80],
+                    summary=(desc[:200] or word),
+                    likes=hot,
+                    platform='百度',
+                    source_type=source_type,
+                    sentiment=estimate_sentiment(word + ' ' + desc),
+                    creator_type='聚合热榜',
+                    publish_time=now_iso(),
+                )))
+        return pairs
+    return parse
+
+
+def _merge_baidu(parts):
+    acc = Unique().extend(parts.get('realtime'))
+    # 财经热搜（补充财经专题；对冲请求：实时热搜慢 / 失败 / 不足 30 条时才发出）
+    if len(acc) < 30:
+        acc.extend(parts.get('finance'))
+    return acc.items
+
+
+def _baidu_source():
+    """百度热搜 (realtime 财经过滤 + 财经频道) — 目标 30+"""
+    return Source('百度', [
+        ('realtime', _json_step('https://top.baidu.com/api/board?platform=wise&tab=realtime', _parse_baidu('热搜', True))),
+        ('finance', _json_step('https://top.baidu.com/api/board?platform=wise&tab=finance', _parse_baidu('财经热搜', False))),
+    ], merge=_merge_baidu, hedge_delay=HEDGE_DELAY, accept=_enough_pairs)
 
-def fetch_bilibili():
-    """B站财经频道 + 热搜 + 排行 — 目标 30+"""
-    items = []
-    seen = set()
 
-    # Source 1: 财经频道动态（rid=207, 二次过滤确保财经相关）~50条
-    try:
-        r = requests.get('https://api.bilibili.com/x/web-interface/dynamic/region?rid=207&ps=50',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in (data.get('data') or {}).get('archives') or []:
+def _parse_bilibili_videos(source_type, creator_type):
+    def parse(data):
+        pairs = []
+        entries = (data.get('data') or {}).get('archives') or (data.get('data') or {}).get('list') or []
+        for item in entries:
             title = (item.get('title') or '').strip()
             desc = (item.get('desc') or '').strip()
             views = (item.get('stat') or {}).get('view') or 0
-            if title and is_finance(title + ' ' + desc) and title not in seen and not _is_stale_title(title):
-                seen.add(title)
-                items.append({
-                    'title': title[:80],
-                    'summary': (desc[:200] or title),
-                    'likes': safe_int(views),
-                    'platform': 'B站',
-                    'source_type': '财经频道',
-                    'sentiment': estimate_sentiment(title + ' ' + desc),
-                    'creator_type': '视频社区',
-                    'publish_time': _pubdate_to_iso(item.get('pubdate')),
-                })
-    except Exception as e:
-        print(f'[B站-财经频道] {e}')
-
-    # Source 2: 热搜词（财经过滤）
-    try:
-        r = requests.get('https://s.search.bilibili.com/main/hotword',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in data.get('list') or []:
-            kw = item.get('keyword') or ''
-            if kw and is_finance(kw) and kw not in seen:
-                seen.add(kw)
-                items.append({
-                    'title': kw[:80],
-                    'summary': kw,
-                    'likes': safe_int(item.get('heat_score')),
-                    'platform': 'B站',
-                    'source_type': '热搜',
-                    'sentiment': estimate_sentiment(kw),
-                    'creator_type': '聚合热榜',
-                    'publish_time': now_iso(),
-                })
-    except Exception as e:
-        print(f'[B站-热搜] {e}')
-
-    # Source 3: 全站排行榜（财经过滤）
-    try:
-        r = requests.get('https://api.bilibili.com/x/web-interface/ranking/v2?rid=0&type=all',
-                         headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in (data.get('data') or {}).get('list') or []:
-            title = item.get('title') or ''
-            desc = item.get('desc') or ''
-            views = (item.get('stat') or {}).get('view') or 0
-            if title and is_finance(title + ' ' + desc) and title not in seen and not _is_stale_title(title):
-                seen.add(title)
-                items.append({
-                    'title': title[:80],
-                    'summary': (desc[:200] or title),
-                    'likes': safe_int(views),
-                    'platform': 'B站',
-                    'source_type': '排行',
-                    'sentiment': estimate_sentiment(title + ' ' + desc),
-                    'creator_type': '聚合热榜',
-                    'publish_time': _pubdate_to_iso(item.get('pubdate')),
-                })
-    except Exception as e:
-        print(f'[B站-排行] {e}')
-
-    # Source 4: 主动关键词搜索（补充 KOL 深度内容）
+            if title and is_finance(title + ' ' + desc) and not _is_stale_title(title):
+                pairs.append((title, Item(
+                    title=title[:80],
+                    summary=(desc[:200] or title),
+                    likes=safe_int(views),
+                    platform='B站',
+                    source_type=source_type,
+                    sentiment=estimate_sentiment(title + ' ' + desc),
+                    creator_type=creator_type,
+                    publish_time=_pubdate_to_iso(item.get('pubdate')),
+                )))
+        return pairs
+    return parse
+
+
+def _parse_bilibili_hotword(data):
+    pairs = []
+    for item in data.get('list') or []:
+        kw = item.get('keyword') or ''
+        if kw and is_finance(kw):
+            pairs.append((kw, Item(
+                title=kw[:80],
+                summary=kw,
+                likes=safe_int(item.get('heat_score')),
+                platform='B站',
+                source_type='热搜',
+                sentiment=estimate_sentiment(kw),
+                creator_type='聚合热榜',
+                publish_time=now_iso(),
+            )))
+    return pairs
+
+
+def _parse_bilibili_search(kw):
+    def parse(data):
+        pairs = []
+        for item in (data.get('data') or {}).get('result') or []:
+            title = re.sub(r'<[^>]+>', '', item.get('title') or '').strip()
+            desc = re.sub(r'<[^>]+>', '', item.get('description') or '').strip()
+            author = item.get('author') or ''
+            views = safe_int(item.get('play'))
+            if title and is_finance(title + ' ' + desc) and not _is_stale_title(title):
+                pairs.append((title, Item(
+                    title=title[:80],
+                    summary=(desc[:200] or title),
+                    likes=views,
+                    platform='B站',
+                    source_type=f'搜索-{kw}',
+                    sentiment=estimate_sentiment(title + ' ' + desc),
+                    creator_type='视频博主',
+                    creator_name=author,
+                    publish_time=_pubdate_to_iso(item.get('pubdate') or item.get('senddate')),
+                )))
+        return pairs
+    return parse
+
+
+def _bilibili_source():
+    """B站财经频道 + 热搜 + 排行 + 主动关键词搜索 — 目标 30+"""
     search_headers = {
         **HEADERS,
         'Referer': 'https://search.bilibili.com/',
     }
-    for kw in ACTIVE_SEARCH_KW:
-        if len(items) >= 80:
-            break
-        try:
-            r = requests.get(
-                'https://api.bilibili.com/x/web-interface/wbi/search/type',
-                params={
-                    'search_type': 'video',
-                    'keyword': kw,
-                    'order': 'click',
-                    'duration': 1,   # 最近一天
-                    'page': 1,
-                    'pagesize': 10,
-                },
-                headers=search_headers, timeout=TIMEOUT)
-            data = r.json()
-            for item in (data.get('data') or {}).get('result') or []:
-                title = re.sub(r'<[^>]+>', '', item.get('title') or '').strip()
-                desc = re.sub(r'<[^>]+>', '', item.get('description') or '').strip()
-                author = item.get('author') or ''
-                views = safe_int(item.get('play'))
-                if title and is_finance(title + ' ' + desc) and title not in seen and not _is_stale_title(title):
-                    seen.add(title)
-                    items.append({
-                        'title': title[:80],
-                        'summary': (desc[:200] or title),
-                        'likes': views,
-                        'platform': 'B站',
-                        'source_type': f'搜索-{kw}',
-                        'sentiment': estimate_sentiment(title + ' ' + desc),
-                        'creator_type': '视频博主',
-                        'creator_name': author,
-                        'publish_time': _pubdate_to_iso(item.get('pubdate') or item.get('senddate')),
-                    })
-            time.sleep(0.3)  # 避免限流
-        except Exception as e:
-            print(f'[B站-搜索-{kw}] {e}')
+    steps = [
+        # 财经频道动态（rid=207, 二次过滤确保财经相关）~50条
+        ('财经频道', _json_step('https://api.bilibili.com/x/web-interface/dynamic/region?rid=207&ps=50',
+                            _parse_bilibili_videos('财经频道', '视频社区'))),
+        ('热搜', _json_step('https://s.search.bilibili.com/main/hotword', _parse_bilibili_hotword)),
+        ('排行', _json_step('https://api.bilibili.com/x/web-interface/ranking/v2?rid=0&type=all',
+                          _parse_bilibili_videos('排行', '聚合热榜'))),
+    ]
+    # 主动关键词搜索（补充 KOL 深度内容）：按顺序对冲发出，凑够 80 条即不再搜索
+    steps += [
+        (f'搜索-{kw}', _json_step(
+            'https://api.bilibili.com/x/web-interface/wbi/search/type',
+            _parse_bilibili_search(kw),
+            headers=search_headers,
+            params={
+                'search_type': 'video',
+                'keyword': kw,
+                'order': 'click',
+                'duration': 1,   # 最近一天
+                'page': 1,
+                'pagesize': 10,
+            }))
+        for kw in ACTIVE_SEARCH_KW
+    ]
+
+    def merge(parts):
+        acc = Unique()
+        for key, _ in steps:
+            if key.startswith('搜索-') and len(acc) >= 80:
+                break
+            acc.extend(parts.get(key))
+        return acc.items
 
-    return items
+    def enough(parts):
+        return len(merge(parts)) >= 80
+    return Source('B站', steps, merge=merge, hedge_delay=HEDGE_DELAY, enough=enough)
 
-def fetch_sina_finance():
-    """新浪财经热点新闻 — 目标 50 条"""
+
+def _parse_sina_finance(data):
     items = []
-    try:
-        r = requests.get(
-            'https://feed.mix.sina.com.cn/api/roll/get?pageid=153&lid=2516&k=&num=50&page=1',
-            headers=HEADERS, timeout=TIMEOUT)
-        data = r.json()
-        for item in (data.get('result') or {}).get('data') or []:
-            title = (item.get('title') or '').strip()
-            summary = (item.get('intro') or item.get('summary') or '').strip()
-            pub_time = now_iso()
-            if item.get('ctime'):
-                try:
-                    pub_time = datetime.fromtimestamp(int(item['ctime']), tz=timezone.utc).isoformat()
-                except: pass
-            if title and len(title) >= 4:
-                items.append({
-                    'title': title[:80],
-                    'summary': (summary[:200] or title),
-                    'likes': 0,
-                    'platform': '新浪财经',
-                    'source_type': '财经新闻',
-                    'sentiment': estimate_sentiment(title + ' ' + summary),
-                    'creator_type': '财经资讯平台',
-                    'publish_time': pub_time,
-                })
-    except Exception as e:
-        print(f'[新浪财经] 采集失败: {e}')
+    for item in (data.get('result') or {}).get('data') or []:
+        title = (item.get('title') or '').strip()
+        summary = (item.get('intro') or item.get('summary') or '').strip()
+        pub_time = now_iso()
+        if item.get('ctime'):
+            try:
+                pub_time = datetime.fromtimestamp(int(item['ctime']), tz=timezone.utc).isoformat()
+            except: pass
+        if title and len(title) >= 4:
+            items.append(Item(
+                title=title[:80],
+                summary=(summary[:200] or title),
+                likes=0,
+                platform='新浪财经',
+                source_type='财经新闻',
+                sentiment=estimate_sentiment(title + ' ' + summary),
+                creator_type='财经资讯平台',
+                publish_time=pub_time,
+            ))
     return items
 
+
+def _sina_finance_source():
+    """新浪财经热点新闻 — 目标 50 条"""
+    return Source('新浪财经', [
+        ('财经新闻', _json_step('https://feed.mix.sina.com.cn/api/roll/get?pageid=153&lid=2516&k=&num=50&page=1', _parse_sina_finance)),
+    ])
 def _parse_xhs_ssr(html):
     """从小红书 HTML 中提取 __INITIAL_STATE__ SSR 数据."""
     m = re.search(r'window\.__INITIAL_STATE__\s*=\s*(.+?)</script>', html, re.DOTALL)
@@ -821,60 +817,94 @@ def _parse_xhs_ssr(html):
     return results
 
 
-def fetch_xiaohongshu():
-    """小红书热门 — explore SSR + 频道页，间歇性可用 — 目标 30+"""
-    items = []
-    seen = set()
+def _xhs_pairs(notes, source_type):
+    return [(n['title'], Item(
+        title=n['title'][:80],
+        summary=n['title'],
+        likes=n['likes'],
+        platform='小红书',
+        source_type=source_type,
+        sentiment=estimate_sentiment(n['title']),
+        creator_type='小红书博主',
+        publish_time=now_iso(),
+    )) for n in notes]
 
-    def _add(notes, source_type):
-        for n in notes:
-            t = n['title']
-            if t in seen:
-                continue
-            seen.add(t)
-            items.append({
-                'title': t[:80],
-                'summary': t,
-                'likes': n['likes'],
-                'platform': '小红书',
-                'source_type': source_type,
-                'sentiment': estimate_sentiment(t),
-                'creator_type': '小红书博主',
-                'publish_time': now_iso(),
-            })
 
-    # Source 1: explore 首页 SSR
-    try:
-        r = requests.get('https://www.xiaohongshu.com/explore', headers=HEADERS, timeout=TIMEOUT)
+def _xhs_step(url, source_type, log_miss=False):
+    async def step(fetch):
+        r = await fetch(url, headers=HEADERS, timeout=TIMEOUT)
         if r.status_code == 200 and len(r.text) > 50000:
-            notes = _parse_xhs_ssr(r.text)
-            _add(notes, '热门笔记')
-        else:
+            return _xhs_pairs(_parse_xhs_ssr(r.text), source_type)
+        if log_miss:
             print(f'[小红书] explore 返回 {len(r.text)} 字节 (无 SSR)')
-    except Exception as e:
-        print(f'[小红书-explore] {e}')
+        return []
+    return step
+
 
-    # Source 2: 频道页（推荐/美食/旅行等，各频道内容不同）
-    if len(items) < 30:
-        channels = ['homefeed_recommend', 'homefeed.food_v3', 'homefeed.travel_v3']
-        for cid in channels:
-            if len(items) >= 40:
+XHS_CHANNELS = ['homefeed_recommend', 'homefeed.food_v3', 'homefeed.travel_v3']
+
+
+def _xhs_items(parts):
+    acc = Unique().extend(parts.get('explore'))
+    # 频道页（推荐/美食/旅行等，各频道内容不同）
+    if len(acc) < 30:
+        for cid in XHS_CHANNELS:
+            if len(acc) >= 40:
                 break
-            try:
-                r = requests.get(f'https://www.xiaohongshu.com/explore?channel_id={cid}',
-                                 headers=HEADERS, timeout=TIMEOUT)
-                if r.status_code == 200 and len(r.text) > 50000:
-                    notes = _parse_xhs_ssr(r.text)
-                    _add(notes, '频道热门')
-            except Exception as e:
-                print(f'[小红书-{cid}] {e}')
+            acc.extend(parts.get(cid))
+    return acc.items
 
+
+def _xhs_enough(parts):
+    """explore 已有 30 条，或加上频道页凑够 40 条：不再请求后续频道"""
+    return len(parts.get('explore') or []) >= 30 or len(_xhs_items(parts)) >= 40
+
+
+def _merge_xiaohongshu(parts):
+    items = _xhs_items(parts)
     if not items:
         print('[小红书] SSR 不可用（可能被限流），本次返回 0 条')
-
     return items
 
 
+def _xiaohongshu_source():
+    """小红书热门 — explore SSR + 频道页，间歇性可用 — 目标 30+"""
+    steps = [('explore', _xhs_step('https://www.xiaohongshu.com/explore', '热门笔记', log_miss=True))]
+    steps += [(cid, _xhs_step(f'https://www.xiaohongshu.com/explore?channel_id={cid}', '频道热门'))
+              for cid in XHS_CHANNELS]
+    # 对冲执行：explore 慢 / 失败 / 不够时才依次请求频道页，够用即停
+    return Source('小红书', steps, merge=_merge_xiaohongshu, hedge_delay=HEDGE_DELAY, enough=_xhs_enough)
+
+
+# 单源同步入口（保留旧调用方式）
+def fetch_douyin():
+    return run_source(_douyin_source())
+
+def fetch_weibo():
+    return run_source(_weibo_source())
+
+def fetch_eastmoney():
+    return run_source(_eastmoney_source())
+
+def fetch_cailian():
+    return run_source(_cailian_source())
+
+def fetch_zhihu():
+    return run_source(_zhihu_source())
+
+def fetch_baidu():
+    return run_source(_baidu_source())
+
+def fetch_bilibili():
+    return run_source(_bilibili_source())
+
+def fetch_sina_finance():
+    return run_source(_sina_finance_source())
+
+def fetch_xiaohongshu():
+    return run_source(_xiaohongshu_source())
+
+
 # ==================== 隔夜美股行情 ====================
 US_MARKET_CACHE = os.path.join(DATA_DIR, 'us_market_cache.json')
 
@@ -894,13 +924,12 @@ US_SYMBOLS = [
 def fetch_us_market():
     """从雪球获取隔夜美股行情 — 半导体 + 科技 + 三大指数"""
     try:
-        s = requests.Session()
-        s.headers.update({'User-Agent': UA})
-        s.get('https://xueqiu.com/', timeout=5)  # 获取 cookie
+        home = http_client.get('https://xueqiu.com/', headers=HEADERS, timeout=5)  # 获取 cookie
 
         symbols = ','.join(sym for sym, _, _ in US_SYMBOLS)
-        r = s.get(
+        r = http_client.get(
             f'https://stock.xueqiu.com/v5/stock/realtime/quotec.json?symbol={symbols}',
+            headers={**HEADERS, 'Cookie': http_client.cookie_header(home)},
             timeout=TIMEOUT
         )
         data = r.json()
@@ -956,73 +985,95 @@ def dedup(items):
     seen = set()
     result = []
     for item in items:
-        key = re.sub(r'[\W\s]', '', (item.get('title') or ''))[:20]
+        key = item.dedup_key
         if not key or key in seen:
             continue
         seen.add(key)
         result.append(item)
     return result
 
+def _classify_item(item):
+    """新条目入库前的一次性判定：None 保留，否则返回拒绝原因"""
+    if is_noise_category(item.keyword_hits(_MATCHER)):
+        return 'noise'
+    if _is_stale_title(item.title):
+        return 'stale_title'
+    return None
+
 # ==================== 主采集流程 ====================
-ALL_FETCHERS = [
-    ('抖音', fetch_douyin),
-    ('微博', fetch_weibo),
-    ('东方财富', fetch_eastmoney),
-    ('财联社', fetch_cailian),
-    ('新浪财经', fetch_sina_finance),
-    ('知乎', fetch_zhihu),
-    ('百度', fetch_baidu),
-    ('B站', fetch_bilibili),
-    ('小红书', fetch_xiaohongshu),
+# 每次采集重新构建（部分 URL 带时间戳）
+ALL_SOURCES = [
+    _douyin_source,
+    _weibo_source,
+    _eastmoney_source,
+    _cailian_source,
+    _sina_finance_source,
+    _zhihu_source,
+    _baidu_source,
+    _bilibili_source,
+    _xiaohongshu_source,
 ]
 
-def collect_all():
-    """并行采集所有数据源，返回 { items, source_counts, fetch_time, ... }"""
+def collect_all(deadline=None):
+    """所有数据源的子请求统一并发调度，返回 { items, source_counts, fetch_time, ... }
+
+    deadline: 全局截止秒数（默认 COLLECT_DEADLINE=25），到点未完成的子请求丢弃，已完成部分照常入库
+    """
     all_items = []
     source_counts = {}
     errors = []
-
-    print(f'[{datetime.now().strftime("%H:%M:%S")}] 开始采集 {len(ALL_FETCHERS)} 个数据源...')
-
-    with ThreadPoolExecutor(max_workers=len(ALL_FETCHERS)) as executor:
-        futures = {executor.submit(fn): name for name, fn in ALL_FETCHERS}
-        for future in as_completed(futures):
-            name = futures[future]
-            try:
-                items = future.result(timeout=20)
-                source_counts[name] = len(items)
-                all_items.extend(items)
-                print(f'  ✅ {name}: {len(items)} 条')
-            except Exception as e:
-                source_counts[name] = 0
-                errors.append(f'{name}: {str(e)}')
-                print(f'  ❌ {name}: {e}')
+    partial = []
+
+    sources = [build() for build in ALL_SOURCES]
+    n_requests = sum(len(src.steps) for src in sources)
+    print(f'[{datetime.now().strftime("%H:%M:%S")}] 开始采集 {len(sources)} 个数据源 ({n_requests} 个子请求并发)...')
+
+    report, meta = run_sources(sources, deadline=deadline, with_meta=True, scope='sentiment')
+    for src in sources:
+        res = report[src.name]
+        items = res['items']
+        source_counts[src.name] = len(items)
+        if res['skipped']:
+            print(f'  ⛔ {src.name}: 熔断中，本轮跳过')
+            continue
+        all_items.extend(items)
+        if res['timedOut']:
+            partial.append(src.name)
+        if items:
+            mark = '✅' if res['complete'] else '⚠️'
+            print(f'  {mark} {src.name}: {len(items)} 条 ({res["stepsDone"]}/{res["stepsTotal"]} 子请求)')
+        else:
+            reason = '; '.join(res['errors'][:3]) or ('超时' if res['timedOut'] else '无数据')
+            if res['errors'] or res['timedOut']:
+                errors.append(f'{src.name}: {reason}')
+            print(f'  ❌ {src.name}: {reason}')
+    print(f'  ⏱️ 并发采集耗时: {meta["elapsed"]:.1f}s')
 
     # 去重 + 排序
     all_items = dedup(all_items)
 
-    # 过滤娱乐/体育等无关内容
-    before_filter = len(all_items)
-    all_items = [item for item in all_items if not is_noise_category(item.get('title', '') + ' ' + item.get('summary', ''))]
-    noise_filtered = before_filter - len(all_items)
-    if noise_filtered > 0:
-        print(f'  🗑️ 过滤娱乐/体育噪音: {noise_filtered} 条')
-
-    # 过滤标题中包含过时日期的内容（跨平台兜底）
-    before_stale = len(all_items)
-    all_items = [item for item in all_items if not _is_stale_title(item.get('title', ''))]
-    stale_filtered = before_stale - len(all_items)
-    if stale_filtered > 0:
-        print(f'  📅 过滤过时标题: {stale_filtered} 条')
-
-    # 过滤实际时间戳过旧的内容(>12小时，仅影响有真实时间戳的源)
-    before_time = len(all_items)
-    all_items = [item for item in all_items if not _is_stale_by_time(item.get('publish_time'), max_hours=12)]
-    time_filtered = before_time - len(all_items)
+    # 跨轮次条目库：只对首次出现的条目做噪音 / 过时标题判定，老条目只更新互动数
+    store = ItemStore(STORE_FILE)
+    stats = store.ingest(all_items, classify=_classify_item)
+    rejected = stats['rejected']
+    print(f'  🗃️ 条目库: 新增 {stats["new"]} 条, 更新 {stats["updated"]} 条, 库内 {len(store)} 条')
+    if rejected.get('noise'):
+        print(f'  🗑️ 过滤娱乐/体育噪音: {rejected["noise"]} 条')
+    if rejected.get('stale_title'):
+        print(f'  📅 过滤过时标题: {rejected["stale_title"]} 条')
+
+    # 输出最近窗口内出现过的条目；实际时间戳过旧的内容(>12小时，仅影响有真实时间戳的源)随时间推移每轮复查
+    window = store.window()
+    all_items = [item for item in window if not _is_stale_by_time(item.publish_time, max_hours=12)]
+    time_filtered = len(window) - len(all_items)
     if time_filtered > 0:
-        print(f'  ⏰ 过滤超过48h旧内容: {time_filtered} 条')
+        print(f'  ⏰ 过滤超过12h旧内容: {time_filtered} 条')
+    try:
+        store.save()
+    except OSError as e:
+        print(f'  ⚠️ 条目库保存失败: {e}')
 
-    all_items.sort(key=lambda x: x.get('likes', 0), reverse=True)
+    all_items.sort(key=lambda x: x.likes or 0, reverse=True)
 
     # 提取趋势主题
     trends = extract_trends(all_items)
@@ -1031,13 +1082,16 @@ def collect_all():
         print(f'      {t["icon"]} {t["name"]}: {t["mention_count"]}条提及, 热度{t["heat_score"]}, {t["sentiment"]}')
 
     result = {
-        'items': all_items,
+        'items': [item.to_dict() for item in all_items],
         'source_counts': source_counts,
         'total': len(all_items),
         'trends': trends,
         'fetch_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'fetch_ts': int(time.time()),
         'errors': errors,
+        'partial_sources': partial,
+        'store': {'new': stats['new'], 'updated': stats['updated'], 'window_hours': store.window_hours},
+        'collect_seconds': meta['elapsed'],
     }
 
     print(f'  📊 共计 {len(all_items)} 条 (去重+过滤后)')
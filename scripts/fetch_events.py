@@ -6,12 +6,19 @@ GitHub Actions 每2小时运行: 抓取财经新闻 → LLM结构化提取 → 
 数据流: 新闻源 → AI事件提炼 → 概念标签 → 行业映射 → hot_events.json → 前端消费
 """
 
-import json, os, re, sys, ssl, time
+import json, os, re, sys, time
 from datetime import datetime, timezone, timedelta
 from urllib.request import urlopen, Request
 from http.cookiejar import CookieJar
 from urllib.request import build_opener, HTTPCookieProcessor, HTTPSHandler
 
+try:
+    from scripts import http_client, quote_cache, source_health
+except ImportError:  # 作为独立脚本运行
+    import http_client
+    import quote_cache
+    import source_health
+
 # ==================== .env 自动加载 ====================
 def _load_dotenv():
     """从项目根目录 .env 文件加载环境变量（不覆盖已有变量）"""
@@ -168,26 +175,54 @@ def _analyst_snippet(views, keywords, limit=2):
 
 
 def _ssl_ctx():
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    return ctx
+    return http_client.ssl_context(verify=False)
 
 
 def fetch_http(url, timeout=15):
     """GET request with timeout and error handling"""
-    req = Request(url, headers={
+    headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) fund-assistant/2.0',
         'Accept': 'application/json, text/xml, */*',
-    })
+    }
     try:
-        with urlopen(req, timeout=timeout, context=_ssl_ctx()) as resp:
-            return resp.read().decode('utf-8', errors='replace')
+        return http_client.get_text(url, headers=headers, timeout=timeout, verify=False)
     except Exception as e:
         print(f"  [WARN] fetch failed: {url[:80]}... - {e}", file=sys.stderr)
         return None
 
 
+# RSS 源的 ETag / Last-Modified / 正文哈希，未变化时直接复用上次解析结果
+_feed_state = http_client.ValidatorStore(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'events_feed_state.json'))
+
+
+def fetch_feed(url, parse, timeout=15):
+    """条件 GET + 解析，返回 parse 结果（内容未变时为缓存结果），失败返回 None"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) fund-assistant/2.0',
+        'Accept': 'application/rss+xml, text/xml, */*',
+    }
+    try:
+        payload, _ = http_client.get_if_changed(_feed_state, url, parse, headers=headers, timeout=timeout, verify=False)
+        return payload
+    except Exception as e:
+        print(f"  [WARN] fetch failed: {url[:80]}... - {e}", file=sys.stderr)
+        return None
+
+
+def _rss_titles(source, limit):
+    def parse(raw):
+        import xml.etree.ElementTree as ET
+        root = ET.fromstring(raw)
+        return [
+            {'title': title, 'source': source, 'time': item.findtext('pubDate', '')}
+            for item in root.findall('.//item')[:limit]
+            for title in [(item.findtext('title') or '').strip()]
+            if title
+        ]
+    return parse
+
+
 # ==================== 新闻源抓取 ====================
 
 def fetch_sina_news():
@@ -248,25 +283,11 @@ def fetch_cls_news():
 
 def fetch_rss_bbc():
     """BBC Business RSS (国际视角)"""
-    import xml.etree.ElementTree as ET
-    items = []
-    raw = fetch_http('https://feeds.bbci.co.uk/news/business/rss.xml')
-    if not raw:
-        return items
-    try:
-        root = ET.fromstring(raw)
-        for item in root.findall('.//item')[:15]:
-            title = (item.findtext('title') or '').strip()
-            if title:
-                items.append({'title': title, 'source': 'BBC', 'time': item.findtext('pubDate', '')})
-    except Exception as e:
-        print(f"  [WARN] BBC RSS: {e}", file=sys.stderr)
-    return items
+    return fetch_feed('https://feeds.bbci.co.uk/news/business/rss.xml', _rss_titles('BBC', 15)) or []
 
 
 def fetch_rss_reuters():
     """Reuters World/Business News via Google News RSS (地缘政治核心源)"""
-    import xml.etree.ElementTree as ET
     items = []
     # Reuters自有RSS已关闭，改用Google News搜索Reuters来源
     rss_urls = [
@@ -274,17 +295,7 @@ def fetch_rss_reuters():
         'https://news.google.com/rss/search?q=geopolitics+OR+sanctions+OR+OPEC+OR+Iran+OR+tariff+when:1d&hl=en&gl=US&ceid=US:en',
     ]
     for url in rss_urls:
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:15]:
-                title = (item.findtext('title') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'Reuters/Google', 'time': item.findtext('pubDate', '')})
-        except Exception as e:
-            print(f"  [WARN] Reuters/Google RSS: {e}", file=sys.stderr)
+        items.extend(fetch_feed(url, _rss_titles('Reuters/Google', 15)) or [])
     # 去重
     seen = set()
     unique = []
@@ -297,45 +308,20 @@ def fetch_rss_reuters():
 
 def fetch_rss_aljazeera():
     """Al Jazeera RSS (中东/非洲/地缘视角)"""
-    import xml.etree.ElementTree as ET
-    items = []
-    raw = fetch_http('https://www.aljazeera.com/xml/rss/all.xml')
-    if not raw:
-        return items
-    try:
-        root = ET.fromstring(raw)
-        for item in root.findall('.//item')[:12]:
-            title = (item.findtext('title') or '').strip()
-            if title:
-                items.append({'title': title, 'source': 'AlJazeera', 'time': item.findtext('pubDate', '')})
-    except Exception as e:
-        print(f"  [WARN] AlJazeera RSS: {e}", file=sys.stderr)
-    return items
+    return fetch_feed('https://www.aljazeera.com/xml/rss/all.xml', _rss_titles('AlJazeera', 12)) or []
 
 
 def fetch_rss_ft():
     """Financial Times RSS (国际财经+地缘)"""
-    import xml.etree.ElementTree as ET
-    items = []
     rss_urls = [
         'https://www.ft.com/rss/home',
         'https://www.ft.com/world?format=rss',
     ]
     for url in rss_urls:
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:10]:
-                title = (item.findtext('title') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'FT', 'time': item.findtext('pubDate', '')})
-            if items:
-                break
-        except Exception as e:
-            print(f"  [WARN] FT RSS: {e}", file=sys.stderr)
-    return items
+        items = fetch_feed(url, _rss_titles('FT', 10))
+        if items:
+            return items
+    return []
 
 
 def fetch_guancha_news():
@@ -813,27 +799,18 @@ def _fetch_realtime_market_pct():
         '114.mm':  '农产品',
     }
     all_codes = list(etf_map.keys()) + list(futures_map.keys())
-    secids = ','.join(all_codes)
-    url = f'https://push2.eastmoney.com/api/qt/ulist.np/get?fltt=2&fields=f2,f3,f4,f12,f14&secids={secids}'
     result = {}
     try:
-        req = Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urlopen(req, timeout=8, context=_ssl_ctx()) as resp:
-            data = json.loads(resp.read().decode())
-        items = (data.get('data') or {}).get('diff') or []
+        quotes = quote_cache.get_quotes(all_codes)
         # 按原始secid顺序匹配
-        for item in items:
-            code_num = str(item.get('f12', ''))
-            pct = item.get('f3')
-            if pct is None:
+        for secid in all_codes:
+            item = quotes.get(secid)
+            if item is None or item.get('f3') is None:
                 continue
-            # 查找 code_num 对应的 secid (可能是 1.xxx 或 0.xxx 或 113.xxx)
-            for secid, tag in {**etf_map, **futures_map}.items():
-                if secid.split('.')[-1] == code_num or secid.endswith('.' + code_num):
-                    # ETF 优先于期货
-                    if tag not in result or secid in etf_map:
-                        result[tag] = float(pct)
-                    break
+            tag = etf_map.get(secid) or futures_map[secid]
+            # ETF 优先于期货
+            if tag not in result or secid in etf_map:
+                result[tag] = float(item['f3'])
     except Exception as e:
         print(f'  [WARN] 实时行情获取失败: {e}')
     return result
@@ -1493,6 +1470,24 @@ def build_output(llm_result, prev_data, now, all_news=None, xueqiu_data=None, an
 
 # ==================== 主流程 ====================
 
+_SKIPPED = object()
+
+
+def _guarded(name, fetcher, is_ok=bool, skipped=None):
+    """经熔断器调用单个数据源：熔断中返回 skipped，否则记录结果与耗时后返回"""
+    key = f'events:{name}'
+    if not source_health.allow(key):
+        return skipped
+    started = time.monotonic()
+    try:
+        result = fetcher()
+    except Exception as e:
+        source_health.record(key, False, time.monotonic() - started, e)
+        raise
+    source_health.record(key, is_ok(result), time.monotonic() - started, '' if is_ok(result) else 'empty')
+    return result
+
+
 def main():
     now = datetime.now(timezone(timedelta(hours=8)))
     print(f"{'='*50}")
@@ -1503,7 +1498,10 @@ def main():
 
     # 0. 雪球实时热词 (独立于LLM流程, 先行抓取)
     print("\n❄️ [0/3] 雪球实时热词...")
-    xueqiu_data = fetch_xueqiu_hotwords()
+    xueqiu_data = _guarded('雪球热词', fetch_xueqiu_hotwords, is_valid_xueqiu_data, skipped=_SKIPPED)
+    if xueqiu_data is _SKIPPED:
+        print("  ⛔ 雪球热词: 熔断中，本轮跳过")
+        xueqiu_data = None
     if is_valid_xueqiu_data(xueqiu_data):
         xq_count = len(xueqiu_data.get('hotwords', []))
         print(f"  ✅ 雪球热词: {xq_count} 条")
@@ -1526,8 +1524,10 @@ def main():
         ('观察者网', fetch_guancha_news),
     ]:
         try:
-            items = fetcher()
-            if items:
+            items = _guarded(name, fetcher, skipped=_SKIPPED)
+            if items is _SKIPPED:
+                print(f"  ⛔ {name}: 熔断中，本轮跳过")
+            elif items:
                 all_news.extend(items)
                 sources_ok.append(name)
                 print(f"  ✅ {name}: {len(items)} 条")
@@ -1535,6 +1535,7 @@ def main():
                 print(f"  ⚠️ {name}: 0 条")
         except Exception as e:
             print(f"  ❌ {name}: {e}")
+    _feed_state.save()
 
     if not all_news:
         print("\n❌ 没有获取到任何新闻, 保留上次数据")
@@ -4,10 +4,10 @@
 全天候24/7高频运行，提供近实时的国际媒体头条 + 市场异动自动告警
 
 核心算法:
-  1. 并行抓取12+数据源 (ThreadPoolExecutor)
-  2. 三级去重: MD5精确 → SimHash近似 → 语义聚类(概念组+token Jaccard)
+  1. 并发抓取12+数据源 (asyncio 采集引擎, 按主机限流 + 全局截止时间)
+  2. 三级去重: MD5精确 → SimHash近似(分段索引) → 语义聚类(概念组+token Jaccard)
   3. 热度评分: Wilson-Hotness变体 (来源权重×时效衰减×事件加成)
-  4. 持久化去重缓存: 跨周期指纹库防旧闻重复上浮
+  4. 持久化去重指纹库 (SQLite, 按首次出现时间过期): 跨周期防旧闻重复上浮
   5. 金融实体提取: 正则NER识别价格/涨跌幅/机构/品种
   6. LLM结构化 + 关键词兜底双保险
 
@@ -19,13 +19,35 @@
 输出: data/realtime_breaking.json → 前端"实时热点·异动"消费
 """
 
-import json, os, re, ssl, sys, time, hashlib
+import json, os, re, sys, time, hashlib, heapq
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 from urllib.request import urlopen, Request
 from urllib.parse import quote
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from email.utils import parsedate_to_datetime
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # GitHub Action 裸环境：退回纯 Python 指纹计算
+    np = None
+
+try:
+    from scripts import http_client, quote_cache
+    from scripts.collect_engine import Source, fetch_if_changed, iter_sources, run_source
+    from scripts.fingerprint_store import FingerprintStore
+    from scripts.keyword_matcher import KeywordMatcher
+    from scripts.simhash_index import SimhashIndex
+    from scripts.text_rules import RuleSet
+except ImportError:  # 作为独立脚本运行
+    import http_client
+    import quote_cache
+    from collect_engine import Source, fetch_if_changed, iter_sources, run_source
+    from fingerprint_store import FingerprintStore
+    from keyword_matcher import KeywordMatcher
+    from simhash_index import SimhashIndex
+    from text_rules import RuleSet
 
 # ==================== .env 加载 ====================
 def _load_dotenv():
@@ -51,6 +73,10 @@ API_BASE = os.environ.get('AI_API_BASE', '').strip()
 MODEL = os.environ.get('BREAKING_AI_MODEL', 'glm-4-flash')
 OUTPUT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'realtime_breaking.json')
 HOT_EVENTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'hot_events.json')
+# 头条抓取全局截止时间（秒）：到点未返回的 feed 丢弃，其余照常进入去重/打分
+FETCH_DEADLINE = float(os.environ.get('BREAKING_FETCH_DEADLINE', '25'))
+# 流式去重后只保留热度最高的 K 条头条进入后续分析
+TOP_K = int(os.environ.get('BREAKING_TOP_K', '300'))
 
 # 自动检测 API 基地址 (与 server.py 中 _AI_PROVIDERS 保持一致)
 if not API_BASE:
@@ -64,10 +90,15 @@ if not API_BASE:
 
 CST = timezone(timedelta(hours=8))
 
-# 去重指纹持久化缓存路径
+# 去重指纹库路径（SQLite）；DEDUP_CACHE_PATH 为旧版 JSON 缓存，首次运行时导入后删除
+DEDUP_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'breaking_dedup.db')
 DEDUP_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'breaking_dedup_cache.json')
 # 缓存保留时长（小时）
 DEDUP_CACHE_TTL_HOURS = 12
+# 已输出事件的滑动窗口时长（小时）
+EVENT_WINDOW_HOURS = 4
+# 各 feed 的 ETag / Last-Modified / 正文哈希 / 上次解析结果（条件请求用）
+FEED_STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'breaking_feed_state.json')
 
 # ==================== 来源权重 (热度评分用) ====================
 SOURCE_WEIGHTS = {
@@ -97,26 +128,79 @@ def _simhash_tokenize(text):
     return tokens
 
 
-def simhash(text, bits=64):
-    """计算文本的SimHash指纹 (64-bit)"""
-    tokens = _simhash_tokenize(text)
-    if not tokens:
-        return 0
-    v = [0] * bits
-    for token in tokens:
-        h = int(hashlib.md5(token.encode()).hexdigest(), 16)
+# 指纹算法版本：与 md5 逐位实现的结果逐位一致；算法变更时递增，旧缓存中的指纹随之作废
+SIMHASH_VERSION = 1
+SIMHASH_MEMO_SIZE = 20000
+_simhash_memo = {}
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64) if np is not None else None
+
+
+@lru_cache(maxsize=65536)
+def _token_hash(token):
+    """token 的 128 位 md5 整数（中文 2-gram 高度重复，走缓存）"""
+    return int.from_bytes(hashlib.md5(token.encode()).digest(), 'big')
+
+
+def _fingerprint_py(hashes, bits):
+    ones = [0] * bits
+    for h in hashes:
         for i in range(bits):
-            if h & (1 << i):
-                v[i] += 1
-            else:
-                v[i] -= 1
+            ones[i] += (h >> i) & 1
+    n = len(hashes)
     fingerprint = 0
     for i in range(bits):
-        if v[i] > 0:
+        if ones[i] * 2 > n:   # 该位 +1 的 token 多于 -1 的
             fingerprint |= (1 << i)
     return fingerprint
 
 
+def _fingerprints_np(token_hashes):
+    """一批标题的 64 位指纹：全部 token 的位矩阵一次展开，按标题分段求和"""
+    lengths = np.array([len(hs) for hs in token_hashes])
+    flat = np.array([h & 0xFFFFFFFFFFFFFFFF for hs in token_hashes for h in hs], dtype=np.uint64)
+    bit_matrix = ((flat[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int32)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    ones = np.add.reduceat(bit_matrix, starts, axis=0)
+    set_bits = (ones * 2 > lengths[:, None]).astype(np.uint64)
+    packed = (set_bits << _BIT_SHIFTS).sum(axis=1, dtype=np.uint64)
+    return [int(fp) for fp in packed]
+
+
+def simhash_many(texts, bits=64):
+    """批量计算 SimHash 指纹（已算过的标题直接取缓存）"""
+    keys = [str(text or '') for text in texts]
+    result = {}
+    todo = {}
+    for key in keys:
+        if key in result or key in todo:
+            continue
+        fp = _simhash_memo.get((key, bits))
+        if fp is not None:
+            result[key] = fp
+            continue
+        tokens = _simhash_tokenize(key)
+        if not tokens:
+            result[key] = 0
+            continue
+        todo[key] = [_token_hash(token) for token in tokens]
+    if todo:
+        if np is not None and bits == 64:
+            fps = _fingerprints_np(list(todo.values()))
+        else:
+            fps = [_fingerprint_py(hashes, bits) for hashes in todo.values()]
+        if len(_simhash_memo) + len(todo) > SIMHASH_MEMO_SIZE:
+            _simhash_memo.clear()
+        for key, fp in zip(todo, fps):
+            result[key] = fp
+            _simhash_memo[(key, bits)] = fp
+    return [result[key] for key in keys]
+
+
+def simhash(text, bits=64):
+    """计算文本的SimHash指纹 (64-bit)"""
+    return simhash_many([text], bits)[0]
+
+
 def simhash_distance(h1, h2):
     """两个SimHash之间的海明距离"""
     x = h1 ^ h2
@@ -129,6 +213,12 @@ def _parse_time(time_str):
     """解析各种格式的时间字符串为 datetime (CST)"""
     if not time_str:
         return None
+    if isinstance(time_str, str):
+        return _parse_time_cached(time_str)
+    return _parse_time_uncached(time_str)
+
+
+def _parse_time_uncached(time_str):
     # ISO格式 (财联社)
     try:
         dt = datetime.fromisoformat(time_str)
@@ -146,6 +236,12 @@ def _parse_time(time_str):
     return None
 
 
+@lru_cache(maxsize=8192)
+def _parse_time_cached(time_str):
+    """同一时间串（RSS 各周期重复出现）只解析一次"""
+    return _parse_time_uncached(time_str)
+
+
 def _time_decay_score(pub_time_str, now=None):
     """基于发布时间的衰减分数: 越新越高, 6小时半衰期"""
     if now is None:
@@ -189,99 +285,139 @@ NUMBER_PATTERNS = [
     (r'\d+美元|\d+亿|\d+万亿', 2),  # 中文数字
 ]
 
+# 紧急度 / 数据加成规则编译为一条正则，标题只扫描一遍（小写化不影响数字规则）
+_HOTNESS_RULES = (RuleSet(ignore_case=True)
+                  .add_table('urgency', URGENCY_PATTERNS)
+                  .add_table('data', NUMBER_PATTERNS)
+                  .compile())
 
-def compute_hotness(headline, category=None):
-    """计算单条新闻的热度分数"""
-    title = str(headline.get('title', ''))
-    source = str(headline.get('source', ''))
-    pub_time = str(headline.get('time', ''))
 
-    # 1. 来源权重
+_SOURCE_WEIGHT_KEYS = [(s.lower(), w) for s, w in SOURCE_WEIGHTS.items()]
+
+
+@lru_cache(maxsize=2048)
+def _source_weight(source):
+    """来源权重：精确匹配，否则按 SOURCE_WEIGHTS 顺序模糊匹配（来源名 → 权重的别名表按需填充）"""
     source_w = SOURCE_WEIGHTS.get(source, 0.7)
-    # 模糊匹配来源
     if source_w == 0.7:
-        for s, w in SOURCE_WEIGHTS.items():
-            if s.lower() in source.lower() or source.lower() in s.lower():
+        lowered = source.lower()
+        for key, w in _SOURCE_WEIGHT_KEYS:
+            if key in lowered or lowered in key:
                 source_w = w
                 break
+    return source_w
 
-    # 2. 时效衰减
-    freshness = _time_decay_score(pub_time)
 
-    # 3. 类别基础分
-    cat_score = CATEGORY_BASE_SCORE.get(category, 7)
+def _freshness_batch(pub_times, now):
+    """一批发布时间的时效衰减分（同一个 now；无法解析的给 0.5）"""
+    now_ts = now.timestamp()
+    parsed = [_parse_time(t) for t in pub_times]
+    ages = [(now_ts - dt.timestamp()) / 3600 if dt else None for dt in parsed]
+    if np is not None:
+        arr = np.array([a if a is not None else np.nan for a in ages], dtype=float)
+        fresh = np.where(np.isnan(arr), 0.5, 2.0 ** (-np.maximum(np.nan_to_num(arr), 0) / 6.0))
+        return fresh.tolist()
+    return [0.5 if a is None else 2.0 ** (-max(0, a) / 6.0) for a in ages]
 
-    # 4. 紧急关键词加成
-    urgency = 0
-    title_lower = title.lower()
-    for pattern, bonus in URGENCY_PATTERNS:
-        if re.search(pattern, title_lower):
-            urgency += bonus
 
-    # 5. 数字/价格加成 (含具体数据的新闻更有价值)
-    data_bonus = 0
-    for pattern, bonus in NUMBER_PATTERNS:
-        if re.search(pattern, title):
-            data_bonus += bonus
+def compute_hotness_batch(headlines, categories=None, now=None):
+    """批量计算热度分数（与逐条 compute_hotness 一致），categories 与 headlines 一一对应"""
+    if not headlines:
+        return []
+    now = datetime.now(CST) if now is None else now
+    if categories is None:
+        categories = [None] * len(headlines)
+    freshness = _freshness_batch([str(h.get('time', '')) for h in headlines], now)
+    scores = []
+    for h, category, fresh in zip(headlines, categories, freshness):
+        # 1. 来源权重
+        source_w = _source_weight(str(h.get('source', '')))
+        # 3. 类别基础分
+        cat_score = CATEGORY_BASE_SCORE.get(category, 7)
+        # 4. 紧急关键词加成 + 5. 数字/价格加成 (含具体数据的新闻更有价值)
+        bonuses = _HOTNESS_RULES.evaluate(str(h.get('title', '')))
+        # Wilson-Hotness 变体公式
+        # score = source_weight * freshness * (category_base + urgency + data_bonus)
+        score = source_w * fresh * (cat_score + bonuses['urgency'] + bonuses['data'])
+        scores.append(round(score, 2))
+    return scores
 
-    # Wilson-Hotness 变体公式
-    # score = source_weight * freshness * (category_base + urgency + data_bonus)
-    score = source_w * freshness * (cat_score + urgency + data_bonus)
 
-    return round(score, 2)
+def compute_hotness(headline, category=None):
+    """计算单条新闻的热度分数"""
+    return compute_hotness_batch([headline], [category])[0]
 
 
 # ==================== 三级去重引擎 ====================
 
+@lru_cache(maxsize=8192)
+def _dedup_normalize(text):
+    t = text.lower().strip()
+    t = re.sub(r'\s+', '', t)
+    t = re.sub(r'[^\w\u4e00-\u9fff]', '', t)
+    return t
+
+
 class DedupEngine:
     """三级去重: MD5精确 → SimHash近似 → 语义聚类"""
 
-    def __init__(self):
+    def __init__(self, store_path=None):
         self.md5_set = set()           # Level 1: 精确MD5
-        self.simhash_index = {}        # Level 2: SimHash指纹 → headline
+        self.simhash_index = SimhashIndex(max_distance=5, distance=simhash_distance)  # Level 2: SimHash指纹 → headline
         self.clusters = []             # Level 3: 语义聚类
-        self._load_cache()
+        self._members = []             # 成员序号 → (聚类序号, 聚类内位置)
+        self._cluster_index = _FeatureIndex()  # token / 2-gram → 成员序号
+        self.store = FingerprintStore(store_path or DEDUP_STORE_PATH, DEDUP_CACHE_TTL_HOURS)
+        self._loaded = False
 
     def _load_cache(self):
-        """加载持久化指纹缓存"""
+        """加载持久化指纹库（第一次去重时才读取）"""
+        if self._loaded:
+            return
+        self._loaded = True
         try:
-            if os.path.exists(DEDUP_CACHE_PATH):
-                with open(DEDUP_CACHE_PATH, 'r', encoding='utf-8') as f:
-                    cache = json.load(f)
-                now = datetime.now(CST)
-                cutoff = now - timedelta(hours=DEDUP_CACHE_TTL_HOURS)
-                for entry in cache.get('fingerprints', []):
-                    ts = _parse_time(entry.get('ts', ''))
-                    if ts and ts < cutoff:
-                        continue  # 过期条目跳过
-                    self.md5_set.add(entry.get('md5', ''))
-                    sh = entry.get('simhash', 0)
-                    if sh:
-                        self.simhash_index[sh] = entry.get('title', '')
-        except Exception:
-            pass
+            self._migrate_json_cache()
+            # 指纹算法版本不一致时旧 SimHash 不可比，只保留 MD5
+            if self.store.get_meta('simhash_version', str(SIMHASH_VERSION)) != str(SIMHASH_VERSION):
+                self.store.clear('simhash')
+            self.store.set_meta('simhash_version', SIMHASH_VERSION)
+            self.md5_set.update(self.store.load('md5'))
+            for sh in self.store.load('simhash'):
+                self.simhash_index[sh] = ''
+        except Exception as e:
+            print(f'  [WARN] 加载去重指纹库失败: {e}')
+
+    def _migrate_json_cache(self):
+        """旧版 JSON 缓存一次性导入指纹库后删除"""
+        if not os.path.exists(DEDUP_CACHE_PATH):
+            return
+        try:
+            with open(DEDUP_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            same_simhash = cache.get('simhash_version', SIMHASH_VERSION) == SIMHASH_VERSION
+            for entry in cache.get('fingerprints', []):
+                ts = _parse_time(entry.get('ts', ''))
+                ts = ts.timestamp() if ts else None
+                if entry.get('md5'):
+                    self.store.add('md5', entry['md5'], ts)
+                elif entry.get('simhash') and same_simhash:
+                    self.store.add('simhash', entry['simhash'], ts)
+            self.store.flush()
+        except Exception as e:
+            print(f'  [WARN] 迁移旧去重缓存失败: {e}')
+            return
+        os.remove(DEDUP_CACHE_PATH)
 
     def save_cache(self):
-        """保存指纹缓存到磁盘"""
-        now = datetime.now(CST)
-        entries = []
-        for md5_val in self.md5_set:
-            entries.append({'md5': md5_val, 'ts': now.isoformat()})
-        for sh, title in self.simhash_index.items():
-            entries.append({'simhash': sh, 'title': title, 'ts': now.isoformat()})
+        """追加本轮新增指纹（已有指纹保留首次出现时间，按 TTL 过期）"""
         try:
-            os.makedirs(os.path.dirname(DEDUP_CACHE_PATH), exist_ok=True)
-            with open(DEDUP_CACHE_PATH, 'w', encoding='utf-8') as f:
-                json.dump({'fingerprints': entries, 'updated': now.isoformat()}, f, ensure_ascii=False)
+            self.store.close()
         except Exception as e:
             print(f'  [WARN] 保存去重缓存失败: {e}')
 
     def _normalize(self, text):
         """标准化文本用于去重"""
-        t = str(text or '').lower().strip()
-        t = re.sub(r'\s+', '', t)
-        t = re.sub(r'[^\w\u4e00-\u9fff]', '', t)
-        return t
+        return _dedup_normalize(str(text or ''))
 
     def is_duplicate(self, headline):
         """三级去重检测, 返回 (is_dup, dup_level)"""
@@ -289,30 +425,41 @@ class DedupEngine:
         norm = self._normalize(title)
         if not norm:
             return True, 'empty'
+        self._load_cache()
 
         # Level 1: MD5精确匹配
         md5 = hashlib.md5(norm[:60].encode()).hexdigest()
         if md5 in self.md5_set:
             return True, 'md5'
         self.md5_set.add(md5)
+        self.store.add('md5', md5)
 
-        # Level 2: SimHash近似匹配 (海明距离 ≤ 5)
+        # Level 2: SimHash近似匹配 (海明距离 ≤ 5，分段索引取候选后再精确确认)
         sh = simhash(title)
-        for existing_sh in self.simhash_index:
-            if simhash_distance(sh, existing_sh) <= 5:
-                return True, 'simhash'
+        if self.simhash_index.find(sh) is not None:
+            return True, 'simhash'
         self.simhash_index[sh] = title
+        self.store.add('simhash', sh)
 
         # Level 3: 语义聚类 (概念组 + token Jaccard)
-        for cluster in self.clusters:
-            for member in cluster:
-                if self._semantic_similar(title, member):
-                    cluster.append(title)
-                    return True, 'semantic'
+        # 倒排索引取共享 token / 2-gram 的成员，按 (聚类, 成员) 原顺序逐个确认
+        features = _text_tokens(title) | _title_grams(norm)
+        for member_id in sorted(self._cluster_index.candidates(features), key=self._members.__getitem__):
+            cluster_idx, pos = self._members[member_id]
+            if self._semantic_similar(title, self.clusters[cluster_idx][pos]):
+                self._add_member(cluster_idx, title, features)
+                return True, 'semantic'
         # 新聚类
-        self.clusters.append([title])
+        self.clusters.append([])
+        self._add_member(len(self.clusters) - 1, title, features)
         return False, None
 
+    def _add_member(self, cluster_idx, title, features):
+        cluster = self.clusters[cluster_idx]
+        self._cluster_index.add(len(self._members), features)
+        self._members.append((cluster_idx, len(cluster)))
+        cluster.append(title)
+
     def _semantic_similar(self, a, b):
         """语义相似度判断"""
         token_sim = _token_jaccard(a, b)
@@ -372,15 +519,8 @@ def extract_entities(title):
     return entities
 
 # ==================== SSL / HTTP ====================
-_SSL_CTX = None
-
 def _ssl_ctx():
-    global _SSL_CTX
-    if _SSL_CTX is None:
-        _SSL_CTX = ssl.create_default_context()
-        _SSL_CTX.check_hostname = False
-        _SSL_CTX.verify_mode = ssl.CERT_NONE
-    return _SSL_CTX
+    return http_client.ssl_context(verify=False)
 
 
 def fetch_http(url, timeout=10, headers=None):
@@ -389,135 +529,109 @@ def fetch_http(url, timeout=10, headers=None):
     if headers:
         hdrs.update(headers)
     try:
-        req = Request(url, headers=hdrs)
-        with urlopen(req, timeout=timeout, context=_ssl_ctx()) as resp:
-            return resp.read().decode('utf-8', errors='replace')
+        return http_client.get_text(url, headers=hdrs, timeout=timeout, verify=False)
     except Exception as e:
         print(f'  [HTTP] {url[:80]}... → {e}')
         return None
 
 
 # ==================== 国际媒体 RSS 抓取 ====================
+# 每个数据源 = 若干独立子请求（feed）+ 合并规则，由 collect_engine 统一并发调度
 
-def fetch_reuters_headlines():
-    """Reuters via Google News RSS — 实时财经/地缘头条"""
+_GNEWS_EN = 'https://news.google.com/rss/search?q={q}&hl=en&gl=US&ceid=US:en'
+_GNEWS_ZH = 'https://news.google.com/rss/search?q={q}&hl=zh-CN&gl=CN&ceid=CN:zh-Hans'
+_HTTP_HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
+
+
+def _parse_rss_titles(raw, source, limit, source_from_title=None):
+    """RSS → [{title, source, time}]；source_from_title 非空时从 "标题 - 媒体" 末尾取媒体名（缺省用该值）"""
     items = []
+    root = ET.fromstring(raw)
+    for item in root.findall('.//item')[:limit]:
+        title = (item.findtext('title') or '').strip()
+        pub = (item.findtext('pubDate') or '').strip()
+        if not title:
+            continue
+        name = source
+        if source_from_title:
+            source_match = re.search(r'\s*-\s*([^-]+)$', title)
+            name = source_match.group(1).strip() if source_match else source_from_title
+        items.append({'title': title, 'source': name, 'time': pub})
+    return items
+
+
+_feed_state = http_client.ValidatorStore(FEED_STATE_PATH)
+
+
+def _rss_step(url, source, limit, source_from_title=None):
+    async def step(fetch):
+        return await fetch_if_changed(
+            fetch, _feed_state, url,
+            lambda raw: _parse_rss_titles(raw, source, limit, source_from_title),
+            headers=_HTTP_HEADERS, timeout=10, verify=False)
+    return step
+
+
+def _rss_source(name, feeds, cap, dedup=True):
+    """feeds = [(url, limit, source_from_title)]；合并后单源去重并截断到 cap 条"""
+    steps = [(f'{name}#{i + 1}', _rss_step(url, name, limit, from_title))
+             for i, (url, limit, from_title) in enumerate(feeds)]
+
+    def merge(parts):
+        items = []
+        for payload in parts.values():
+            items.extend(payload)
+        return (_dedup_items(items) if dedup else items)[:cap]
+    return Source(name, steps, merge=merge)
+
+
+def _reuters_source():
+    """Reuters via Google News RSS — 实时财经/地缘头条"""
     queries = [
         'site:reuters.com+when:6h',
         'site:reuters.com+oil+OR+crude+OR+gold+OR+tariff+OR+sanctions+OR+Iran+OR+Fed+when:6h',
         'site:reuters.com+markets+OR+stocks+OR+commodities+OR+energy+when:6h',
         'site:reuters.com+OPEC+OR+price+cap+OR+embargo+OR+Korea+OR+Japan+OR+India+when:6h',
     ]
-    for q in queries:
-        url = f'https://news.google.com/rss/search?q={q}&hl=en&gl=US&ceid=US:en'
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:12]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'Reuters', 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] Reuters RSS: {e}')
-    return _dedup_items(items)[:20]
+    return _rss_source('Reuters', [(_GNEWS_EN.format(q=q), 12, None) for q in queries], cap=20)
 
 
-def fetch_bloomberg_headlines():
+def _bloomberg_source():
     """Bloomberg via Google News RSS"""
-    items = []
     queries = [
         'site:bloomberg.com+when:6h',
         'site:bloomberg.com+markets+OR+economy+OR+oil+OR+gold+OR+energy+when:6h',
         'site:bloomberg.com+OPEC+OR+crude+OR+sanctions+OR+price+cap+OR+tariff+when:6h',
     ]
-    for q in queries:
-        url = f'https://news.google.com/rss/search?q={q}&hl=en&gl=US&ceid=US:en'
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:12]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'Bloomberg', 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] Bloomberg RSS: {e}')
-    return _dedup_items(items)[:15]
+    return _rss_source('Bloomberg', [(_GNEWS_EN.format(q=q), 12, None) for q in queries], cap=15)
 
 
-def fetch_cnbc_headlines():
+def _cnbc_source():
     """CNBC RSS Feed"""
-    items = []
     urls = [
         'https://search.cnbc.com/rs/search/combinedcms/view.xml?partnerId=wrss01&id=100003114',  # Top News
         'https://search.cnbc.com/rs/search/combinedcms/view.xml?partnerId=wrss01&id=15839135',   # World
         'https://search.cnbc.com/rs/search/combinedcms/view.xml?partnerId=wrss01&id=100727362',  # Investing
     ]
-    for url in urls:
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:10]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'CNBC', 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] CNBC RSS: {e}')
-    return _dedup_items(items)[:15]
+    return _rss_source('CNBC', [(url, 10, None) for url in urls], cap=15)
 
 
-def fetch_marketwatch_headlines():
+def _marketwatch_source():
     """MarketWatch RSS"""
-    items = []
     urls = [
         'https://feeds.marketwatch.com/marketwatch/topstories/',
         'https://feeds.marketwatch.com/marketwatch/marketpulse/',
     ]
-    for url in urls:
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:10]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'MarketWatch', 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] MarketWatch RSS: {e}')
-    return _dedup_items(items)[:12]
+    return _rss_source('MarketWatch', [(url, 10, None) for url in urls], cap=12)
 
 
-def fetch_yahoo_finance_headlines():
+def _yahoo_finance_source():
     """Yahoo Finance RSS"""
-    items = []
-    url = 'https://finance.yahoo.com/news/rssindex'
-    raw = fetch_http(url)
-    if raw:
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:15]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'Yahoo Finance', 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] Yahoo Finance RSS: {e}')
-    return items[:12]
+    return _rss_source('Yahoo Finance', [('https://finance.yahoo.com/news/rssindex', 15, None)], cap=12, dedup=False)
 
 
-def fetch_google_news_finance():
+def _google_news_source():
     """Google News Finance 聚合 — 全球金融/地缘热点（中英双语）"""
-    items = []
     # 英文查询
     en_queries = [
         'gold+price+OR+oil+price+OR+stock+market+OR+federal+reserve+OR+ECB+when:6h',
@@ -539,182 +653,158 @@ def fetch_google_news_finance():
         '美联储+OR+降息+OR+加息+OR+通胀+when:6h',
         '地缘+OR+中东+OR+伊朗+OR+战争+OR+冲突+when:6h',
     ]
-    for q in en_queries:
-        url = f'https://news.google.com/rss/search?q={q}&hl=en&gl=US&ceid=US:en'
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:8]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    source_match = re.search(r'\s*-\s*([^-]+)$', title)
-                    source = source_match.group(1).strip() if source_match else 'Google News'
-                    items.append({'title': title, 'source': source, 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] Google News EN: {e}')
-    for q in zh_queries:
-        url = f'https://news.google.com/rss/search?q={quote(q)}&hl=zh-CN&gl=CN&ceid=CN:zh-Hans'
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:8]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    source_match = re.search(r'\s*-\s*([^-]+)$', title)
-                    source = source_match.group(1).strip() if source_match else 'Google News'
-                    items.append({'title': title, 'source': source, 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] Google News ZH: {e}')
-    return _dedup_items(items)[:40]
-
-
-def fetch_cls_flash():
-    """财联社快讯 — 中文实时快讯"""
-    items = []
-    url = 'https://www.cls.cn/nodeapi/updateTelegraphList?app=CailianpressWeb&os=web&sv=7.7.5&rn=20'
-    raw = fetch_http(url)
-    if not raw:
-        return items
-    try:
-        data = json.loads(raw)
-        rolls = data.get('data', {}).get('roll_data', [])
-        for r in rolls[:20]:
-            content = r.get('content', '').strip()
-            title = r.get('title', '').strip() or content[:80]
-            ctime = r.get('ctime', 0)
-            if title:
-                items.append({
-                    'title': title,
-                    'source': '财联社',
-                    'time': datetime.fromtimestamp(ctime, tz=CST).strftime('%Y-%m-%dT%H:%M:%S+08:00') if ctime else '',
-                })
-    except Exception as e:
-        print(f'  [WARN] CLS flash: {e}')
-    return items[:15]
-
-
-def fetch_sina_live():
-    """新浪财经7x24实时快讯"""
-    items = []
-    url = 'https://zhibo.sina.com.cn/api/zhibo/feed?page=1&page_size=20&zhibo_id=152&tag_id=0&type=0'
-    raw = fetch_http(url)
-    if not raw:
-        return items
-    try:
-        data = json.loads(raw)
-        feeds = data.get('result', {}).get('data', {}).get('feed', {}).get('list', [])
-        for f in feeds[:15]:
-            rich_text = f.get('rich_text', '').strip()
-            # 清除HTML
-            text = re.sub(r'<[^>]+>', '', rich_text).strip()
-            title = text[:100] if text else ''
-            create_time = f.get('create_time', '')
-            if title and len(title) > 8:
-                items.append({'title': title, 'source': '新浪财经', 'time': create_time})
-    except Exception as e:
-        print(f'  [WARN] Sina live: {e}')
-    return items[:12]
+    feeds = [(_GNEWS_EN.format(q=q), 8, 'Google News') for q in en_queries]
+    feeds += [(_GNEWS_ZH.format(q=quote(q)), 8, 'Google News') for q in zh_queries]
+    return _rss_source('Google News', feeds, cap=40)
 
 
-def fetch_bbc_headlines():
+def _bbc_source():
     """BBC World 新闻 — 全球地缘/政经事件"""
-    items = []
     urls = [
         'https://feeds.bbci.co.uk/news/world/rss.xml',
         'https://feeds.bbci.co.uk/news/business/rss.xml',
     ]
-    for url in urls:
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:10]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'BBC', 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] BBC RSS: {e}')
-    return _dedup_items(items)[:15]
+    return _rss_source('BBC', [(url, 10, None) for url in urls], cap=15)
 
 
-def fetch_aljazeera_headlines():
+def _aljazeera_source():
     """半岛电视台 — 中东/地缘视角"""
-    items = []
-    url = 'https://www.aljazeera.com/xml/rss/all.xml'
-    raw = fetch_http(url)
-    if raw:
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:12]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    items.append({'title': title, 'source': 'Al Jazeera', 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] Al Jazeera RSS: {e}')
-    return items[:12]
+    return _rss_source('Al Jazeera', [('https://www.aljazeera.com/xml/rss/all.xml', 12, None)], cap=12, dedup=False)
 
 
-def fetch_energy_headlines():
+def _energy_source():
     """能源/石油专项 — Google News 聚合多个权威能源媒体"""
-    items = []
     queries = [
         'site:oilprice.com+when:8h',
         'crude+oil+OR+OPEC+OR+oil+embargo+OR+oil+price+cap+OR+energy+supply+when:6h',
         'oil+sanctions+OR+oil+production+OR+refinery+OR+petroleum+when:6h',
     ]
-    for q in queries:
-        url = f'https://news.google.com/rss/search?q={q}&hl=en&gl=US&ceid=US:en'
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:10]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    source_match = re.search(r'\s*-\s*([^-]+)$', title)
-                    source = source_match.group(1).strip() if source_match else 'OilPrice'
-                    items.append({'title': title, 'source': source, 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] Energy RSS: {e}')
-    return _dedup_items(items)[:15]
+    return _rss_source('Energy/Oil', [(_GNEWS_EN.format(q=q), 10, 'OilPrice') for q in queries], cap=15)
 
 
-def fetch_asia_headlines():
+def _asia_source():
     """亚太区域新闻 — 韩国/日本/东南亚经济政策"""
-    items = []
     queries = [
         'site:scmp.com+when:8h',
         'site:nikkei.com+when:8h',
         'Korea+economy+OR+Japan+economy+OR+Asia+trade+OR+Asia+energy+when:6h',
     ]
-    for q in queries:
-        url = f'https://news.google.com/rss/search?q={q}&hl=en&gl=US&ceid=US:en'
-        raw = fetch_http(url)
-        if not raw:
-            continue
-        try:
-            root = ET.fromstring(raw)
-            for item in root.findall('.//item')[:8]:
-                title = (item.findtext('title') or '').strip()
-                pub = (item.findtext('pubDate') or '').strip()
-                if title:
-                    source_match = re.search(r'\s*-\s*([^-]+)$', title)
-                    source = source_match.group(1).strip() if source_match else 'Asia News'
-                    items.append({'title': title, 'source': source, 'time': pub})
-        except Exception as e:
-            print(f'  [WARN] Asia RSS: {e}')
-    return _dedup_items(items)[:15]
+    return _rss_source('Asia', [(_GNEWS_EN.format(q=q), 8, 'Asia News') for q in queries], cap=15)
+
+
+def _parse_cls_flash(raw):
+    items = []
+    data = json.loads(raw)
+    rolls = data.get('data', {}).get('roll_data', [])
+    for r in rolls[:20]:
+        content = r.get('content', '').strip()
+        title = r.get('title', '').strip() or content[:80]
+        ctime = r.get('ctime', 0)
+        if title:
+            items.append({
+                'title': title,
+                'source': '财联社',
+                'time': datetime.fromtimestamp(ctime, tz=CST).strftime('%Y-%m-%dT%H:%M:%S+08:00') if ctime else '',
+            })
+    return items[:15]
+
+
+def _parse_sina_live(raw):
+    items = []
+    data = json.loads(raw)
+    feeds = data.get('result', {}).get('data', {}).get('feed', {}).get('list', [])
+    for f in feeds[:15]:
+        rich_text = f.get('rich_text', '').strip()
+        # 清除HTML
+        text = re.sub(r'<[^>]+>', '', rich_text).strip()
+        title = text[:100] if text else ''
+        create_time = f.get('create_time', '')
+        if title and len(title) > 8:
+            items.append({'title': title, 'source': '新浪财经', 'time': create_time})
+    return items[:12]
+
+
+def _text_source(name, url, parse):
+    async def step(fetch):
+        return await fetch_if_changed(fetch, _feed_state, url, parse, headers=_HTTP_HEADERS, timeout=10, verify=False)
+    return Source(name, [(name, step)])
+
+
+def _cls_flash_source():
+    """财联社快讯 — 中文实时快讯"""
+    return _text_source('财联社', 'https://www.cls.cn/nodeapi/updateTelegraphList?app=CailianpressWeb&os=web&sv=7.7.5&rn=20',
+                        _parse_cls_flash)
+
+
+def _sina_live_source():
+    """新浪财经7x24实时快讯"""
+    return _text_source('新浪财经', 'https://zhibo.sina.com.cn/api/zhibo/feed?page=1&page_size=20&zhibo_id=152&tag_id=0&type=0',
+                        _parse_sina_live)
+
+
+HEADLINE_SOURCES = [
+    _reuters_source,
+    _bloomberg_source,
+    _cnbc_source,
+    _marketwatch_source,
+    _yahoo_finance_source,
+    _google_news_source,
+    _bbc_source,
+    _aljazeera_source,
+    _energy_source,
+    _asia_source,
+    _cls_flash_source,
+    _sina_live_source,
+]
+
+
+# 单源同步入口（保留旧调用方式）
+def fetch_reuters_headlines():
+    return run_source(_reuters_source())
+
+
+def fetch_bloomberg_headlines():
+    return run_source(_bloomberg_source())
+
+
+def fetch_cnbc_headlines():
+    return run_source(_cnbc_source())
+
+
+def fetch_marketwatch_headlines():
+    return run_source(_marketwatch_source())
+
+
+def fetch_yahoo_finance_headlines():
+    return run_source(_yahoo_finance_source())
+
+
+def fetch_google_news_finance():
+    return run_source(_google_news_source())
+
+
+def fetch_cls_flash():
+    return run_source(_cls_flash_source())
+
+
+def fetch_sina_live():
+    return run_source(_sina_live_source())
+
+
+def fetch_bbc_headlines():
+    return run_source(_bbc_source())
+
+
+def fetch_aljazeera_headlines():
+    return run_source(_aljazeera_source())
+
+
+def fetch_energy_headlines():
+    return run_source(_energy_source())
+
+
+def fetch_asia_headlines():
+    return run_source(_asia_source())
 
 
 def _dedup_items(items):
@@ -731,8 +821,9 @@ def _dedup_items(items):
     return result
 
 
-def _normalize_event_title(text):
-    t = str(text or '').lower().strip()
+@lru_cache(maxsize=8192)
+def _normalize_event_title_cached(text):
+    t = text.lower().strip()
     t = re.sub(r'\s+', '', t)
     t = re.sub(r'[^\w\u4e00-\u9fff]', '', t)
     for sw in [
@@ -743,6 +834,18 @@ def _normalize_event_title(text):
     return t
 
 
+def _normalize_event_title(text):
+    return _normalize_event_title_cached(str(text or ''))
+
+
+@lru_cache(maxsize=8192)
+def _title_grams(s):
+    """规范化标题的 2-gram 集合（同一标题只切分一次）"""
+    if len(s) <= 2:
+        return frozenset((s,))
+    return frozenset(s[i:i + 2] for i in range(len(s) - 1))
+
+
 def _title_similarity(a, b):
     if not a or not b:
         return 0.0
@@ -751,12 +854,7 @@ def _title_similarity(a, b):
     if (a in b or b in a) and min(len(a), len(b)) >= 8:
         return 0.95
 
-    def grams(s):
-        if len(s) <= 2:
-            return {s}
-        return {s[i:i + 2] for i in range(len(s) - 1)}
-
-    ga, gb = grams(a), grams(b)
+    ga, gb = _title_grams(a), _title_grams(b)
     return len(ga & gb) / max(1, min(len(ga), len(gb)))
 
 
@@ -776,17 +874,21 @@ def _event_score(evt):
     return score
 
 
+@lru_cache(maxsize=8192)
+def _text_tokens(s):
+    """中英文混合 token 集合（英文 word + 中文 2-gram），同一文本只切分一次"""
+    s = s.lower()
+    tokens = set(re.findall(r'[a-z0-9]+', s))
+    # Chinese: overlapping 2-char bigrams (Chinese "words" are typically 2 chars)
+    for seg in re.findall(r'[\u4e00-\u9fff]+', s):
+        for i in range(len(seg) - 1):
+            tokens.add(seg[i:i + 2])
+    return frozenset(tokens)
+
+
 def _token_jaccard(a, b):
     """Token-level Jaccard similarity for Chinese/English mixed text"""
-    def _tokenize(s):
-        s = str(s or '').lower()
-        tokens = set(re.findall(r'[a-z0-9]+', s))
-        # Chinese: overlapping 2-char bigrams (Chinese "words" are typically 2 chars)
-        for seg in re.findall(r'[\u4e00-\u9fff]+', s):
-            for i in range(len(seg) - 1):
-                tokens.add(seg[i:i + 2])
-        return tokens
-    tok_a, tok_b = _tokenize(a), _tokenize(b)
+    tok_a, tok_b = _text_tokens(str(a or '')), _text_tokens(str(b or ''))
     if not tok_a or not tok_b:
         return 0.0
     inter = len(tok_a & tok_b)
@@ -813,17 +915,25 @@ _CONCEPT_GROUPS = [
     {'领导人', '领袖', '任命', '继任', '当选', 'leader', 'appointed', 'successor', '哈梅内伊'},
     {'日本股', '日经', '日股', 'nikkei', 'japan stock', '日本市场'},
 ]
+_CONCEPT_MATCHER = KeywordMatcher()
+for _idx, _group in enumerate(_CONCEPT_GROUPS):
+    _CONCEPT_MATCHER.add_table('concept', sorted(_group), label=_idx)
+_CONCEPT_MATCHER.build()
+
+
+@lru_cache(maxsize=8192)
+def _concept_group_set(text):
+    return frozenset(_CONCEPT_MATCHER.labels(text, 'concept'))
+
+
+def _concept_groups(text):
+    """标题命中的概念组序号（两两比较时同一标题只扫描一次）"""
+    return _concept_group_set(str(text or ''))
 
 
 def _concept_similarity(a, b):
     """两个标题共享多少个概念组"""
-    a_lower, b_lower = str(a or '').lower(), str(b or '').lower()
-    a_groups, b_groups = set(), set()
-    for idx, group in enumerate(_CONCEPT_GROUPS):
-        if any(kw in a_lower for kw in group):
-            a_groups.add(idx)
-        if any(kw in b_lower for kw in group):
-            b_groups.add(idx)
+    a_groups, b_groups = _concept_groups(a), _concept_groups(b)
     shared = len(a_groups & b_groups)
     total = max(len(a_groups | b_groups), 1)
     return shared / total, shared
@@ -836,27 +946,72 @@ def _combined_text(evt):
     return f'{title} {reason}'
 
 
-def semantic_dedupe_events(events, limit=15):
+class _FeatureIndex:
+    """倒排索引：特征（token / 2-gram / 概念组）→ 槽位；只有共享特征的槽位才需要两两打分"""
+
+    def __init__(self):
+        self._postings = {}
+        self._slots = {}
+
+    def add(self, slot, features):
+        self._slots[slot] = features
+        for f in features:
+            self._postings.setdefault(f, set()).add(slot)
+
+    def remove(self, slot):
+        for f in self._slots.pop(slot, ()):
+            bucket = self._postings[f]
+            bucket.discard(slot)
+            if not bucket:
+                del self._postings[f]
+
+    def candidates(self, features):
+        found = set()
+        for f in features:
+            found.update(self._postings.get(f, ()))
+        return found
+
+
+def _event_features(evt):
+    """事件的比较特征（各相似度分量依赖的切分结果都走缓存，每个事件只算一次）"""
+    t = _normalize_event_title(evt.get('title', ''))
+    combined_t = _combined_text(evt)
+    return {
+        't': t,
+        'raw': str(evt.get('title', '')),
+        'combined': combined_t,
+        'cat': str(evt.get('category', '')),
+        # 任一去重条件成立都要求至少共享一个 2-gram / token / 概念组，据此取候选
+        'keys': (_title_grams(t) if t else frozenset()) | _text_tokens(combined_t)
+                | {('concept', g) for g in _concept_groups(combined_t)},
+    }
+
+
+def semantic_dedupe_events(events, limit=15, features=None):
+    """features: {id(evt): _event_features(evt)} 预计算特征，缺失的事件在此补算并写回"""
     deduped = []
+    index = _FeatureIndex()
+    kept_features = []
     for evt in events:
         if not isinstance(evt, dict):
             continue
-        t = _normalize_event_title(evt.get('title', ''))
-        raw_t = str(evt.get('title', ''))
-        combined_t = _combined_text(evt)
+        fe = features.get(id(evt)) if features is not None else None
+        if fe is None:
+            fe = _event_features(evt)
+            if features is not None:
+                features[id(evt)] = fe
+        t, raw_t, combined_t, cat = fe['t'], fe['raw'], fe['combined'], fe['cat']
         if not t:
             continue
-        cat = str(evt.get('category', ''))
         hit_idx = None
-        for i, kept in enumerate(deduped):
-            kt = _normalize_event_title(kept.get('title', ''))
-            raw_kt = str(kept.get('title', ''))
-            combined_kt = _combined_text(kept)
+        for i in sorted(index.candidates(fe['keys'])):
+            kept = kept_features[i]
+            kt, raw_kt, combined_kt = kept['t'], kept['raw'], kept['combined']
             bigram_sim = _title_similarity(t, kt)
             token_sim = _token_jaccard(raw_t, raw_kt)
             combined_token_sim = _token_jaccard(combined_t, combined_kt)
             concept_ratio, concept_shared = _concept_similarity(combined_t, combined_kt)
-            same_cat = cat and cat == str(kept.get('category', ''))
+            same_cat = cat and cat == kept['cat']
             # 同类别+字面相似
             if bigram_sim >= 0.45 and same_cat:
                 hit_idx = i
@@ -879,9 +1034,14 @@ def semantic_dedupe_events(events, limit=15):
                 break
 
         if hit_idx is None:
+            index.add(len(deduped), fe['keys'])
             deduped.append(evt)
+            kept_features.append(fe)
         elif _event_score(evt) > _event_score(deduped[hit_idx]):
+            index.remove(hit_idx)
+            index.add(hit_idx, fe['keys'])
             deduped[hit_idx] = evt
+            kept_features[hit_idx] = fe
 
     deduped.sort(key=_event_score, reverse=True)
     return deduped[:limit]
@@ -1034,141 +1194,80 @@ GLOBAL_COMMODITIES = {
 }
 
 
+# 市场快照分组: (快照标签, secid 表, 异动类型, 日志名称, 异动是否带 tag)
+MARKET_GROUPS = (
+    ('期货', COMMODITY_FUTURES, 'commodity', '大宗商品', True),
+    ('指数', GLOBAL_INDICES, 'index', '全球指数', False),
+    ('ETF', SECTOR_ETFS, 'sector', '行业ETF', True),
+    ('国际', GLOBAL_COMMODITIES, 'global_commodity', '国际商品', True),
+)
+
+
 def _fetch_market_data(secids_dict):
-    """通用东方财富市场数据获取"""
+    """通用东方财富市场数据获取（经进程内行情缓存，并发的分组请求合并为一次）"""
     if not secids_dict:
         return {}
-    secids = ','.join(secids_dict.keys())
-    url = f'https://push2.eastmoney.com/api/qt/ulist.np/get?fltt=2&fields=f2,f3,f4,f12,f14&secids={secids}'
     results = {}
-    try:
-        req = Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urlopen(req, timeout=8, context=_ssl_ctx()) as resp:
-            data = json.loads(resp.read().decode())
-        items = (data.get('data') or {}).get('diff') or []
-        for item in items:
-            code = str(item.get('f12', ''))
-            price = item.get('f2')
-            pct = item.get('f3')
-            name = item.get('f14', '')
-            if pct is None:
-                continue
-            # 匹配 secid
-            for secid, info in secids_dict.items():
-                if secid.split('.')[-1] == code or secid.endswith('.' + code):
-                    results[secid] = {
-                        **info,
-                        'price': price,
-                        'pct': float(pct),
-                        'code': code,
-                        'secid': secid,
-                    }
-                    break
-    except Exception as e:
-        print(f'  [WARN] 市场数据获取失败: {e}')
+    for secid, item in quote_cache.get_quotes(secids_dict).items():
+        pct = item.get('f3')
+        if pct is None:
+            continue
+        try:
+            pct = float(pct)
+        except (TypeError, ValueError):
+            continue
+        results[secid] = {
+            **secids_dict[secid],
+            'price': item.get('f2'),
+            'pct': pct,
+            'code': str(item.get('f12', '')),
+            'secid': secid,
+        }
     return results
 
 
-def detect_market_anomalies():
-    """检测全球市场异动：指数、商品、行业ETF"""
-    anomalies = []
+def fetch_market_groups():
+    """四组行情并发各取一次，供异动检测和 LLM 快照共用: {快照标签: {secid: info}}"""
+    with ThreadPoolExecutor(max_workers=len(MARKET_GROUPS)) as pool:
+        futures = {label: pool.submit(_fetch_market_data, secids) for label, secids, *_ in MARKET_GROUPS}
+    return {label: future.result() for label, future in futures.items()}
 
-    # 1. 国内商品期货
-    print('  📊 检测大宗商品...')
-    commodity_data = _fetch_market_data(COMMODITY_FUTURES)
-    for secid, info in commodity_data.items():
-        meta = COMMODITY_FUTURES[secid]
-        pct = info['pct']
-        if abs(pct) >= meta['threshold']:
-            level = '🔴 剧烈' if abs(pct) >= meta['threshold'] * 2 else '🟡 显著'
-            anomalies.append({
-                'type': 'commodity',
-                'name': meta['short'],
-                'fullName': meta['name'],
-                'icon': meta['icon'],
-                'price': info['price'],
-                'pct': pct,
-                'tag': meta.get('tag', ''),
-                'level': level,
-                'alert': f"{meta['icon']} {meta['short']}{'大涨' if pct > 0 else '大跌'}{abs(pct):.1f}%",
-            })
 
-    # 2. 全球指数
-    print('  📊 检测全球指数...')
-    index_data = _fetch_market_data(GLOBAL_INDICES)
-    for secid, info in index_data.items():
-        meta = GLOBAL_INDICES[secid]
-        pct = info['pct']
-        if abs(pct) >= meta['threshold']:
-            level = '🔴 剧烈' if abs(pct) >= meta['threshold'] * 2 else '🟡 显著'
-            anomalies.append({
-                'type': 'index',
-                'name': meta['short'],
-                'fullName': meta['name'],
-                'icon': meta['icon'],
-                'price': info['price'],
-                'pct': pct,
-                'tag': '',
-                'level': level,
-                'alert': f"{meta['icon']} {meta['short']}{'大涨' if pct > 0 else '大跌'}{abs(pct):.1f}%",
-            })
-
-    # 3. 行业ETF
-    print('  📊 检测行业ETF...')
-    etf_data = _fetch_market_data(SECTOR_ETFS)
-    for secid, info in etf_data.items():
-        meta = SECTOR_ETFS[secid]
-        pct = info['pct']
-        if abs(pct) >= meta['threshold']:
-            level = '🔴 剧烈' if abs(pct) >= meta['threshold'] * 2 else '🟡 显著'
-            anomalies.append({
-                'type': 'sector',
-                'name': meta['short'],
-                'fullName': meta['name'],
-                'icon': meta['icon'],
-                'price': info['price'],
-                'pct': pct,
-                'tag': meta.get('tag', ''),
-                'level': level,
-                'alert': f"{meta['icon']} {meta['short']}{'大涨' if pct > 0 else '大跌'}{abs(pct):.1f}%",
-            })
+def detect_market_anomalies(market=None):
+    """检测全球市场异动：指数、商品、行业ETF（market 为 fetch_market_groups() 结果，缺省时现取）"""
+    market = fetch_market_groups() if market is None else market
+    anomalies = []
 
-    # 4. 国际商品 (COMEX/NYMEX)
-    print('  📊 检测国际商品...')
-    global_data = _fetch_market_data(GLOBAL_COMMODITIES)
-    for secid, info in global_data.items():
-        meta = GLOBAL_COMMODITIES[secid]
-        pct = info['pct']
-        if abs(pct) >= meta['threshold']:
-            level = '🔴 剧烈' if abs(pct) >= meta['threshold'] * 2 else '🟡 显著'
-            anomalies.append({
-                'type': 'global_commodity',
-                'name': meta['short'],
-                'fullName': meta['name'],
-                'icon': meta['icon'],
-                'price': info['price'],
-                'pct': pct,
-                'tag': meta.get('tag', ''),
-                'level': level,
-                'alert': f"{meta['icon']} {meta['short']}{'大涨' if pct > 0 else '大跌'}{abs(pct):.1f}%",
-            })
+    for label, secids, kind, title, with_tag in MARKET_GROUPS:
+        print(f'  📊 检测{title}...')
+        for secid, info in market.get(label, {}).items():
+            meta = secids[secid]
+            pct = info['pct']
+            if abs(pct) >= meta['threshold']:
+                level = '🔴 剧烈' if abs(pct) >= meta['threshold'] * 2 else '🟡 显著'
+                anomalies.append({
+                    'type': kind,
+                    'name': meta['short'],
+                    'fullName': meta['name'],
+                    'icon': meta['icon'],
+                    'price': info['price'],
+                    'pct': pct,
+                    'tag': meta.get('tag', '') if with_tag else '',
+                    'level': level,
+                    'alert': f"{meta['icon']} {meta['short']}{'大涨' if pct > 0 else '大跌'}{abs(pct):.1f}%",
+                })
 
     # 按涨跌幅绝对值排序
     anomalies.sort(key=lambda x: abs(x['pct']), reverse=True)
     return anomalies
 
 
-def get_all_market_snapshot():
-    """获取全量市场快照 (用于LLM上下文)"""
+def get_all_market_snapshot(market=None):
+    """获取全量市场快照 (用于LLM上下文；market 同 detect_market_anomalies)"""
+    market = fetch_market_groups() if market is None else market
     snapshot = {}
-    for label, data_dict in [
-        ('期货', COMMODITY_FUTURES),
-        ('指数', GLOBAL_INDICES),
-        ('ETF', SECTOR_ETFS),
-        ('国际', GLOBAL_COMMODITIES),
-    ]:
-        result = _fetch_market_data(data_dict)
-        for secid, info in result.items():
+    for label, data_dict, *_ in MARKET_GROUPS:
+        for secid, info in market.get(label, {}).items():
             meta = data_dict[secid]
             snapshot[meta.get('short', meta['name'])] = {
                 'pct': info['pct'],
@@ -1392,6 +1491,16 @@ def generate_fallback_events(headlines, anomalies):
     return events[:10]
 
 
+def build_provisional_events(headlines):
+    """快速通道：不等行情与 LLM，用关键词分类 + 关键事件兜底 + 热度先出一版事件"""
+    events = generate_fallback_events(headlines, [])
+    hotness = compute_hotness_batch(events, [evt.get('category') for evt in events])
+    for evt, score in zip(events, hotness):
+        evt['hotness'] = score
+    events.sort(key=lambda x: x.get('hotness', 0), reverse=True)
+    return semantic_dedupe_events(extract_priority_events(headlines) + events, limit=12)
+
+
 # ==================== 输出组装 ====================
 
 CATEGORY_ICONS = {
@@ -1410,39 +1519,121 @@ def build_event_id(event):
     return 'rtb_' + hashlib.md5(text.encode()).hexdigest()[:8]
 
 
-def merge_with_existing(new_events, output_path):
-    """与现有数据合并，保留最近4小时的事件，防止重复"""
-    existing = []
-    try:
-        if os.path.exists(output_path):
+class EventWindow:
+    """最近 hours 小时已输出事件的内存滑动窗口（服务进程内跨周期常驻）
+
+    每个事件入窗时解析一次时间戳、计算一次去重特征；只在进程首次合并时从输出文件冷启动，
+    之后不再回读自己写出的 realtime_breaking.json。
+    """
+
+    def __init__(self, path, hours=EVENT_WINDOW_HOURS):
+        self.path = path
+        self.hours = hours
+        self._entries = None   # [(事件时间戳, 事件, 去重特征)]
+
+    @staticmethod
+    def _event_ts(evt):
+        dt = _parse_time(evt.get('source_time') or evt.get('timestamp') or '')
+        return dt.timestamp() if dt else None
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+        existing = []
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    existing = json.load(f).get('breaking', [])
+        except Exception:
+            pass
+        # 清理旧事件中的微秒时间戳
+        for e in existing:
+            for k in ('source_time', 'timestamp'):
+                v = e.get(k)
+                if v and '.' in v:
+                    e[k] = re.sub(r'\.\d+', '', v)
+        self._entries = [(self._event_ts(e), e, _event_features(e)) for e in existing if isinstance(e, dict)]
+        return self._entries
+
+    def merge(self, new_events, limit=15, now=None, commit=True):
+        """新事件优先并入窗口，返回去重后的前 limit 条（即新的窗口内容）
+
+        commit=False 时只计算合并结果、不改动窗口（临时版本不应进入窗口）
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.hours * 3600
+        # 过滤超过窗口期的旧事件（防止无限堆积）
+        existing = [(e, fe) for ts, e, fe in self._load() if ts is not None and ts > cutoff]
+        # 过滤掉旧的关键词兜底事件（英文截断标题，reason="来源: X"）
+        # 当有新LLM事件时，不保留旧的低质量关键词匹配结果
+        if new_events:
+            existing = [(e, fe) for e, fe in existing if not str(e.get('reason', '')).startswith('来源:')]
+        features = {id(e): fe for e, fe in existing}
+        # 新事件优先，再补旧事件；统一走语义去重
+        merged = semantic_dedupe_events(list(new_events) + [e for e, _ in existing], limit=limit,
+                                        features=features)
+        if commit:
+            self._entries = [(self._event_ts(e), e, features[id(e)]) for e in merged]
+        return merged
+
+
+_EVENT_WINDOWS = {}
+_PUBLISHED = {}
+
+
+def merge_with_existing(new_events, output_path, commit=True):
+    """与最近4小时的事件窗口合并，防止重复"""
+    window = _EVENT_WINDOWS.get(output_path)
+    if window is None:
+        window = _EVENT_WINDOWS[output_path] = EventWindow(output_path)
+    return window.merge(new_events, limit=15, commit=commit)
+
+
+def _published_state(output_path):
+    """最近一次发布的版本号与行情异动 / 财联社快讯区块（进程内常驻，首次使用时从已有输出文件冷启动）"""
+    state = _PUBLISHED.get(output_path)
+    if state is None:
+        state = {'generation': 0, 'anomalies': [], 'anomaly_count': 0, 'cls_flash': [], 'cls_flash_count': 0}
+        try:
             with open(output_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            existing = data.get('breaking', [])
-    except Exception:
-        pass
+            meta = data.get('meta') or {}
+            state['generation'] = int(meta.get('generation') or 0)
+            if isinstance(data.get('anomalies'), list):
+                state['anomalies'] = data['anomalies']
+                state['anomaly_count'] = int(meta.get('anomaly_count') or len(data['anomalies']))
+            if isinstance(data.get('cls_flash'), list):
+                state['cls_flash'] = data['cls_flash']
+                state['cls_flash_count'] = int(meta.get('cls_flash_count') or len(data['cls_flash']))
+        except Exception:
+            pass
+        _PUBLISHED[output_path] = state
+    return state
+
+
+def _next_generation(output_path):
+    """输出版本号：每次发布递增（临时版 / 增强版各占一号），进程首次发布时从已有输出文件续接"""
+    state = _published_state(output_path)
+    state['generation'] += 1
+    return state['generation']
+
+
+def write_output(output, output_path=None):
+    """原子写出：先写临时文件再替换，读方不会读到半个文件"""
+    output_path = output_path or OUTPUT_PATH
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, output_path)
+
 
-    # 过滤超过4小时的旧事件（防止无限堆积）
-    four_hours_ago = (datetime.now(CST) - timedelta(hours=4)).strftime('%Y-%m-%dT%H:%M:%S+08:00')
-    # 清理旧事件中的微秒时间戳
-    for e in existing:
-        for k in ('source_time', 'timestamp'):
-            v = e.get(k)
-            if v and '.' in v:
-                e[k] = re.sub(r'\.\d+', '', v)
-    existing = [e for e in existing
-                if (e.get('source_time') or e.get('timestamp', '') or '') > four_hours_ago]
-
-    # 过滤掉旧的关键词兜底事件（英文截断标题，reason="来源: X"）
-    # 当有新LLM事件时，不保留旧的低质量关键词匹配结果
-    if new_events:
-        existing = [e for e in existing if not str(e.get('reason', '')).startswith('来源:')]
-    # 新事件优先，再补旧事件；统一走语义去重
-    merged = semantic_dedupe_events(list(new_events) + list(existing), limit=15)
-    return merged
-
-
-def build_output(events, anomalies, sources_ok, now, cls_flash=None):
-    """组装最终输出"""
+def build_output(events, anomalies, sources_ok, now, cls_flash=None, provisional=False):
+    """组装最终输出
+
+    provisional=True 为快速通道临时版本：与事件窗口合并展示，但不写入窗口，等 LLM 增强版整体替换；
+    临时版本还没有本轮行情异动 / 财联社快讯时沿用上一次发布的区块，只替换 breaking
+    """
     breaking = []
     for i, evt in enumerate(events[:12]):
         impact = evt.get('impact', 0)
@@ -1471,12 +1662,13 @@ def build_output(events, anomalies, sources_ok, now, cls_flash=None):
         breaking.append(item)
 
     # 按影响力排序后合并已有数据
-    breaking = merge_with_existing(breaking, OUTPUT_PATH)
+    breaking = merge_with_existing(breaking, OUTPUT_PATH, commit=not provisional)
 
-    return {
-        'updated_at': now.strftime('%Y-%m-%dT%H:%M:%S+08:00'),
-        'breaking': breaking,
-        'anomalies': [{
+    state = _published_state(OUTPUT_PATH)
+    if provisional and not anomalies:
+        anomaly_block, anomaly_count = state['anomalies'], state['anomaly_count']
+    else:
+        anomaly_block, anomaly_count = [{
             'id': f"anom_{a.get('name', '')}_{now.strftime('%H%M')}",
             'name': a['name'],
             'fullName': a['fullName'],
@@ -1487,19 +1679,32 @@ def build_output(events, anomalies, sources_ok, now, cls_flash=None):
             'tag': a.get('tag', ''),
             'level': a['level'],
             'alert': a['alert'],
-        } for a in anomalies[:12]],
-        'cls_flash': [{
+        } for a in anomalies[:12]], len(anomalies)
+        state['anomalies'], state['anomaly_count'] = anomaly_block, anomaly_count
+    if provisional and not cls_flash:
+        cls_block, cls_count = state['cls_flash'], state['cls_flash_count']
+    else:
+        cls_block, cls_count = [{
             'title': item.get('title', ''),
             'time': item.get('time', ''),
             'source': '财联社',
-        } for item in (cls_flash or [])[:10]],
+        } for item in (cls_flash or [])[:10]], len(cls_flash or [])
+        state['cls_flash'], state['cls_flash_count'] = cls_block, cls_count
+
+    return {
+        'updated_at': now.strftime('%Y-%m-%dT%H:%M:%S+08:00'),
+        'breaking': breaking,
+        'anomalies': anomaly_block,
+        'cls_flash': cls_block,
         'meta': {
             'sources_ok': sources_ok,
             'news_count': sum(1 for _ in breaking),
-            'anomaly_count': len(anomalies),
-            'cls_flash_count': len(cls_flash or []),
-            'model': MODEL if API_KEY else 'keyword-fallback',
+            'anomaly_count': anomaly_count,
+            'cls_flash_count': cls_count,
+            'model': 'keyword-fallback' if provisional or not API_KEY else MODEL,
             'refresh_interval_seconds': 300,
+            'generation': _next_generation(OUTPUT_PATH),
+            'provisional': provisional,
         },
     }
 
@@ -1515,99 +1720,137 @@ def main():
     print(f"   去重: MD5→SimHash→语义聚类 三级引擎")
     print(f"{'='*60}")
 
-    # 1. 并行抓取国际媒体头条 (ThreadPoolExecutor)
-    print('\n📡 [1/5] 并行抓取国际媒体实时头条...')
-    all_headlines = []
+    # 1. 流式抓取国际媒体头条：每个数据源一返回就打分、去重，不等最慢的数据源（全局截止时间兜底）
+    print('\n📡 [1/5] 流式抓取国际媒体实时头条（边到达边去重）...')
     sources_ok = []
-
-    fetchers = [
-        ('Reuters', fetch_reuters_headlines),
-        ('Bloomberg', fetch_bloomberg_headlines),
-        ('CNBC', fetch_cnbc_headlines),
-        ('MarketWatch', fetch_marketwatch_headlines),
-        ('Yahoo Finance', fetch_yahoo_finance_headlines),
-        ('Google News', fetch_google_news_finance),
-        ('BBC', fetch_bbc_headlines),
-        ('Al Jazeera', fetch_aljazeera_headlines),
-        ('Energy/Oil', fetch_energy_headlines),
-        ('Asia', fetch_asia_headlines),
-        ('财联社', fetch_cls_flash),
-        ('新浪财经', fetch_sina_live),
-    ]
-
     cls_flash_items = []  # 单独保留财联社原始快讯
-
-    t0 = time.time()
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        future_map = {}
-        for name, fetcher in fetchers:
-            future = executor.submit(fetcher)
-            future_map[future] = name
-
-        for future in as_completed(future_map):
-            name = future_map[future]
-            try:
-                items = future.result()
-                if items:
-                    all_headlines.extend(items)
-                    sources_ok.append(name)
-                    print(f'  ✅ {name}: {len(items)} 条')
-                    if name == '财联社':
-                        cls_flash_items = list(items)
-                else:
-                    print(f'  ⚠️ {name}: 0 条')
-            except Exception as e:
-                print(f'  ❌ {name}: {e}')
-
-    fetch_time = time.time() - t0
-    print(f'  ⏱️ 并行抓取耗时: {fetch_time:.1f}s')
-
-    # 2. 三级去重引擎
-    print('\n🔍 [2/5] 三级去重 (MD5→SimHash→语义聚类)...')
+    sources_unchanged = []
+    sources = [build() for build in HEADLINE_SOURCES]
     dedup = DedupEngine()
-    deduped_headlines = []
     dup_stats = {'md5': 0, 'simhash': 0, 'semantic': 0, 'empty': 0}
-
-    # 先按来源权重和时效性粗排, 优先保留高权重源的新闻
-    for h in all_headlines:
-        h['_hotness'] = compute_hotness(h)
-    all_headlines.sort(key=lambda x: x.get('_hotness', 0), reverse=True)
-
-    for h in all_headlines:
-        is_dup, level = dedup.is_duplicate(h)
-        if is_dup:
-            dup_stats[level] = dup_stats.get(level, 0) + 1
-        else:
+    top_headlines = []   # 小顶堆 (热度, -到达序号, 头条)，只保留 TOP_K 条
+    seq = 0
+    total_raw = 0
+    first_alert_sec = None
+    t0 = time.time()
+    for name, res in iter_sources(sources, deadline=FETCH_DEADLINE, scope='breaking'):
+        items = res['items']
+        if items and len(res['unchanged']) == res['stepsTotal']:
+            # 全部 feed 未变化：条目上一轮已进入去重指纹库，跳过解析 / 去重 / 热度打分
+            sources_ok.append(name)
+            sources_unchanged.append(name)
+            if name == '财联社':
+                cls_flash_items = list(items)
+            print(f'  ♻️ {name}: 未变化 ({len(items)} 条, 跳过)')
+            continue
+        if not items:
+            if res['skipped']:
+                print(f'  ⛔ {name}: 熔断中，本轮跳过')
+            elif res['timedOut']:
+                print(f'  ❌ {name}: 超时')
+            else:
+                print(f'  ⚠️ {name}: 0 条')
+            continue
+        sources_ok.append(name)
+        if name == '财联社':
+            cls_flash_items = list(items)
+        batch = list(items)
+        total_raw += len(batch)
+
+        # 源内按来源权重和时效性粗排, 优先保留高权重、更新鲜的新闻
+        for h, score in zip(batch, compute_hotness_batch(batch, now=now)):
+            h['_hotness'] = score
+        batch.sort(key=lambda x: x.get('_hotness', 0), reverse=True)
+        # 整批预计算 SimHash 指纹（向量化），逐条去重时直接命中缓存
+        simhash_many([h.get('title', '') for h in batch])
+
+        fresh = []
+        for h in batch:
+            is_dup, level = dedup.is_duplicate(h)
+            if is_dup:
+                dup_stats[level] = dup_stats.get(level, 0) + 1
+                continue
             # 提取金融实体
             h['entities'] = extract_entities(h.get('title', ''))
-            deduped_headlines.append(h)
+            fresh.append(h)
+            seq += 1
+            entry = (h['_hotness'], -seq, h)
+            if len(top_headlines) < TOP_K:
+                heapq.heappush(top_headlines, entry)
+            else:
+                heapq.heappushpop(top_headlines, entry)
+        suffix = '' if not res['timedOut'] else f' (截止前完成 {res["stepsDone"]}/{res["stepsTotal"]})'
+        print(f'  ✅ {name}: {len(items)} 条, 新增 {len(fresh)} 条{suffix}')
+
+        # 关键风险事件一出现就用当前 top-K 发布临时版本，不等其余数据源、行情与 LLM；
+        # 行情异动与（尚未到达的）财联社快讯沿用上一次发布的内容，只替换 breaking
+        if first_alert_sec is None and fresh and extract_priority_events(fresh):
+            current = [h for _, _, h in sorted(top_headlines, reverse=True)]
+            alert = build_output(build_provisional_events(current), [], list(sources_ok), now,
+                                 cls_flash=cls_flash_items, provisional=True)
+            first_alert_sec = round(time.time() - t0, 1)
+            alert['meta']['algorithm'] = 'v2'
+            alert['meta']['first_alert_sec'] = first_alert_sec
+            write_output(alert)
+            print(f'  🚨 {name}: 发现关键风险事件，已发布临时版本 '
+                  f'(第 {alert["meta"]["generation"]} 版, +{first_alert_sec:.1f}s)')
 
+    fetch_time = time.time() - t0
+    print(f'  ⏱️ 流式抓取 + 去重耗时: {fetch_time:.1f}s')
+    _feed_state.save()
     # 保存指纹缓存供下次使用
     dedup.save_cache()
 
-    print(f'  📰 原始: {len(all_headlines)} → 去重后: {len(deduped_headlines)} 条')
+    # 2. 三级去重汇总（MD5→SimHash→语义聚类 已在抓取过程中逐源完成）
+    print('\n🔍 [2/5] 三级去重 (MD5→SimHash→语义聚类)...')
+    deduped_headlines = [h for _, _, h in sorted(top_headlines, reverse=True)]
+    print(f'  📰 原始: {total_raw} → 去重后: {seq} 条 (保留热度前 {len(deduped_headlines)} 条)')
     print(f'     MD5精确去重: {dup_stats["md5"]}, SimHash近似: {dup_stats["simhash"]}, '
           f'语义聚类: {dup_stats["semantic"]}, 空标题: {dup_stats["empty"]}')
     print(f'  📰 来源: {len(sources_ok)} 个 ({", ".join(sources_ok)})')
 
+    def annotate(output):
+        # 添加算法元数据
+        output['meta']['algorithm'] = 'v2'
+        output['meta']['dedup_stats'] = dup_stats
+        output['meta']['fetch_time_sec'] = round(fetch_time, 1)
+        output['meta']['sources_unchanged'] = sources_unchanged
+        output['meta']['total_raw_headlines'] = total_raw
+        output['meta']['deduped_headlines'] = seq
+        output['meta']['first_alert_sec'] = first_alert_sec
+        return output
+
+    # 快速通道：LLM 增强（行情 + 模型调用，可能长达数十秒）之前先发布关键词 / 关键事件临时版本
+    provisional_sec = None
+    if API_KEY and deduped_headlines:
+        provisional = annotate(build_output(build_provisional_events(deduped_headlines), [], sources_ok, now,
+                                            cls_flash=cls_flash_items, provisional=True))
+        write_output(provisional)
+        provisional_sec = round(time.time() - t0, 1)
+        print(f'  ⚡ 临时版本已发布: {len(provisional["breaking"])} 条 '
+              f'(第 {provisional["meta"]["generation"]} 版, +{provisional_sec:.1f}s)')
+
     # 3. 检测市场异动
     print('\n📊 [3/5] 检测全球市场异动...')
-    anomalies = detect_market_anomalies()
+    # 四组行情并发取一次，异动检测与 LLM 快照共用
+    market = fetch_market_groups()
+    anomalies = detect_market_anomalies(market)
     print(f'  ⚡ 检测到 {len(anomalies)} 个异动')
     for a in anomalies[:5]:
         print(f'    {a["alert"]}')
 
     # 4. LLM 分析 + 热度排序
     print('\n🧠 [4/5] AI分析实时头条...')
-    market_snapshot = get_all_market_snapshot()
+    market_snapshot = get_all_market_snapshot(market)
 
     if API_KEY and deduped_headlines:
         events = call_llm_breaking(deduped_headlines, anomalies, market_snapshot)
         if events:
             print(f'  ✅ LLM生成 {len(events)} 条突发事件')
             # 为LLM事件计算热度分
-            for evt in events:
-                evt['hotness'] = compute_hotness(evt, category=evt.get('category'))
+            hotness = compute_hotness_batch(events, [evt.get('category') for evt in events])
+            for evt, score in zip(events, hotness):
+                evt['hotness'] = score
         else:
             print('  ⚠️ LLM返回空，使用关键词兜底')
             events = generate_fallback_events(deduped_headlines, anomalies)
@@ -1623,25 +1866,16 @@ def main():
 
     # 5. 组装输出
     print('\n📦 [5/5] 组装输出...')
-    output = build_output(events, anomalies, sources_ok, now, cls_flash=cls_flash_items)
-
-    # 添加算法元数据
-    output['meta']['algorithm'] = 'v2'
-    output['meta']['dedup_stats'] = dup_stats
-    output['meta']['fetch_time_sec'] = round(fetch_time, 1)
-    output['meta']['total_raw_headlines'] = len(all_headlines)
-    output['meta']['deduped_headlines'] = len(deduped_headlines)
-
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    output = annotate(build_output(events, anomalies, sources_ok, now, cls_flash=cls_flash_items))
+    output['meta']['provisional_sec'] = provisional_sec
+    write_output(output)
 
     print(f"\n{'='*60}")
     print(f'✅ 输出: {OUTPUT_PATH}')
-    print(f'   突发事件: {len(output["breaking"])} 条')
+    print(f'   突发事件: {len(output["breaking"])} 条 (第 {output["meta"]["generation"]} 版)')
     print(f'   市场异动: {len(output["anomalies"])} 个')
-    print(f'   去重效率: {len(all_headlines)}→{len(deduped_headlines)} ({len(all_headlines)-len(deduped_headlines)} 重复)')
-    print(f'   抓取耗时: {fetch_time:.1f}s (并行6线程)')
+    print(f'   去重效率: {total_raw}→{seq} ({total_raw - seq} 重复)')
+    print(f'   抓取耗时: {fetch_time:.1f}s (截止 {FETCH_DEADLINE:g}s)')
     print(f"{'='*60}\n")
 
     return output
@@ -8,13 +8,27 @@
 可通过 GitHub Actions / cron 定时运行，也可手动执行
 """
 
-import json, os, re, sys, ssl, time, hashlib
+import json, os, re, sys, hashlib
 from datetime import datetime, timezone, timedelta
-from urllib.request import urlopen, Request
 from urllib.parse import quote, urlencode
 from http.cookiejar import CookieJar
 from urllib.request import build_opener, HTTPCookieProcessor, HTTPSHandler
 
+try:
+    from scripts import http_client
+    from scripts.collect_engine import HEDGE_DELAY, Source, run_source, run_sources
+    from scripts.item_model import Item
+    from scripts.item_store import ItemStore
+    from scripts.keyword_matcher import KeywordMatcher
+    from scripts.text_rules import RuleSet
+except ImportError:  # 作为独立脚本运行
+    import http_client
+    from collect_engine import HEDGE_DELAY, Source, run_source, run_sources
+    from item_model import Item
+    from item_store import ItemStore
+    from keyword_matcher import KeywordMatcher
+    from text_rules import RuleSet
+
 # ==================== .env 自动加载 ====================
 def _load_dotenv():
     env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
@@ -34,6 +48,7 @@ _load_dotenv()
 
 # ==================== 配置 ====================
 OUTPUT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'social_media_videos.json')
+STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'social_media_store.json')
 
 # 财经相关关键词 (用于过滤非财经内容)
 FINANCE_KEYWORDS = [
@@ -85,30 +100,20 @@ NOISE_CATEGORY_KW = [
     '宠物', '猫咪', '狗狗', '美食教程', '减肥', '化妆', '穿搭',
     '搞笑', '段子', '鬼畜', '整蛊',
 ]
-_noise_cat_lower = [kw.lower() for kw in NOISE_CATEGORY_KW]
 
 def is_noise_category(text):
     """检测是否属于娱乐/体育等无关类别"""
-    if not text:
-        return False
-    t = text.lower()
-    has_noise = any(kw in t for kw in _noise_cat_lower)
-    if has_noise and not is_finance_related(text):
-        return True
-    return False
+    return _MATCHER.has(text, 'noise') and not _MATCHER.has(text, 'finance')
 
 # 用户代理
 UA_MOBILE = 'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1'
 UA_DESKTOP = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
 
-NOW = datetime.now(timezone(timedelta(hours=8)))
+CST = timezone(timedelta(hours=8))
 
 
 def _ssl_ctx():
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    return ctx
+    return http_client.ssl_context(verify=False)
 
 
 def fetch_url(url, headers=None, timeout=15):
@@ -120,10 +125,8 @@ def fetch_url(url, headers=None, timeout=15):
     }
     if headers:
         h.update(headers)
-    req = Request(url, headers=h)
     try:
-        with urlopen(req, timeout=timeout, context=_ssl_ctx()) as resp:
-            return resp.read().decode('utf-8', errors='replace')
+        return http_client.get_text(url, headers=h, timeout=timeout, verify=False)
     except Exception as e:
         print(f"  [WARN] fetch failed: {url[:80]}... - {e}", file=sys.stderr)
         return None
@@ -131,20 +134,14 @@ def fetch_url(url, headers=None, timeout=15):
 
 def is_finance_related(text):
     """判断文本是否与财经相关"""
-    if not text:
-        return False
-    text_lower = text.lower()
-    return any(kw.lower() in text_lower for kw in FINANCE_KEYWORDS)
+    return _MATCHER.has(text, 'finance')
 
 
 def noise_score(text):
     """计算噪音分 (越高越可能是营销/博眼球)"""
     if not text:
         return 0
-    score = 0
-    for kw in NOISE_KEYWORDS:
-        if kw in text:
-            score += 1
+    score = _MATCHER.count(text, 'marketing')
     # 感叹号数量
     score += text.count('！') * 0.3
     score += text.count('!') * 0.3
@@ -159,376 +156,333 @@ def gen_id(text):
     return 'sm_' + hashlib.md5(text.encode()).hexdigest()[:12]
 
 
-# ==================== 抖音热榜抓取 ====================
+# ==================== 数据源（并发采集） ====================
+# 与 collector 相同：每个数据源拆成互相独立的子请求，由 collect_engine 在共享连接池上并发调度；
+# 备用接口同时预取，合并时按声明顺序取第一个有数据的，替代原先的串行兜底链
 
-def fetch_douyin_hot():
-    """
-    抖音热榜 (公开 Web API)
-    返回热搜词条列表 → 过滤财经相关
-    """
-    print("  📱 抖音热榜抓取...")
+SOCIAL_DEADLINE = float(os.environ.get('SOCIAL_DEADLINE', '30'))
+# 搜索类接口限流较严，按主机收紧并发（替代原先请求之间的 sleep）
+SOCIAL_HOST_LIMITS = {
+    'www.douyin.com': 2,
+    'www.xiaohongshu.com': 2,
+    'api.vvhan.com': 3,
+}
+
+
+def _text_step(url, parse, headers=None, timeout=15):
+    """单个子请求：GET → parse(text) -> [item]"""
+    h = {
+        'User-Agent': UA_DESKTOP,
+        'Accept': 'application/json, text/html, */*',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    }
+    if headers:
+        h.update(headers)
+
+    async def step(fetch):
+        resp = await fetch(url, headers=h, timeout=timeout, verify=False)
+        resp.raise_for_status()
+        return parse(resp.text)
+    return step
+
+
+def _first_nonempty(parts):
+    # 主 / 备用接口按顺序对冲请求（hedge_delay），先拿到非空结果的接口胜出
+    for items in parts.values():
+        if items:
+            return items
+    return []
+
+
+def _hotlist_items(data, platform, source_type, match_desc=False):
+    """聚合热榜通用格式 {'data': [{'title'/'name', 'hot'/'hotValue', 'desc'}]}"""
     items = []
+    data_list = data.get('data') if isinstance(data.get('data'), list) else []
+    for item in data_list:
+        title = item.get('title', '') or item.get('name', '') or ''
+        hot = item.get('hot', 0) or item.get('hotValue', 0) or 0
+        desc = item.get('desc', '') or item.get('description', '') or ''
+        if title and is_finance_related(title + desc if match_desc else title):
+            items.append({
+                'title': title[:80],
+                'summary': desc[:200],
+                'likes': int(hot) if hot else 0,
+                'platform': platform,
+                'source_type': source_type,
+            })
+    return items
 
-    # 方式1: 抖音热点榜 API
-    hot_urls = [
-        'https://www.douyin.com/aweme/v1/web/hot/search/list/',
-        'https://www.iesdouyin.com/web/api/v2/hotsearch/billboard/word/',
-    ]
 
-    for url in hot_urls:
-        raw = fetch_url(url, headers={
-            'User-Agent': UA_DESKTOP,
-            'Referer': 'https://www.douyin.com/',
-        })
-        if not raw:
-            continue
-        try:
-            data = json.loads(raw)
-            word_list = (data.get('data', {}).get('word_list', []) or
-                        data.get('word_list', []) or [])
-            for item in word_list:
-                word = item.get('word', '') or item.get('query', '') or ''
-                hot_value = item.get('hot_value', 0) or item.get('search_count', 0) or 0
-                event_time = item.get('event_time', '') or ''
-                if word and is_finance_related(word):
-                    items.append({
-                        'title': word,
-                        'summary': item.get('word_sub_board', '') or item.get('label', '') or '',
-                        'likes': int(hot_value) if hot_value else 0,
-                        'platform': '抖音',
-                        'source_type': '热榜',
-                    })
-            if items:
-                break
-        except Exception as e:
-            print(f"    [WARN] 抖音热榜解析失败: {e}", file=sys.stderr)
-
-    # 方式2: 第三方聚合 (tophub)
-    if not items:
-        raw = fetch_url('https://api.vvhan.com/api/hotlist/douyinHot', headers={
-            'User-Agent': UA_DESKTOP,
-        })
-        if raw:
-            try:
-                data = json.loads(raw)
-                for item in (data.get('data', []) or []):
-                    title = item.get('title', '') or item.get('name', '') or ''
-                    hot = item.get('hot', 0) or item.get('hotValue', 0) or 0
-                    if title and is_finance_related(title):
-                        items.append({
-                            'title': title,
-                            'summary': item.get('desc', '') or '',
-                            'likes': int(hot) if hot else 0,
-                            'platform': '抖音',
-                            'source_type': '热搜',
-                        })
-            except Exception as e:
-                print(f"    [WARN] 抖音备用源失败: {e}", file=sys.stderr)
-
-    # 方式3: 韩小韩热榜API
-    if not items:
-        raw = fetch_url('https://api.vvhan.com/api/hotlist?type=douyinHot')
-        if raw:
-            try:
-                data = json.loads(raw)
-                for item in (data.get('data', []) or []):
-                    title = item.get('title', '') or ''
-                    hot = item.get('hot', 0) or 0
-                    if title and is_finance_related(title):
-                        items.append({
-                            'title': title,
-                            'summary': item.get('desc', '') or '',
-                            'likes': int(hot) if hot else 0,
-                            'platform': '抖音',
-                            'source_type': '热搜',
-                        })
-            except Exception as e:
-                print(f"    [WARN] 抖音韩小韩API失败: {e}", file=sys.stderr)
-
-    print(f"    ✅ 抖音财经相关: {len(items)} 条")
+def _parse_hotlist(platform, source_type, match_desc=False):
+    def parse(raw):
+        return _hotlist_items(json.loads(raw), platform, source_type, match_desc)
+    return parse
+
+
+# ==================== 抖音热榜抓取 ====================
+
+def _parse_douyin_billboard(raw):
+    data = json.loads(raw)
+    word_list = (data.get('data', {}).get('word_list', []) or
+                 data.get('word_list', []) or [])
+    items = []
+    for item in word_list:
+        word = item.get('word', '') or item.get('query', '') or ''
+        hot_value = item.get('hot_value', 0) or item.get('search_count', 0) or 0
+        if word and is_finance_related(word):
+            items.append({
+                'title': word,
+                'summary': item.get('word_sub_board', '') or item.get('label', '') or '',
+                'likes': int(hot_value) if hot_value else 0,
+                'platform': '抖音',
+                'source_type': '热榜',
+            })
     return items
 
 
-def fetch_douyin_finance_videos():
-    """
-    抖音财经类视频热门内容 (搜索API / 推荐流)
-    搜索预设财经关键词获取热门视频
-    """
-    print("  🎬 抖音财经视频搜索...")
+def _douyin_hot_source():
+    """抖音热榜 (公开 Web API) → 第三方聚合兜底，过滤财经相关"""
+    referer = {'Referer': 'https://www.douyin.com/'}
+    return Source('抖音热榜', [
+        ('web', _text_step('https://www.douyin.com/aweme/v1/web/hot/search/list/', _parse_douyin_billboard, referer)),
+        ('billboard', _text_step('https://www.iesdouyin.com/web/api/v2/hotsearch/billboard/word/', _parse_douyin_billboard, referer)),
+        ('vvhan', _text_step('https://api.vvhan.com/api/hotlist/douyinHot', _parse_hotlist('抖音', '热搜'))),
+        ('vvhan-type', _text_step('https://api.vvhan.com/api/hotlist?type=douyinHot', _parse_hotlist('抖音', '热搜'))),
+    ], merge=_first_nonempty, hedge_delay=HEDGE_DELAY)
+
+
+DOUYIN_SEARCH_KW = ['AI算力', '股市', '基金', '黄金投资', '半导体', '新能源', '军工',
+                    '港股', '石油经济', '伊朗制裁', '中东局势', 'AI未来经济']
+
+
+def _parse_douyin_search(raw):
+    data = json.loads(raw)
+    aweme_list = data.get('data', []) or data.get('aweme_list', []) or []
     items = []
-    search_keywords = ['AI算力', '股市', '基金', '黄金投资', '半导体', '新能源', '军工',
-                         '港股', '石油经济', '伊朗制裁', '中东局势', 'AI未来经济']
-
-    for kw in search_keywords:
-        # 60 second API
-        url = f'https://www.douyin.com/aweme/v1/web/general/search/single/?keyword={quote(kw)}&search_channel=aweme_general&sort_type=2&publish_time=1&count=5'
-        raw = fetch_url(url, headers={
-            'User-Agent': UA_DESKTOP,
-            'Referer': f'https://www.douyin.com/search/{quote(kw)}',
-            'Cookie': 'ttwid=placeholder',
-        })
-        if not raw:
-            continue
-        try:
-            data = json.loads(raw)
-            aweme_list = data.get('data', []) or data.get('aweme_list', []) or []
-            for aweme in aweme_list[:3]:
-                desc = aweme.get('aweme_info', aweme).get('desc', '') or ''
-                stats = aweme.get('aweme_info', aweme).get('statistics', {})
-                if desc and is_finance_related(desc):
-                    items.append({
-                        'title': desc[:80],
-                        'summary': desc,
-                        'likes': stats.get('digg_count', 0) or 0,
-                        'shares': stats.get('share_count', 0) or 0,
-                        'comments_count': stats.get('comment_count', 0) or 0,
-                        'platform': '抖音',
-                        'source_type': '视频搜索',
-                    })
-        except Exception as e:
-            print(f"    [WARN] 抖音搜索 '{kw}' 失败: {e}", file=sys.stderr)
-        time.sleep(0.5)  # 避免频率限制
-
-    print(f"    ✅ 抖音视频搜索: {len(items)} 条")
+    for aweme in aweme_list[:3]:
+        desc = aweme.get('aweme_info', aweme).get('desc', '') or ''
+        stats = aweme.get('aweme_info', aweme).get('statistics', {})
+        if desc and is_finance_related(desc):
+            items.append({
+                'title': desc[:80],
+                'summary': desc,
+                'likes': stats.get('digg_count', 0) or 0,
+                'shares': stats.get('share_count', 0) or 0,
+                'comments_count': stats.get('comment_count', 0) or 0,
+                'platform': '抖音',
+                'source_type': '视频搜索',
+            })
     return items
 
 
+def _douyin_search_source():
+    """抖音财经类视频热门内容：搜索预设财经关键词"""
+    return Source('抖音视频搜索', [
+        (kw, _text_step(
+            f'https://www.douyin.com/aweme/v1/web/general/search/single/?keyword={quote(kw)}&search_channel=aweme_general&sort_type=2&publish_time=1&count=5',
+            _parse_douyin_search,
+            {'Referer': f'https://www.douyin.com/search/{quote(kw)}', 'Cookie': 'ttwid=placeholder'},
+        ))
+        for kw in DOUYIN_SEARCH_KW
+    ])
+
+
 # ==================== 小红书热点抓取 ====================
 
-def fetch_xiaohongshu_hot():
-    """
-    小红书热门话题/笔记 (公开接口)
-    """
-    print("  📕 小红书热点抓取...")
-    items = []
+def _xiaohongshu_hot_source():
+    """小红书热门话题/笔记 (第三方热榜聚合)"""
+    parse = _parse_hotlist('小红书', '热搜', match_desc=True)
+    return Source('小红书热点', [
+        ('vvhan', _text_step('https://api.vvhan.com/api/hotlist/xhsHot', parse)),
+        ('vvhan-type', _text_step('https://api.vvhan.com/api/hotlist?type=xiaohongshuHot', parse)),
+    ], merge=_first_nonempty, hedge_delay=HEDGE_DELAY)
 
-    # 第三方热榜聚合
-    hot_urls = [
-        'https://api.vvhan.com/api/hotlist/xhsHot',
-        'https://api.vvhan.com/api/hotlist?type=xiaohongshuHot',
-    ]
 
-    for url in hot_urls:
-        raw = fetch_url(url, headers={'User-Agent': UA_DESKTOP})
-        if not raw:
-            continue
-        try:
-            data = json.loads(raw)
-            data_list = data.get('data', []) or []
-            for item in data_list:
-                title = item.get('title', '') or item.get('name', '') or ''
-                hot = item.get('hot', 0) or item.get('hotValue', 0) or 0
-                desc = item.get('desc', '') or item.get('description', '') or ''
-                if title and is_finance_related(title + desc):
-                    items.append({
-                        'title': title,
-                        'summary': desc,
-                        'likes': int(hot) if hot else 0,
-                        'platform': '小红书',
-                        'source_type': '热搜',
-                    })
-            if items:
-                break
-        except Exception as e:
-            print(f"    [WARN] 小红书热榜解析失败: {e}", file=sys.stderr)
-
-    print(f"    ✅ 小红书财经相关: {len(items)} 条")
-    return items
+XHS_SEARCH_KW = ['基金推荐', 'AI算力投资', '黄金还能买吗', '新能源基金', '消费基金', '港股ETF',
+                 '石油投资', '伊朗局势经济', '中东战争影响', 'AI对经济影响', '科技革命']
 
 
-def fetch_xiaohongshu_finance_notes():
-    """
-    小红书财经笔记搜索 (公开页面提取)
-    """
-    print("  📝 小红书财经笔记搜索...")
+def _parse_xhs_search(raw):
+    # 从HTML中提取初始化数据
+    json_match = re.search(r'window\.__INITIAL_STATE__\s*=\s*(\{.*?\})\s*</script>', raw, re.DOTALL)
+    if not json_match:
+        return []
+    # 小红书使用 undefined 替代, 需要替换
+    data = json.loads(json_match.group(1).replace('undefined', 'null'))
+    notes = data.get('search', {}).get('notes', {}).get('items', []) or []
     items = []
-    search_keywords = ['基金推荐', 'AI算力投资', '黄金还能买吗', '新能源基金', '消费基金', '港股ETF',
-                        '石油投资', '伊朗局势经济', '中东战争影响', 'AI对经济影响', '科技革命']
-
-    for kw in search_keywords:
-        url = f'https://www.xiaohongshu.com/search_result?keyword={quote(kw)}&type=51'
-        raw = fetch_url(url, headers={
-            'User-Agent': UA_DESKTOP,
-            'Referer': 'https://www.xiaohongshu.com/',
-        })
-        if not raw:
-            continue
-        try:
-            # 尝试从HTML中提取初始化数据
-            json_match = re.search(r'window\.__INITIAL_STATE__\s*=\s*(\{.*?\})\s*</script>', raw, re.DOTALL)
-            if json_match:
-                # 小红书使用 undefined 替代, 需要替换
-                raw_json = json_match.group(1).replace('undefined', 'null')
-                data = json.loads(raw_json)
-                notes = data.get('search', {}).get('notes', {}).get('items', []) or []
-                for note in notes[:3]:
-                    note_data = note.get('noteCard', note.get('note', {}))
-                    title = note_data.get('title', '') or note_data.get('displayTitle', '') or ''
-                    desc = note_data.get('desc', '') or ''
-                    liked = note_data.get('interactInfo', {}).get('likedCount', 0) or 0
-                    if title:
-                        items.append({
-                            'title': title[:80],
-                            'summary': desc[:200] if desc else title,
-                            'likes': int(liked) if liked else 0,
-                            'platform': '小红书',
-                            'source_type': '笔记搜索',
-                        })
-        except Exception as e:
-            print(f"    [WARN] 小红书搜索 '{kw}' 失败: {e}", file=sys.stderr)
-        time.sleep(0.5)
-
-    print(f"    ✅ 小红书笔记搜索: {len(items)} 条")
+    for note in notes[:3]:
+        note_data = note.get('noteCard', note.get('note', {}))
+        title = note_data.get('title', '') or note_data.get('displayTitle', '') or ''
+        desc = note_data.get('desc', '') or ''
+        liked = note_data.get('interactInfo', {}).get('likedCount', 0) or 0
+        if title:
+            items.append({
+                'title': title[:80],
+                'summary': desc[:200] if desc else title,
+                'likes': int(liked) if liked else 0,
+                'platform': '小红书',
+                'source_type': '笔记搜索',
+            })
     return items
 
 
-# ==================== 微博财经热搜 (补充源) ====================
+def _xiaohongshu_search_source():
+    """小红书财经笔记搜索 (公开页面提取)"""
+    return Source('小红书笔记', [
+        (kw, _text_step(f'https://www.xiaohongshu.com/search_result?keyword={quote(kw)}&type=51',
+                        _parse_xhs_search, {'Referer': 'https://www.xiaohongshu.com/'}))
+        for kw in XHS_SEARCH_KW
+    ])
 
-def fetch_weibo_finance_hot():
-    """微博财经热搜 (纯公开API, 补充社交媒体维度)"""
-    print("  🐦 微博财经热搜...")
-    items = []
 
-    # 微博热搜API
-    urls = [
-        'https://weibo.com/ajax/side/hotSearch',
-        'https://api.vvhan.com/api/hotlist/wbHot',
-    ]
+# ==================== 微博财经热搜 (补充源) ====================
 
-    for url in urls:
-        raw = fetch_url(url, headers={
-            'User-Agent': UA_DESKTOP,
-            'Referer': 'https://weibo.com/',
-        })
-        if not raw:
-            continue
-        try:
-            data = json.loads(raw)
-            # 微博官方API格式
-            realtime = data.get('data', {}).get('realtime', []) or []
-            if realtime:
-                for item in realtime:
-                    word = item.get('word', '') or item.get('note', '') or ''
-                    num = item.get('num', 0) or item.get('raw_hot', 0) or 0
-                    label_name = item.get('label_name', '') or ''
-                    if word and is_finance_related(word):
-                        items.append({
-                            'title': word,
-                            'summary': label_name,
-                            'likes': int(num) if num else 0,
-                            'platform': '微博',
-                            'source_type': '热搜',
-                        })
-                if items:
-                    break
-
-            # 第三方API格式
-            data_list = data.get('data', []) if isinstance(data.get('data'), list) else []
-            for item in data_list:
-                title = item.get('title', '') or item.get('name', '') or ''
-                hot = item.get('hot', 0) or item.get('hotValue', 0) or 0
-                if title and is_finance_related(title):
-                    items.append({
-                        'title': title,
-                        'summary': item.get('desc', '') or '',
-                        'likes': int(hot) if hot else 0,
-                        'platform': '微博',
-                        'source_type': '热搜',
-                    })
-            if items:
-                break
-        except Exception as e:
-            print(f"    [WARN] 微博热搜解析失败: {e}", file=sys.stderr)
-
-    print(f"    ✅ 微博财经相关: {len(items)} 条")
-    return items
+def _parse_weibo_hot(raw):
+    data = json.loads(raw)
+    # 微博官方API格式
+    items = []
+    realtime = (data.get('data') or {}).get('realtime', []) if isinstance(data.get('data'), dict) else []
+    for item in realtime or []:
+        word = item.get('word', '') or item.get('note', '') or ''
+        num = item.get('num', 0) or item.get('raw_hot', 0) or 0
+        label_name = item.get('label_name', '') or ''
+        if word and is_finance_related(word):
+            items.append({
+                'title': word,
+                'summary': label_name,
+                'likes': int(num) if num else 0,
+                'platform': '微博',
+                'source_type': '热搜',
+            })
+    # 第三方API格式
+    return items or _hotlist_items(data, '微博', '热搜')
+
+
+def _weibo_source():
+    """微博财经热搜 (纯公开API, 补充社交媒体维度)"""
+    referer = {'Referer': 'https://weibo.com/'}
+    return Source('微博热搜', [
+        ('ajax', _text_step('https://weibo.com/ajax/side/hotSearch', _parse_weibo_hot, referer)),
+        ('vvhan', _text_step('https://api.vvhan.com/api/hotlist/wbHot', _parse_weibo_hot, referer)),
+    ], merge=_first_nonempty, hedge_delay=HEDGE_DELAY)
 
 
 # ==================== 东方财富/同花顺社区舆情 ====================
 
-def fetch_eastmoney_community():
-    """东方财富股吧热门话题 (纯财经社区)"""
-    print("  💬 东方财富股吧热帖...")
+def _parse_eastmoney_news(raw):
+    data = json.loads(raw)
+    data_obj = data.get('data') or {}
+    news_list = (data_obj.get('list', []) or []) if isinstance(data_obj, dict) else []
     items = []
-
-    # 股吧热帖
-    urls = [
-        'https://guba.eastmoney.com/interface/GetData.aspx?path=newtopic/api/Topic/HomePageListRead&param=ps%3D30%26p%3D1',
-        'https://gbapi.eastmoney.com/senti/api/Topic/GetHotTopicList?ps=30&p=1',
-    ]
-
-    # 东方财富7x24人气榜
-    raw = fetch_url('https://np-listapi.eastmoney.com/comm/web/getNewsByColumns?type=0&client=web&maxNewsId=0&pageSize=30&column=102')
-    if raw:
-        try:
-            data = json.loads(raw)
-            data_obj = data.get('data') or {}
-            if isinstance(data_obj, dict):
-                news_list = data_obj.get('list', []) or []
-            else:
-                news_list = []
-            for item in news_list:
-                title = (item.get('title') or '').strip()
-                content = (item.get('content') or '').strip()
-                text = title or content[:100]
-                if text and len(text) >= 6 and is_finance_related(text):
-                    items.append({
-                        'title': text[:80],
-                        'summary': content[:200] if content else text,
-                        'likes': 0,
-                        'platform': '东方财富',
-                        'source_type': '快讯',
-                    })
-        except Exception as e:
-            print(f"    [WARN] 东方财富解析失败: {e}", file=sys.stderr)
-
-    print(f"    ✅ 东方财富: {len(items)} 条")
+    for item in news_list:
+        title = (item.get('title') or '').strip()
+        content = (item.get('content') or '').strip()
+        text = title or content[:100]
+        if text and len(text) >= 6 and is_finance_related(text):
+            items.append({
+                'title': text[:80],
+                'summary': content[:200] if content else text,
+                'likes': 0,
+                'platform': '东方财富',
+                'source_type': '快讯',
+            })
     return items
 
 
+def _eastmoney_source():
+    """东方财富 7x24 人气榜 (纯财经社区)"""
+    return Source('东方财富', [
+        ('7x24', _text_step('https://np-listapi.eastmoney.com/comm/web/getNewsByColumns?type=0&client=web&maxNewsId=0&pageSize=30&column=102',
+                            _parse_eastmoney_news)),
+    ])
+
+
 # ==================== 综合财经社交热点 (兜底) ====================
 
+TOPHUB_SOURCES = [
+    ('https://api.vvhan.com/api/hotlist/36Ke', '36氪'),
+    ('https://api.vvhan.com/api/hotlist/huXiu', '虎嗅'),
+    ('https://api.vvhan.com/api/hotlist/zhihuHot', '知乎'),
+    ('https://api.vvhan.com/api/hotlist/baiduRD', '百度'),
+    ('https://api.vvhan.com/api/hotlist/bili', 'B站'),
+]
+
+
+def _tophub_source():
+    """今日热榜聚合 - 财经相关平台 (36氪、虎嗅、知乎、百度、B站)"""
+    return Source('聚合热榜', [
+        (platform, _text_step(url, _parse_hotlist(platform, '热榜', match_desc=True)))
+        for url, platform in TOPHUB_SOURCES
+    ])
+
+
+# 单源同步入口（保留旧调用方式）
+def fetch_douyin_hot():
+    return run_source(_douyin_hot_source())
+
+
+def fetch_douyin_finance_videos():
+    return run_source(_douyin_search_source())
+
+
+def fetch_xiaohongshu_hot():
+    return run_source(_xiaohongshu_hot_source())
+
+
+def fetch_xiaohongshu_finance_notes():
+    return run_source(_xiaohongshu_search_source())
+
+
+def fetch_weibo_finance_hot():
+    return run_source(_weibo_source())
+
+
+def fetch_eastmoney_community():
+    return run_source(_eastmoney_source())
+
+
 def fetch_tophub_finance():
-    """
-    今日热榜聚合 - 财经相关平台
-    覆盖: 36氪、虎嗅、财联社等
-    """
-    print("  🔥 聚合财经热榜...")
-    items = []
+    return run_source(_tophub_source())
+
+
+SOCIAL_SOURCES = [
+    _douyin_hot_source,
+    _douyin_search_source,
+    _xiaohongshu_hot_source,
+    _xiaohongshu_search_source,
+    _weibo_source,
+    _eastmoney_source,
+    _tophub_source,
+]
+
 
-    tophub_sources = [
-        ('https://api.vvhan.com/api/hotlist/36Ke', '36氪'),
-        ('https://api.vvhan.com/api/hotlist/huXiu', '虎嗅'),
-        ('https://api.vvhan.com/api/hotlist/zhihuHot', '知乎'),
-        ('https://api.vvhan.com/api/hotlist/baiduRD', '百度'),
-        ('https://api.vvhan.com/api/hotlist/bili', 'B站'),
-    ]
-
-    for url, platform in tophub_sources:
-        raw = fetch_url(url, headers={'User-Agent': UA_DESKTOP})
-        if not raw:
+def collect_social(deadline=None):
+    """所有社媒数据源并发采集，返回 (原始条目, 元信息)"""
+    sources = [build() for build in SOCIAL_SOURCES]
+    n_requests = sum(len(src.steps) for src in sources)
+    print(f"  📡 {len(sources)} 个社媒数据源 ({n_requests} 个子请求并发)...")
+    report, meta = run_sources(
+        sources,
+        deadline=SOCIAL_DEADLINE if deadline is None else deadline,
+        host_limits=SOCIAL_HOST_LIMITS,
+        with_meta=True,
+        scope='social',
+    )
+    all_items = []
+    source_counts = {}
+    for src in sources:
+        res = report[src.name]
+        source_counts[src.name] = len(res['items'])
+        all_items.extend(res['items'])
+        if res['skipped']:
+            print(f"    ⛔ {src.name}: 熔断中，本轮跳过")
             continue
-        try:
-            data = json.loads(raw)
-            data_list = data.get('data', []) or []
-            for item in data_list:
-                title = item.get('title', '') or item.get('name', '') or ''
-                hot = item.get('hot', 0) or item.get('hotValue', 0) or 0
-                desc = item.get('desc', '') or ''
-                if title and is_finance_related(title + desc):
-                    items.append({
-                        'title': title[:80],
-                        'summary': desc[:200] if desc else '',
-                        'likes': int(hot) if hot else 0,
-                        'platform': platform,
-                        'source_type': '热榜',
-                    })
-        except Exception as e:
-            print(f"    [WARN] {platform} 解析失败: {e}", file=sys.stderr)
-        time.sleep(0.3)
-
-    print(f"    ✅ 聚合热榜财经相关: {len(items)} 条")
-    return items
+        mark = '✅' if res['items'] and res['complete'] else ('⚠️' if res['items'] else '❌')
+        print(f"    {mark} {src.name}: {len(res['items'])} 条 ({res['stepsDone']}/{res['stepsTotal']} 子请求)")
+    meta['source_counts'] = source_counts
+    print(f"  ⏱️ 并发采集耗时: {meta['elapsed']:.1f}s")
+    return all_items, meta
 
 
 # ==================== 数据处理 ====================
@@ -539,34 +493,27 @@ def deduplicate(items):
     unique = []
     for item in items:
         # 简单去重: 取标题前20字
-        key = re.sub(r'\W', '', item['title'])[:20]
+        key = item.dedup_key
         if key and key not in seen:
             seen.add(key)
             unique.append(item)
     return unique
 
 
+# 情绪规则表：按顺序第一条命中的生效（极度看多 → 看多 → 极度看空 → 看空 → 中性）
+SENTIMENT_RULES = [
+    (r'暴涨|疯涨|大涨|飙升|涨停|全仓|梭哈|起飞|爆发|牛市|创新高', '极度看多'),
+    (r'上涨|走高|反弹|利好|加仓|机会|突破|看好|推荐|配置', '偏多'),
+    (r'暴跌|崩盘|大跌|跳水|清仓|割肉|熊市|腰斩|崩', '极度悲观'),
+    (r'下跌|走低|利空|减仓|风险|警惕|谨慎|回调|承压', '偏空'),
+    (r'震荡|分歧|观望|持平|稳定|盘整', '中性'),
+]
+_SENTIMENT = RuleSet().add_table('sentiment', SENTIMENT_RULES, pick='first').compile()
+
+
 def estimate_sentiment(item):
     """基于标题关键词估算情绪标签"""
-    title = item.get('title', '') + ' ' + item.get('summary', '')
-
-    # 极度看多信号
-    if re.search(r'暴涨|疯涨|大涨|飙升|涨停|全仓|梭哈|起飞|爆发|牛市|创新高', title):
-        return '极度看多'
-    # 看多
-    if re.search(r'上涨|走高|反弹|利好|加仓|机会|突破|看好|推荐|配置', title):
-        return '偏多'
-    # 极度看空
-    if re.search(r'暴跌|崩盘|大跌|跳水|清仓|割肉|熊市|腰斩|崩', title):
-        return '极度悲观'
-    # 看空
-    if re.search(r'下跌|走低|利空|减仓|风险|警惕|谨慎|回调|承压', title):
-        return '偏空'
-    # 中性
-    if re.search(r'震荡|分歧|观望|持平|稳定|盘整', title):
-        return '中性'
-
-    return '中性偏多'
+    return _SENTIMENT.evaluate(Item.from_dict(item).text)['sentiment'] or '中性偏多'
 
 
 def estimate_creator_type(item):
@@ -593,25 +540,40 @@ def estimate_creator_type(item):
     return '财经博主'
 
 
-def process_items(all_items):
-    """处理所有抓取结果, 生成最终输出"""
-    # 去重
-    unique = deduplicate(all_items)
+def _classify_item(item):
+    return 'noise' if is_noise_category(item.keyword_hits(_MATCHER)) else None
+
+
+def process_items(all_items, now=None, store=None):
+    """处理所有抓取结果, 生成最终输出
+
+    now: 本轮采集时钟（默认当前时间）；store: 跨轮次 ItemStore，传入时输出最近窗口内出现过的条目
+    """
+    now = now or datetime.now(CST)
+    # 去重（各平台 dict 统一为 Item，拼接文本 / 去重键 / 关键词命中只算一次）
+    unique = deduplicate([Item.from_dict(item) for item in all_items])
 
     # 过滤娱乐/体育无关内容
-    before_filter = len(unique)
-    unique = [item for item in unique if not is_noise_category(item.get('title', '') + ' ' + item.get('summary', ''))]
-    noise_filtered = before_filter - len(unique)
+    if store is not None:
+        # 只对首次出现的条目做判定，老条目只更新互动数
+        stats = store.ingest(unique, classify=_classify_item, now=now.timestamp())
+        noise_filtered = stats['rejected'].get('noise', 0)
+        unique = store.window(now=now.timestamp())
+        print(f"    🗃️ 条目库: 新增 {stats['new']} 条, 更新 {stats['updated']} 条, 窗口内 {len(unique)} 条")
+    else:
+        before_filter = len(unique)
+        unique = [item for item in unique if _classify_item(item) is None]
+        noise_filtered = before_filter - len(unique)
     if noise_filtered > 0:
         print(f"    🗑️ 过滤娱乐/体育噪音: {noise_filtered} 条")
 
     # 按热度排序
-    unique.sort(key=lambda x: x.get('likes', 0), reverse=True)
+    unique.sort(key=lambda x: x.likes or 0, reverse=True)
 
     # 过滤噪音
     filtered = []
     for item in unique:
-        ns = noise_score(item.get('title', ''))
+        ns = noise_score(item.title or '')
         if ns >= 2:
             item['noise_flag'] = True
         filtered.append(item)
@@ -631,9 +593,12 @@ def process_items(all_items):
             'main_opinion': item.get('summary', '')[:50] if item.get('summary') else '',
             'creator_type': estimate_creator_type(item),
             'source_type': item.get('source_type', ''),
-            'publish_time': NOW.isoformat(),
+            'publish_time': now.isoformat(),
             'noise_flag': item.get('noise_flag', False),
         }
+        if 'first_seen' in item:
+            entry['first_seen'] = item['first_seen']
+            entry['likes_velocity'] = item.get('likes_velocity', 0)
         result.append(entry)
 
     return result
@@ -657,6 +622,15 @@ SOCIAL_TREND_THEMES = [
     {'id': 'economy',      'name': '经济影响/趋势',   'icon': '📊', 'keywords': ['经济影响', '未来经济', '产业链', '供应链', '双循环', '科技革命', '数字经济', '碳中和', '就业', '失业率', '出口', '进口', '外贸', '通缩', '滞胀']},
 ]
 
+# 财经 / 营销噪音 / 无关类别 / 趋势主题关键词编译进同一个自动机, 每条文本只扫描一遍
+_MATCHER = (KeywordMatcher()
+            .add_table('finance', FINANCE_KEYWORDS)
+            .add_table('marketing', NOISE_KEYWORDS)
+            .add_table('noise', NOISE_CATEGORY_KW))
+for _th in SOCIAL_TREND_THEMES:
+    _MATCHER.add_table('trend', _th['keywords'], label=_th['id'])
+_MATCHER.build()
+
 
 def extract_social_trends(processed_items):
     """从处理后的社媒数据提取跨平台趋势主题"""
@@ -676,18 +650,18 @@ def extract_social_trends(processed_items):
         }
 
     for item in processed_items:
-        text = (item.get('title', '') + ' ' + item.get('summary', '')).lower()
+        text = item.get('title', '') + ' ' + item.get('summary', '')
         sentiment = item.get('sentiment', '中性')
         platform = item.get('platform', '')
         likes = item.get('likes', 0) or 0
 
+        hit_themes = set()
+        for theme_id, kw in _MATCHER.hits(text, 'trend'):
+            hit_themes.add(theme_id)
+            theme_data[theme_id]['keywords_hit'].add(kw)
+
         for th in SOCIAL_TREND_THEMES:
-            matched = False
-            for kw in th['keywords']:
-                if kw.lower() in text:
-                    matched = True
-                    theme_data[th['id']]['keywords_hit'].add(kw)
-            if matched:
+            if th['id'] in hit_themes:
                 td = theme_data[th['id']]
                 td['mention_count'] += 1
                 td['total_engagement'] += likes
@@ -738,59 +712,23 @@ def extract_social_trends(processed_items):
 
 # ==================== 主流程 ====================
 
-def main():
+def main(deadline=None):
+    """并发采集全部社媒数据源 → 写入条目库 → 输出 social_media_videos.json（可由调度器反复调用）"""
+    now = datetime.now(CST)
     print(f"\n{'='*60}")
-    print(f"📡 社交媒体舆情抓取 - {NOW.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"📡 社交媒体舆情抓取 - {now.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}\n")
 
-    all_items = []
-
-    # 1. 抖音热榜
-    try:
-        all_items.extend(fetch_douyin_hot())
-    except Exception as e:
-        print(f"  ❌ 抖音热榜异常: {e}", file=sys.stderr)
-
-    # 2. 抖音财经视频搜索
-    try:
-        all_items.extend(fetch_douyin_finance_videos())
-    except Exception as e:
-        print(f"  ❌ 抖音视频搜索异常: {e}", file=sys.stderr)
-
-    # 3. 小红书热点
-    try:
-        all_items.extend(fetch_xiaohongshu_hot())
-    except Exception as e:
-        print(f"  ❌ 小红书热点异常: {e}", file=sys.stderr)
-
-    # 4. 小红书财经笔记
-    try:
-        all_items.extend(fetch_xiaohongshu_finance_notes())
-    except Exception as e:
-        print(f"  ❌ 小红书笔记异常: {e}", file=sys.stderr)
-
-    # 5. 微博财经热搜
-    try:
-        all_items.extend(fetch_weibo_finance_hot())
-    except Exception as e:
-        print(f"  ❌ 微博热搜异常: {e}", file=sys.stderr)
-
-    # 6. 东方财富社区
-    try:
-        all_items.extend(fetch_eastmoney_community())
-    except Exception as e:
-        print(f"  ❌ 东方财富异常: {e}", file=sys.stderr)
-
-    # 7. 聚合财经热榜 (36氪/虎嗅/知乎/百度/B站)
-    try:
-        all_items.extend(fetch_tophub_finance())
-    except Exception as e:
-        print(f"  ❌ 聚合热榜异常: {e}", file=sys.stderr)
-
+    all_items, meta = collect_social(deadline=deadline)
     print(f"\n  📊 总抓取: {len(all_items)} 条")
 
     # 处理
-    processed = process_items(all_items)
+    store = ItemStore(STORE_PATH)
+    processed = process_items(all_items, now=now, store=store)
+    try:
+        store.save()
+    except OSError as e:
+        print(f"  ⚠️ 条目库保存失败: {e}", file=sys.stderr)
 
     print(f"  📋 去重+过滤后: {len(processed)} 条")
 
@@ -802,8 +740,10 @@ def main():
 
     # 输出
     output = {
-        'updated_at': NOW.isoformat(),
+        'updated_at': now.isoformat(),
         'total_fetched': len(all_items),
+        'source_counts': meta['source_counts'],
+        'collect_seconds': meta['elapsed'],
         'total_processed': len(processed),
         'sources': list(set(item.get('platform', '') for item in processed)),
         'trends': trends,
@@ -811,8 +751,10 @@ def main():
     }
 
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
+    tmp = OUTPUT_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
         json.dump(output, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, OUTPUT_PATH)
 
     print(f"\n  ✅ 输出至: {OUTPUT_PATH}")
     print(f"  📱 平台覆盖: {', '.join(output['sources'])}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+去重指纹库（SQLite 定长记录，仅依赖标准库）
+- 每条指纹一行 (kind, fp, first_seen)：MD5 存 16 字节 BLOB，SimHash 存 64 位整数，不再保存标题
+- 主键去重 + INSERT OR IGNORE：重复出现的指纹保留真实的首次出现时间，按 TTL 正常过期
+- first_seen 建索引，过期清理只触及过期行
+- 打开时不读数据，第一次查询才加载；保存只追加本轮新增的指纹，不再整库重写
+
+用法:
+    from scripts.fingerprint_store import FingerprintStore
+
+    store = FingerprintStore('data/breaking_dedup.db', ttl_hours=12)
+    md5s = store.load('md5')          # 未过期的指纹列表
+    store.add('md5', md5_hex)
+    store.flush()                     # 追加写入并提交
+"""
+
+import os
+import sqlite3
+import time
+
+KINDS = {'md5': 1, 'simhash': 2}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    kind INTEGER NOT NULL,
+    fp BLOB NOT NULL,
+    first_seen REAL NOT NULL,
+    PRIMARY KEY (kind, fp)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_fingerprints_seen ON fingerprints (first_seen);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _encode(kind, fp):
+    if kind == 'md5':
+        return bytes.fromhex(fp)
+    # SQLite INTEGER 为有符号 64 位
+    return fp - (1 << 64) if fp >= (1 << 63) else fp
+
+
+def _decode(kind, value):
+    if kind == 'md5':
+        return value.hex()
+    return value + (1 << 64) if value < 0 else value
+
+
+class FingerprintStore:
+    def __init__(self, path, ttl_hours):
+        self.path = path
+        self.ttl_hours = ttl_hours
+        self._conn = None
+        self._pending = []
+        self._pruned = False
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get_meta(self, key, default=None):
+        row = self._db().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self._db().execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+        self._db().commit()
+
+    def clear(self, kind):
+        self._db().execute('DELETE FROM fingerprints WHERE kind = ?', (KINDS[kind],))
+        self._db().commit()
+
+    def prune(self, now=None):
+        """删除超过 TTL 的指纹，返回删除条数"""
+        now = time.time() if now is None else now
+        cur = self._db().execute('DELETE FROM fingerprints WHERE first_seen < ?',
+                                 (now - self.ttl_hours * 3600,))
+        self._db().commit()
+        self._pruned = True
+        return cur.rowcount
+
+    def load(self, kind, now=None):
+        """未过期的指纹（第一次调用时顺带清理过期行）"""
+        if not self._pruned:
+            self.prune(now)
+        rows = self._db().execute('SELECT fp FROM fingerprints WHERE kind = ?', (KINDS[kind],))
+        return [_decode(kind, value) for (value,) in rows]
+
+    def add(self, kind, fp, now=None):
+        self._pending.append((KINDS[kind], _encode(kind, fp), time.time() if now is None else now))
+
+    def flush(self):
+        """追加本轮新增指纹；已存在的指纹保留原首次出现时间"""
+        if self._pending:
+            self._db().executemany('INSERT OR IGNORE INTO fingerprints (kind, fp, first_seen) VALUES (?, ?, ?)',
+                                   self._pending)
+            self._db().commit()
+            self._pending = []
+
+    def __len__(self):
+        return self._db().execute('SELECT COUNT(*) FROM fingerprints').fetchone()[0]
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -13,6 +13,12 @@ import urllib.request
 import urllib.error
 import urllib.parse
 
+try:
+    from scripts import http_client, quote_cache
+except ImportError:  # 作为独立脚本运行
+    import http_client
+    import quote_cache
+
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(ROOT_DIR, 'data')
 PICK_FILE = os.path.join(DATA_DIR, 'fund_pick.json')
@@ -26,9 +32,7 @@ _HEADERS = {
 
 def _get_json(url, timeout=10):
     """GET JSON from URL"""
-    req = urllib.request.Request(url, headers=_HEADERS)
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        return json.loads(resp.read().decode('utf-8'))
+    return http_client.get_json(url, headers=_HEADERS, timeout=timeout)
 
 
 def fetch_indices():
@@ -39,16 +43,12 @@ def fetch_indices():
         {'code': '0.399006', 'name': '创业板指'},
         {'code': '1.000300', 'name': '沪深300'},
     ]
-    secids = ','.join(c['code'] for c in codes)
-    url = f'https://push2.eastmoney.com/api/qt/ulist.np/get?fltt=2&fields=f2,f3,f4,f12,f14&secids={secids}'
-    try:
-        data = _get_json(url)
-        diff = data.get('data', {}).get('diff', [])
-        return [{'code': d.get('f12', ''), 'name': d.get('f14', ''), 'price': d.get('f2'),
-                 'pct': d.get('f3'), 'change': d.get('f4')} for d in diff]
-    except Exception as e:
-        print(f'[fund_pick] 获取指数失败: {e}')
-        return []
+    quotes = quote_cache.get_quotes(c['code'] for c in codes)
+    if not quotes:
+        print('[fund_pick] 获取指数失败')
+    diff = [quotes[c['code']] for c in codes if c['code'] in quotes]
+    return [{'code': d.get('f12', ''), 'name': d.get('f14', ''), 'price': d.get('f2'),
+             'pct': d.get('f3'), 'change': d.get('f4')} for d in diff]
 
 
 def fetch_commodities():
@@ -61,14 +61,13 @@ def fetch_commodities():
         {'code': '113.rbm', 'name': '螺纹钢主连', 'icon': '🏗️'},
         {'code': '113.im',  'name': '铁矿石主连', 'icon': '⛏️'},
     ]
-    secids = ','.join(c['code'] for c in codes)
-    url = f'https://push2.eastmoney.com/api/qt/ulist.np/get?fltt=2&fields=f2,f3,f4,f12,f14&secids={secids}'
+    quotes = quote_cache.get_quotes(c['code'] for c in codes)
     try:
-        data = _get_json(url)
-        diff = data.get('data', {}).get('diff', [])
         result = []
-        for i, d in enumerate(diff):
-            c = codes[i] if i < len(codes) else {}
+        for c in codes:
+            d = quotes.get(c['code'])
+            if d is None:
+                continue
             pct = d.get('f3')
             pct_str = f'{pct:+.2f}%' if pct is not None else '--'
             result.append({
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+对冲请求（同步版，仅依赖标准库）
+- 主请求发出后等待 delay 秒；仍未得到可用结果就发出下一个备用请求，依次类推
+- 任一请求先返回可用结果（accept(result) 为真）即采用，其余请求不再等待、未发出的不再发出
+- 某个请求提前失败 / 结果不可用时立即发出下一个，不必等满 delay
+- 整体受 deadline 约束，超时返回 default
+
+异步采集引擎中的对冲见 collect_engine.Source(hedge_delay=...)；这里服务于 akshare 等阻塞调用。
+已发出的阻塞请求无法中断，落败者在后台线程里自然结束，结果被丢弃。
+
+用法:
+    from scripts.hedge import hedged_call
+
+    df = hedged_call([
+        ('sina', lambda: fetch_sina(code)),
+        ('eastmoney', lambda: fetch_eastmoney(code)),
+    ], delay=2, deadline=15, accept=lambda df: df is not None and not df.empty)
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+HEDGE_DELAY = float(os.environ.get('HEDGE_DELAY', '2'))
+MAX_WORKERS = int(os.environ.get('HEDGE_MAX_WORKERS', '8'))
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='hedge')
+
+
+def hedged_call(attempts, delay=None, deadline=None, accept=bool, default=None, errors=None):
+    """attempts = [(name, fn)]，按顺序对冲执行，返回最先被 accept 的结果
+
+    errors: 传入 list 时收集 (name, 异常) 便于调用方记账
+    """
+    delay = HEDGE_DELAY if delay is None else delay
+    stop_at = None if deadline is None else time.monotonic() + deadline
+    queue = list(attempts)
+    running = {}
+    while queue or running:
+        remaining = None if stop_at is None else stop_at - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            break
+        # 每轮（首轮 / 等满 delay / 有请求失败或结果不可用）发出下一个备用请求
+        if queue:
+            name, fn = queue.pop(0)
+            running[_EXECUTOR.submit(fn)] = name
+        timeout = remaining
+        if queue:
+            timeout = delay if remaining is None else min(delay, remaining)
+        done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            exc = future.exception()
+            if exc is not None:
+                if errors is not None:
+                    errors.append((name, exc))
+                continue
+            result = future.result()
+            if accept(result):
+                for loser in running:
+                    loser.cancel()
+                return result
+    for future in running:
+        future.cancel()
+    return default
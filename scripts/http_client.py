@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+共享 HTTP 客户端（仅依赖标准库）
+- 按 (scheme, host, port) 维护 HTTP/1.1 keep-alive 连接池，跨采集周期复用，
+  东方财富 / 新浪 / 微博等高频主机不再每 3~30 分钟重复 TLS 握手
+- 全进程只创建两份 SSL context（校验 / 不校验证书），不再每次请求新建
+- 统一的超时、可选重试（连接错误 / 502/503/504，默认关闭）、重定向与 gzip 解压
+- 按主机统计请求数、错误数、接收字节与延迟，供 /api/status 展示
+
+用法:
+    from scripts import http_client
+
+    text = http_client.get_text(url, headers={...}, timeout=10)   # 非 2xx 抛 HTTPError
+    data = http_client.get_json(url, timeout=8)                    # 失败抛异常
+    resp = http_client.get(url, params={...})                      # resp.status_code / .text / .json()
+    http_client.stats()                                            # {host: {...}}
+
+    # 条件请求：304 / 正文哈希未变时直接复用上次的解析结果
+    store = http_client.ValidatorStore('data/feed_state.json')
+    items, changed = http_client.get_if_changed(store, url, parse_fn, timeout=10)
+    store.save()
+"""
+
+import copy
+import hashlib
+import http.client
+import json
+import os
+import re
+import ssl
+import threading
+import time
+import zlib
+from urllib.parse import urlencode, urljoin, urlsplit
+
+DEFAULT_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', '10'))
+# 默认只请求一次（与改造前一致）；确需重试的调用方显式传 retries=N
+DEFAULT_RETRIES = int(os.environ.get('HTTP_RETRIES', '0'))
+RETRY_BACKOFF = 0.3
+RETRY_STATUS = (502, 503, 504)
+MAX_REDIRECTS = 5
+MAX_IDLE_PER_HOST = 8
+IDLE_TTL = 55  # 多数服务端 keep-alive 超时 60s，提前淘汰避免拿到已被对端关闭的连接
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    'Accept': '*/*',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# 复用失败时可安全重发的错误：连接在池中闲置期间被对端关闭
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 BrokenPipeError, ConnectionResetError, ConnectionAbortedError)
+
+
+class HTTPError(IOError):
+    """非 2xx 响应（get_text / get_json / raise_for_status 抛出）"""
+
+    def __init__(self, url, status, reason=''):
+        super().__init__(f'HTTP {status} {reason}'.strip() + f' ({url[:80]})')
+        self.url = url
+        self.status = status
+
+
+class Response:
+    def __init__(self, url, status, reason, headers, content, elapsed):
+        self.url = url
+        self.status_code = status
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 300
+
+    @property
+    def encoding(self):
+        ctype = self.headers.get('Content-Type', '') or ''
+        for part in ctype.split(';')[1:]:
+            key, _, value = part.strip().partition('=')
+            if key.lower() == 'charset' and value:
+                return value.strip('"\' ')
+        return 'utf-8'
+
+    @property
+    def text(self):
+        try:
+            return self.content.decode(self.encoding, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPError(self.url, self.status_code, self.reason)
+
+
+# ==================== SSL / 连接池 ====================
+
+_SSL_VERIFIED = ssl.create_default_context()
+_SSL_UNVERIFIED = ssl.create_default_context()
+_SSL_UNVERIFIED.check_hostname = False
+_SSL_UNVERIFIED.verify_mode = ssl.CERT_NONE
+
+
+
+def ssl_context(verify=True):
+    """共享 SSL context（仍走 urlopen / build_opener 的调用方也复用同一份）"""
+    return _SSL_VERIFIED if verify else _SSL_UNVERIFIED
+
+
+_pool_lock = threading.Lock()
+_idle = {}   # (scheme, host, port, verify) -> [(conn, idle_since)]
+_stats_lock = threading.Lock()
+_stats = {}  # host -> 计数
+
+
+def _acquire(scheme, host, port, verify, timeout, fresh=False):
+    """取一条闲置连接；没有（或 fresh=True）则新建。返回 (conn, reused)"""
+    key = (scheme, host, port, verify)
+    now = time.monotonic()
+    with _pool_lock:
+        bucket = [] if fresh else (_idle.get(key) or [])
+        while bucket:
+            conn, since = bucket.pop()
+            if now - since < IDLE_TTL:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            conn.close()
+    if scheme == 'https':
+        ctx = _SSL_VERIFIED if verify else _SSL_UNVERIFIED
+        conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=ctx)
+    else:
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    return conn, False
+
+
+def _release(scheme, host, port, verify, conn):
+    key = (scheme, host, port, verify)
+    with _pool_lock:
+        bucket = _idle.setdefault(key, [])
+        if len(bucket) < MAX_IDLE_PER_HOST:
+            bucket.append((conn, time.monotonic()))
+            return
+    conn.close()
+
+
+def close_all():
+    """关闭全部闲置连接（测试 / 进程退出时使用）"""
+    with _pool_lock:
+        buckets = list(_idle.values())
+        _idle.clear()
+    for bucket in buckets:
+        for conn, _ in bucket:
+            conn.close()
+
+
+# ==================== 统计 ====================
+
+def _record(host, nbytes, latency, error=False, reused=False, opened=False):
+    with _stats_lock:
+        s = _stats.setdefault(host, {
+            'requests': 0, 'errors': 0, 'bytes': 0, 'latencyTotal': 0.0, 'latencyMax': 0.0,
+            'connOpened': 0, 'connReused': 0,
+        })
+        s['requests'] += 1
+        s['bytes'] += nbytes
+        s['latencyTotal'] += latency
+        s['latencyMax'] = max(s['latencyMax'], latency)
+        if error:
+            s['errors'] += 1
+        if reused:
+            s['connReused'] += 1
+        if opened:
+            s['connOpened'] += 1
+
+
+def stats():
+    """按主机汇总的请求 / 字节 / 延迟统计"""
+    with _stats_lock:
+        snapshot = {host: dict(s) for host, s in _stats.items()}
+    result = {}
+    for host, s in sorted(snapshot.items(), key=lambda kv: -kv[1]['requests']):
+        n = s['requests'] or 1
+        result[host] = {
+            'requests': s['requests'],
+            'errors': s['errors'],
+            'bytes': s['bytes'],
+            'avgLatencyMs': round(s['latencyTotal'] / n * 1000, 1),
+            'maxLatencyMs': round(s['latencyMax'] * 1000, 1),
+            'connOpened': s['connOpened'],
+            'connReused': s['connReused'],
+        }
+    return result
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ==================== 请求 ====================
+
+def _decode_body(raw, encoding):
+    encoding = (encoding or '').lower()
+    if encoding == 'gzip':
+        return zlib.decompress(raw, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(raw)
+        except zlib.error:
+            return zlib.decompress(raw, -zlib.MAX_WBITS)
+    return raw
+
+
+def _send_once(url, headers, timeout, verify):
+    """单次请求（不处理重定向 / 重试），返回 (status, reason, headers, body)"""
+    parts = urlsplit(url)
+    scheme = parts.scheme or 'http'
+    host = parts.hostname or ''
+    port = parts.port or (443 if scheme == 'https' else 80)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    hdrs = dict(headers)
+    hdrs.setdefault('Host', parts.netloc)
+
+    conn, reused = _acquire(scheme, host, port, verify, timeout)
+    started = time.monotonic()
+    try:
+        try:
+            conn.request('GET', path, headers=hdrs)
+            resp = conn.getresponse()
+        except _STALE_ERRORS:
+            if not reused:
+                raise
+            # 池中连接已被对端关闭：换新连接重发一次
+            conn.close()
+            conn, reused = _acquire(scheme, host, port, verify, timeout, fresh=True)
+            conn.request('GET', path, headers=hdrs)
+            resp = conn.getresponse()
+        raw = resp.read()
+    except Exception:
+        conn.close()
+        _record(host, 0, time.monotonic() - started, error=True, reused=reused, opened=not reused)
+        raise
+    latency = time.monotonic() - started
+    if resp.will_close:
+        conn.close()
+    else:
+        _release(scheme, host, port, verify, conn)
+    _record(host, len(raw), latency, error=resp.status >= 400, reused=reused, opened=not reused)
+    return resp.status, resp.reason, resp.headers, _decode_body(raw, resp.headers.get('Content-Encoding'))
+
+
+def get(url, headers=None, params=None, timeout=None, retries=None, verify=True, allow_redirects=True):
+    """GET 请求，返回 Response（不因 4xx/5xx 抛异常；连接失败在重试耗尽后抛出）"""
+    if params:
+        url += ('&' if '?' in url else '?') + urlencode(params)
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    retries = DEFAULT_RETRIES if retries is None else retries
+    hdrs = dict(DEFAULT_HEADERS)
+    if headers:
+        hdrs.update(headers)
+
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            current = url
+            for _ in range(MAX_REDIRECTS + 1):
+                status, reason, resp_headers, body = _send_once(current, hdrs, timeout, verify)
+                location = resp_headers.get('Location')
+                if not (allow_redirects and status in (301, 302, 303, 307, 308) and location):
+                    break
+                current = urljoin(current, location)
+            response = Response(current, status, reason, resp_headers, body, time.monotonic() - started)
+        except (OSError, http.client.HTTPException):
+            if attempt >= retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS or attempt >= retries:
+                return response
+        attempt += 1
+        time.sleep(RETRY_BACKOFF * attempt)
+
+
+def get_text(url, headers=None, params=None, timeout=None, retries=None, verify=True):
+    """GET 文本，非 2xx 抛 HTTPError"""
+    resp = get(url, headers=headers, params=params, timeout=timeout, retries=retries, verify=verify)
+    resp.raise_for_status()
+    return resp.text
+
+
+def get_json(url, headers=None, params=None, timeout=None, retries=None, verify=True):
+    """GET JSON，非 2xx 抛 HTTPError，解析失败抛 ValueError"""
+    resp = get(url, headers=headers, params=params, timeout=timeout, retries=retries, verify=verify)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def cookie_header(resp):
+    """把响应的 Set-Cookie 折算成后续请求可用的 Cookie 头（xueqiu 等需要先拿 token 的站点）"""
+    pairs = []
+    for raw in resp.headers.get_all('Set-Cookie') or []:
+        pair = raw.split(';', 1)[0].strip()
+        if '=' in pair:
+            pairs.append(pair)
+    return '; '.join(pairs)
+
+
+# ==================== 条件请求 ====================
+
+# RSS 每次请求都会刷新的频道级时间戳，不参与正文哈希（条目自身的 pubDate 保留）
+_VOLATILE_RE = re.compile(rb'<lastBuildDate>[^<]*</lastBuildDate>', re.I)
+_CHANNEL_PUBDATE_RE = re.compile(rb'<pubDate>[^<]*</pubDate>', re.I)
+
+
+def body_hash(content):
+    content = _VOLATILE_RE.sub(b'', content)
+    head, sep, rest = content.partition(b'<item')
+    if sep:
+        content = _CHANNEL_PUBDATE_RE.sub(b'', head) + sep + rest
+    return hashlib.sha1(content).hexdigest()
+
+
+class ValidatorStore:
+    """按 URL 持久化 ETag / Last-Modified / 正文哈希 / 上次解析结果（JSON 文件，跨进程重启保留）"""
+
+    def __init__(self, path, max_entries=500):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._entries = data.get('urls', {}) if isinstance(data, dict) else {}
+            except Exception:
+                self._entries = {}
+        return self._entries
+
+    def get(self, url):
+        with self._lock:
+            return self._load().get(url)
+
+    def request_headers(self, url):
+        """有缓存的解析结果时才带验证头；否则 304 无法还原内容"""
+        entry = self.get(url)
+        if not entry or 'payload' not in entry:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('lastModified'):
+            headers['If-Modified-Since'] = entry['lastModified']
+        return headers
+
+    def resolve(self, url, resp, parse):
+        """根据响应决定复用还是重新解析，返回 (payload, changed)；非 2xx/304 抛 HTTPError"""
+        entry = self.get(url)
+        if resp.status_code == 304 and entry and 'payload' in entry:
+            self._touch(url, entry)
+            return copy.deepcopy(entry['payload']), False
+        resp.raise_for_status()
+        digest = body_hash(resp.content)
+        if entry and entry.get('hash') == digest and 'payload' in entry:
+            self._touch(url, entry, resp)
+            return copy.deepcopy(entry['payload']), False
+        payload = parse(resp.text)
+        changed = not (entry and entry.get('payload') == payload)
+        with self._lock:
+            self._load()[url] = {
+                'etag': resp.headers.get('ETag') or '',
+                'lastModified': resp.headers.get('Last-Modified') or '',
+                'hash': digest,
+                'payload': copy.deepcopy(payload),  # 调用方会在返回的条目上追加字段
+                'checkedAt': int(time.time()),
+            }
+            self._dirty = True
+        return payload, changed
+
+    def _touch(self, url, entry, resp=None):
+        with self._lock:
+            entry = dict(entry, checkedAt=int(time.time()))
+            if resp is not None:
+                entry['etag'] = resp.headers.get('ETag') or entry.get('etag', '')
+                entry['lastModified'] = resp.headers.get('Last-Modified') or entry.get('lastModified', '')
+            self._load()[url] = entry
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            entries = self._entries
+            if len(entries) > self.max_entries:
+                keep = sorted(entries, key=lambda u: entries[u].get('checkedAt', 0))[-self.max_entries:]
+                entries = self._entries = {u: entries[u] for u in keep}
+            snapshot = json.dumps({'urls': entries, 'updated': int(time.time())}, ensure_ascii=False)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f'  [WARN] 保存条件请求状态失败: {e}')
+
+
+def get_if_changed(store, url, parse, headers=None, **kwargs):
+    """条件 GET：返回 (parse 结果, 是否变化)；304 或正文哈希一致时不调用 parse"""
+    hdrs = dict(headers or {})
+    hdrs.update(store.request_headers(url))
+    resp = get(url, headers=hdrs, **kwargs)
+    return store.resolve(url, resp, parse)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+采集条目模型（__slots__ 记录 + 惰性缓存的派生值，仅依赖标准库）
+- 统一字段名：summary（兼容 desc）、publish_time（兼容 time）、platform（兼容 source）
+- 拼接文本 / 小写文本 / 去重键 / SimHash / 关键词命中只在第一次使用时计算，之后各阶段共用
+- title / summary 被修改时自动清空派生缓存
+- to_dict() 输出与原先 dict 条目一致的 JSON 结构（未设置的字段不输出）
+- 提供 get / [] / in，尚未改造的下游代码仍可按 dict 方式读取
+
+用法:
+    from scripts.item_model import Item
+
+    item = Item(title='黄金大涨', summary='...', likes=120, platform='微博')
+    item.text            # 'title summary'
+    item.dedup_key       # 去重键（标题去标点前 20 字）
+    item.keyword_hits(matcher)
+    item.to_dict()
+"""
+
+import re
+
+# 输出字段顺序与各采集源原先的 dict 一致
+FIELDS = ('title', 'summary', 'likes', 'platform', 'source_type', 'sentiment', 'creator_type', 'publish_time')
+ALIASES = {'desc': 'summary', 'time': 'publish_time', 'source': 'platform'}
+
+_NON_WORD = re.compile(r'\W')
+
+
+class Item:
+    __slots__ = ('_title', '_summary', 'likes', 'platform', 'source_type', 'sentiment',
+                 'creator_type', 'publish_time', 'extra',
+                 '_text', '_text_lower', '_dedup_key', '_simhash', '_hits')
+
+    def __init__(self, title=None, summary=None, likes=None, platform=None, source_type=None,
+                 sentiment=None, creator_type=None, publish_time=None, **extra):
+        self._title = title
+        self._summary = summary
+        self.likes = likes
+        self.platform = platform
+        self.source_type = source_type
+        self.sentiment = sentiment
+        self.creator_type = creator_type
+        self.publish_time = publish_time
+        self.extra = extra
+        self._reset()
+
+    @classmethod
+    def from_dict(cls, data):
+        """任意来源的 dict 条目 → Item；别名字段只在规范字段缺失时使用"""
+        if isinstance(data, cls):
+            return data
+        fields, extra = {}, {}
+        for key, value in data.items():
+            if key in FIELDS:
+                fields[key] = value
+            elif key in ALIASES:
+                continue
+            else:
+                extra[key] = value
+        for alias, key in ALIASES.items():
+            if fields.get(key) is None and data.get(alias) is not None:
+                fields[key] = data[alias]
+        return cls(**fields, **extra)
+
+    def to_dict(self):
+        out = {}
+        for key in FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                out[key] = value
+        out.update(self.extra)
+        return out
+
+    # ---- 规范字段 ----
+    @property
+    def title(self):
+        return self._title
+
+    @title.setter
+    def title(self, value):
+        self._title = value
+        self._reset()
+
+    @property
+    def summary(self):
+        return self._summary
+
+    @summary.setter
+    def summary(self, value):
+        self._summary = value
+        self._reset()
+
+    def _reset(self):
+        self._text = None
+        self._text_lower = None
+        self._dedup_key = None
+        self._simhash = None
+        self._hits = None
+
+    # ---- 派生值（惰性缓存） ----
+    @property
+    def text(self):
+        """标题 + 摘要，关键词分类 / 情绪 / 趋势统一使用"""
+        if self._text is None:
+            self._text = (self._title or '') + ' ' + (self._summary or '')
+        return self._text
+
+    @property
+    def text_lower(self):
+        if self._text_lower is None:
+            self._text_lower = self.text.lower()
+        return self._text_lower
+
+    @property
+    def dedup_key(self):
+        """跨平台去重键：标题去掉标点空白后的前 20 字"""
+        if self._dedup_key is None:
+            self._dedup_key = _NON_WORD.sub('', self._title or '')[:20]
+        return self._dedup_key
+
+    def simhash(self, fn):
+        """标题 SimHash 指纹（fn 为指纹函数）"""
+        if self._simhash is None:
+            self._simhash = fn(self._title or '')
+        return self._simhash
+
+    def keyword_hits(self, matcher):
+        """matcher.scan(text) 的结果；可直接传给 matcher.has / hits / count"""
+        if self._hits is None or self._hits[0] is not matcher:
+            self._hits = (matcher, matcher.scan(self.text))
+        return self._hits[1]
+
+    # ---- dict 兼容 ----
+    def get(self, key, default=None):
+        key = ALIASES.get(key, key)
+        if key in FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None and key not in self:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        key = ALIASES.get(key, key)
+        if key in FIELDS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        key = ALIASES.get(key, key)
+        if key in FIELDS:
+            return getattr(self, key) is not None
+        return key in self.extra
+
+    def __repr__(self):
+        return f'Item({self._title!r}, platform={self.platform!r}, likes={self.likes!r})'
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+跨轮次舆情条目库（JSON 持久化，仅依赖标准库）
+- 以规范化标题（Item.dedup_key）的哈希为键，记录首次 / 最近出现时间和互动数历史
+- 每轮采集只对新条目做噪音 / 过时标题判定，老条目沿用判定结果、只更新字段和互动数
+- 输出最近窗口内出现过的条目，并附带互动增速（likes_velocity，每小时增量）
+- 超过保留期未再出现的条目自动清理
+
+用法:
+    from scripts.item_store import ItemStore
+
+    store = ItemStore('data/sentiment_store.json')
+    stats = store.ingest(items, classify=lambda item: None or '拒绝原因')
+    window = store.window()      # [Item]，likes_velocity / first_seen 已写入 extra
+    store.save()
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+try:
+    from scripts.item_model import Item
+except ImportError:  # 作为独立脚本运行
+    from item_model import Item
+
+WINDOW_HOURS = float(os.environ.get('SENTIMENT_WINDOW_HOURS', '1.5'))
+RETENTION_HOURS = float(os.environ.get('SENTIMENT_RETENTION_HOURS', '48'))
+VELOCITY_LOOKBACK_HOURS = 3
+MAX_HISTORY = 48
+STORE_VERSION = 1
+
+
+def item_key(item):
+    return hashlib.md5(item.dedup_key.encode('utf-8')).hexdigest()[:16]
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+class ItemStore:
+    def __init__(self, path, window_hours=None, retention_hours=None):
+        self.path = path
+        self.window_hours = WINDOW_HOURS if window_hours is None else window_hours
+        self.retention_hours = RETENTION_HOURS if retention_hours is None else retention_hours
+        self._entries = None
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == STORE_VERSION:
+                self._entries = data.get('items') or {}
+        except (OSError, ValueError):
+            pass
+        return self._entries
+
+    def __len__(self):
+        return len(self._load())
+
+    def ingest(self, items, classify=None, now=None):
+        """合并本轮采集结果，返回 {'new', 'updated', 'rejected': {原因: 新条目数}}
+
+        classify(item) 返回 None 表示保留，否则返回拒绝原因；只对首次出现的条目调用
+        """
+        entries = self._load()
+        now = time.time() if now is None else now
+        stats = {'new': 0, 'updated': 0, 'rejected': {}}
+        for item in items:
+            key = item_key(item)
+            entry = entries.get(key)
+            likes = item.likes or 0
+            if entry is None:
+                verdict = classify(item) if classify else None
+                entries[key] = {
+                    'item': item.to_dict(),
+                    'first_seen': now,
+                    'last_seen': now,
+                    'history': [[now, likes]],
+                    'verdict': verdict,
+                }
+                if verdict:
+                    stats['rejected'][verdict] = stats['rejected'].get(verdict, 0) + 1
+                else:
+                    stats['new'] += 1
+                continue
+            entry['last_seen'] = now
+            if entry.get('verdict'):
+                continue
+            entry['item'] = item.to_dict()
+            history = entry['history']
+            if history[-1][1] != likes or now - history[-1][0] >= 3600:
+                history.append([now, likes])
+                del history[:-MAX_HISTORY]
+            stats['updated'] += 1
+        self._prune(now)
+        return stats
+
+    def _prune(self, now):
+        cutoff = now - self.retention_hours * 3600
+        entries = self._load()
+        for key in [k for k, e in entries.items() if e['last_seen'] < cutoff]:
+            del entries[key]
+
+    @staticmethod
+    def velocity(history, now):
+        """回看窗口内最早一点到最新一点的互动增速（每小时）"""
+        since = now - VELOCITY_LOOKBACK_HOURS * 3600
+        points = [p for p in history if p[0] >= since] or history[-1:]
+        (t0, v0), (t1, v1) = points[0], points[-1]
+        if t1 - t0 < 60:
+            return 0.0
+        return round((v1 - v0) * 3600 / (t1 - t0), 1)
+
+    def window(self, now=None):
+        """最近 window_hours 内出现过、未被拒绝的条目"""
+        now = time.time() if now is None else now
+        cutoff = now - self.window_hours * 3600
+        items = []
+        for entry in self._load().values():
+            if entry.get('verdict') or entry['last_seen'] < cutoff:
+                continue
+            item = Item.from_dict(entry['item'])
+            item['first_seen'] = _iso(entry['first_seen'])
+            item['likes_velocity'] = self.velocity(entry['history'], now)
+            items.append(item)
+        return items
+
+    def save(self):
+        if self._entries is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': STORE_VERSION, 'updated': _iso(time.time()), 'items': self._entries},
+                      f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+多关键词匹配器（Aho-Corasick 自动机，仅依赖标准库）
+- 各模块把自己的关键词表（财经 / 噪音 / 趋势主题 / 概念组 ...）一次性编译进同一个自动机
+- 每段文本只扫描一遍，返回命中的全部关键词及其所属表、标签
+- 与逐个 ``kw in text`` 的子串语义完全一致（包含重叠命中），耗时只与文本长度相关，
+  关键词表再扩充也不会拖慢采集管线
+
+用法:
+    from scripts.keyword_matcher import KeywordMatcher
+
+    matcher = KeywordMatcher()
+    matcher.add_table('finance', FINANCE_KW)
+    for th in TREND_THEMES:
+        matcher.add_table('trend', th['keywords'], label=th['id'])
+    matcher.build()
+
+    matcher.has(text, 'finance')        # 是否命中该表任一关键词
+    matcher.count(text, 'finance')      # 命中该表的不同关键词数
+    matcher.hits(text, 'trend')         # [(theme_id, 原始关键词), ...]
+    matcher.labels(text, 'trend')       # {theme_id, ...}
+"""
+
+from collections import deque
+from functools import lru_cache
+
+SCAN_CACHE_SIZE = 8192
+
+
+class KeywordMatcher:
+    def __init__(self, ignore_case=True):
+        self.ignore_case = ignore_case
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._keywords = []   # 规范化后的关键词
+        self._tags = []       # 关键词序号 -> [(table, label, 原始关键词)]
+        self._index = {}
+        self._built = False
+        self._scan_cached = lru_cache(maxsize=SCAN_CACHE_SIZE)(self._scan)
+
+    def _norm(self, text):
+        return text.lower() if self.ignore_case else text
+
+    def add(self, keyword, table, label=None):
+        kw = self._norm(str(keyword or ''))
+        if not kw:
+            return
+        idx = self._index.get(kw)
+        if idx is None:
+            idx = self._index[kw] = len(self._keywords)
+            self._keywords.append(kw)
+            self._tags.append([])
+            state = 0
+            for ch in kw:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] = (idx,)
+        tag = (table, label, keyword)
+        if tag not in self._tags[idx]:
+            self._tags[idx].append(tag)
+        self._built = False
+
+    def add_table(self, table, keywords, label=None):
+        for kw in keywords:
+            self.add(kw, table, label)
+        return self
+
+    def build(self):
+        """BFS 计算失败指针，并把后缀状态的输出并入当前状态"""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        self._scan_cached.cache_clear()
+        return self
+
+    def _scan(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return frozenset(found)
+
+    def scan(self, text):
+        """命中的关键词序号集合（同一文本的重复扫描走缓存）"""
+        if isinstance(text, frozenset):  # 已经是 scan() 结果（如 Item.keyword_hits）
+            return text
+        if not text:
+            return frozenset()
+        if not self._built:
+            self.build()
+        return self._scan_cached(self._norm(text))
+
+    # ---- 按表查询（text 也可以是 scan() 的结果） ----
+    def hits(self, text, table):
+        """[(label, 原始关键词)]，按关键词登记顺序"""
+        result = []
+        for idx in sorted(self.scan(text)):
+            for t, label, original in self._tags[idx]:
+                if t == table:
+                    result.append((label, original))
+        return result
+
+    def has(self, text, table):
+        return any(t == table for idx in self.scan(text) for t, _, _ in self._tags[idx])
+
+    def count(self, text, table):
+        return sum(1 for idx in self.scan(text) if any(t == table for t, _, _ in self._tags[idx]))
+
+    def labels(self, text, table):
+        return {label for label, _ in self.hits(text, table)}
+
+    def __len__(self):
+        return len(self._keywords)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+东方财富 ulist.np 行情共享缓存（进程内，仅依赖标准库 + http_client）
+- 按 secid 缓存最近一次行情，QUOTE_CACHE_TTL 秒内各模块直接复用同一份快照
+- 同一时刻不同模块请求的不同 secid 合并成一次批量请求（BATCH_WINDOW 秒内攒批）
+- 正在请求中的 secid 不再重复发起，后来者等待同一批结果
+- 行情按 f13.f12（市场.代码）精确对应到 secid，不再靠代码后缀匹配
+
+用法:
+    from scripts import quote_cache
+
+    quotes = quote_cache.get_quotes(['1.000001', '113.aum'])
+    quotes['113.aum']      # {'f2': 价格, 'f3': 涨跌幅, 'f4': 涨跌额, 'f12': 代码, 'f13': 市场, 'f14': 名称}
+"""
+
+import os
+import threading
+import time
+
+try:
+    from scripts import http_client
+except ImportError:  # 作为独立脚本运行
+    import http_client
+
+QUOTE_CACHE_TTL = float(os.environ.get('QUOTE_CACHE_TTL', '20'))
+BATCH_WINDOW = float(os.environ.get('QUOTE_BATCH_WINDOW', '0.05'))
+MAX_BATCH = 80
+QUOTE_URL = 'https://push2.eastmoney.com/api/qt/ulist.np/get?fltt=2&fields=f2,f3,f4,f12,f13,f14&secids={secids}'
+
+_lock = threading.Lock()
+_cache = {}        # secid -> (fetched_at, row)
+_inflight = {}     # secid -> _Batch
+_open = None       # 仍在攒批、尚未发出的批次
+_stats = {'requests': 0, 'hits': 0, 'misses': 0, 'coalesced': 0}
+
+
+class _Batch:
+    __slots__ = ('secids', 'done', 'rows')
+
+    def __init__(self):
+        self.secids = []
+        self.done = threading.Event()
+        self.rows = {}
+
+
+def _request(secids, timeout):
+    """一次（按 MAX_BATCH 分段）批量请求，返回 {secid: row}"""
+    rows = {}
+    for i in range(0, len(secids), MAX_BATCH):
+        chunk = secids[i:i + MAX_BATCH]
+        by_code = {}
+        for secid in chunk:
+            by_code.setdefault(secid.split('.')[-1], secid)
+        with _lock:
+            _stats['requests'] += 1
+        try:
+            data = http_client.get_json(QUOTE_URL.format(secids=','.join(chunk)),
+                                        headers={'User-Agent': 'Mozilla/5.0'}, timeout=timeout, verify=False)
+        except Exception as e:
+            print(f'  [WARN] 行情批量获取失败 ({len(chunk)} 个): {e}')
+            continue
+        wanted = set(chunk)
+        for row in (data.get('data') or {}).get('diff') or []:
+            code = str(row.get('f12', ''))
+            secid = f"{row.get('f13')}.{code}"
+            if secid not in wanted:
+                secid = by_code.get(code)
+            if secid is not None:
+                rows[secid] = row
+    return rows
+
+
+def _run_batch(batch, timeout):
+    global _open
+    secids = []
+    rows = {}
+    try:
+        time.sleep(BATCH_WINDOW)
+        with _lock:
+            if _open is batch:
+                _open = None
+            secids = list(batch.secids)
+        rows = _request(secids, timeout)
+    finally:
+        # 无论请求是否异常都要解绑 in-flight 并唤醒等待者，否则这些 secid 会永远挂在一个死批次上
+        now = time.time()
+        with _lock:
+            if _open is batch:
+                _open = None
+            for secid in secids or batch.secids:
+                if secid in rows:
+                    _cache[secid] = (now, rows[secid])
+                if _inflight.get(secid) is batch:
+                    del _inflight[secid]
+            batch.rows = rows
+        batch.done.set()
+
+
+def _wait_budget(batch, timeout):
+    """等待其他调用方发起的批次的上限：攒批窗口 + 分段数 × 每段最坏耗时（含 http_client 重试与退避）"""
+    with _lock:
+        chunks = max(1, -(-len(batch.secids) // MAX_BATCH))
+    attempts = http_client.DEFAULT_RETRIES + 1
+    per_chunk = attempts * timeout + http_client.RETRY_BACKOFF * attempts * (attempts - 1) / 2
+    return BATCH_WINDOW + chunks * per_chunk + 1
+
+
+def get_quotes(secids, max_age=None, timeout=8):
+    """{secid: 行情行}；max_age 秒内的缓存直接复用，取不到的 secid 不在结果中"""
+    global _open
+    max_age = QUOTE_CACHE_TTL if max_age is None else max_age
+    secids = list(dict.fromkeys(s for s in secids if s))
+    now = time.time()
+    result = {}
+    waits = {}
+    leader = None
+    with _lock:
+        for secid in secids:
+            cached = _cache.get(secid)
+            if cached and now - cached[0] <= max_age:
+                result[secid] = cached[1]
+                _stats['hits'] += 1
+                continue
+            batch = _inflight.get(secid)
+            if batch is not None:
+                _stats['coalesced'] += 1
+            else:
+                if _open is None:
+                    _open = leader = _Batch()
+                batch = _open
+                batch.secids.append(secid)
+                _inflight[secid] = batch
+                _stats['misses'] += 1
+            waits.setdefault(batch, []).append(secid)
+    if leader is not None:
+        _run_batch(leader, timeout)
+    for batch, wanted in waits.items():
+        batch.done.wait(_wait_budget(batch, timeout))
+        for secid in wanted:
+            if secid in batch.rows:
+                result[secid] = batch.rows[secid]
+    return {secid: result[secid] for secid in secids if secid in result}
+
+
+def get_quote(secid, max_age=None, timeout=8):
+    return get_quotes([secid], max_age=max_age, timeout=timeout).get(secid)
+
+
+def stats():
+    with _lock:
+        return {**_stats, 'cached': len(_cache), 'inflight': len(_inflight)}
+
+
+def clear():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""自动模拟仓绩效分析（NumPy 向量化）。
+
+输入完整的结算日志与交易日志，一次性算出：
+- 日频净值曲线、累计收益、最大回撤
+- 年化 Sharpe / Sortino、日胜率、交易胜率
+- 换手率
+- 按来源（stock_screen / fund_pick）的收益归因
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List
+
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+ATTRIBUTION_SOURCES = ('stock_screen', 'fund_pick')
+
+
+def _daily_settlements(settlements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """每个日期保留一条结算（优先 daily，周五的 weekly 仅在当日缺 daily 时补位），旧 → 新。"""
+    by_date: Dict[str, Dict[str, Any]] = {}
+    for item in settlements:
+        day = str(item.get('date') or '')[:10]
+        if not day:
+            continue
+        current = by_date.get(day)
+        if current is None or (current.get('kind') == 'weekly' and item.get('kind', 'daily') != 'weekly'):
+            by_date[day] = item
+    return [by_date[day] for day in sorted(by_date)]
+
+
+def _code_sources(trades: List[Dict[str, Any]]) -> Dict[str, str]:
+    """代码 → 最近一次买入来源；卖出的 aiSource 是风控来源，不参与归因。"""
+    sources: Dict[str, str] = {}
+    for item in sorted(trades, key=lambda t: (str(t.get('time') or t.get('date') or ''), int(t.get('id', 0) or 0))):
+        if item.get('action') == 'buy' and item.get('code'):
+            sources[str(item['code'])] = str(item.get('aiSource') or 'other')
+    return sources
+
+
+def _realized_trade_pnls(trades: List[Dict[str, Any]]) -> np.ndarray:
+    """按移动加权成本回放交易，返回每笔卖出的已实现盈亏。"""
+    shares: Dict[str, float] = {}
+    cost: Dict[str, float] = {}
+    pnls: List[float] = []
+    for item in sorted(trades, key=lambda t: (str(t.get('time') or t.get('date') or ''), int(t.get('id', 0) or 0))):
+        code = str(item.get('code') or '')
+        qty = float(item.get('shares', 0) or 0)
+        amount = float(item.get('amount', 0) or 0)
+        if not code or qty <= 0:
+            continue
+        if item.get('action') == 'buy':
+            shares[code] = shares.get(code, 0.0) + qty
+            cost[code] = cost.get(code, 0.0) + amount
+        elif item.get('action') == 'sell' and shares.get(code, 0.0) > 0:
+            held = shares[code]
+            ratio = min(1.0, qty / held)
+            cost_out = cost.get(code, 0.0) * ratio
+            pnls.append(amount - cost_out)
+            shares[code] = held - min(qty, held)
+            cost[code] = cost.get(code, 0.0) - cost_out
+    return np.asarray(pnls, dtype=float)
+
+
+def _round(value: float, digits: int = 4) -> float:
+    if value is None or not math.isfinite(value):
+        return 0.0
+    return round(float(value), digits)
+
+
+def compute_analytics(settlements: List[Dict[str, Any]], trades: List[Dict[str, Any]], initial_capital: float) -> Dict[str, Any]:
+    daily = _daily_settlements(settlements)
+    dates = [str(item.get('date'))[:10] for item in daily]
+    n_days = len(dates)
+    base = float(initial_capital or 0) or 1.0
+
+    equity = np.asarray([float(item.get('totalValue', 0) or 0) for item in daily], dtype=float)
+    prev_equity = np.concatenate(([base], equity[:-1])) if n_days else np.empty(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(prev_equity > 0, equity / prev_equity - 1.0, 0.0)
+
+    peak = np.maximum.accumulate(np.concatenate(([base], equity)))[1:] if n_days else np.empty(0)
+    drawdown = np.where(peak > 0, equity / peak - 1.0, 0.0) if n_days else np.empty(0)
+
+    # ---- 风险调整收益 ----
+    sharpe = sortino = 0.0
+    if n_days >= 2:
+        std = returns.std(ddof=1)
+        if std > 0:
+            sharpe = returns.mean() / std * math.sqrt(TRADING_DAYS_PER_YEAR)
+        downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+        if downside > 0:
+            sortino = returns.mean() / downside * math.sqrt(TRADING_DAYS_PER_YEAR)
+    active_days = returns[returns != 0]
+    daily_win_rate = float((active_days > 0).mean()) if active_days.size else 0.0
+    trade_pnls = _realized_trade_pnls(trades)
+    trade_win_rate = float((trade_pnls > 0).mean()) if trade_pnls.size else 0.0
+
+    # ---- 持仓价值矩阵：codes × days ----
+    codes = sorted({str(pos.get('code')) for item in daily for pos in item.get('positions') or [] if pos.get('code')}
+                   | {str(t.get('code')) for t in trades if t.get('code')})
+    code_index = {code: i for i, code in enumerate(codes)}
+    date_index = {day: j for j, day in enumerate(dates)}
+    values = np.zeros((len(codes), n_days))
+    flows = np.zeros((len(codes), n_days))
+    for j, item in enumerate(daily):
+        for pos in item.get('positions') or []:
+            i = code_index.get(str(pos.get('code')))
+            if i is not None:
+                values[i, j] = float(pos.get('value', 0) or 0)
+
+    traded_amount = 0.0
+    for item in trades:
+        amount = float(item.get('amount', 0) or 0)
+        traded_amount += amount
+        i = code_index.get(str(item.get('code') or ''))
+        j = date_index.get(str(item.get('date') or '')[:10])
+        if i is None or j is None:
+            continue
+        flows[i, j] += amount if item.get('action') == 'buy' else -amount
+
+    # 当日市值变动扣除当日净买入 = 当日持仓盈亏
+    prev_values = np.concatenate((np.zeros((len(codes), 1)), values[:, :-1]), axis=1) if n_days else values
+    code_pnl = (values - prev_values - flows).sum(axis=1) if n_days else np.zeros(len(codes))
+
+    code_sources = _code_sources(trades)
+    labels = np.asarray([
+        code_sources.get(code) if code_sources.get(code) in ATTRIBUTION_SOURCES else 'other'
+        for code in codes
+    ], dtype=object)
+    attribution: Dict[str, Dict[str, Any]] = {}
+    for source in ATTRIBUTION_SOURCES + ('other',):
+        mask = labels == source
+        pnl = float(code_pnl[mask].sum()) if mask.size else 0.0
+        attribution[source] = {
+            'pnl': _round(pnl, 2),
+            'contributionPct': _round(pnl / base * 100, 2),
+            'codes': [code for code, flag in zip(codes, mask) if flag],
+        }
+
+    avg_equity = float(equity.mean()) if n_days else base
+    turnover = traded_amount / avg_equity if avg_equity > 0 else 0.0
+    annual_turnover = turnover * TRADING_DAYS_PER_YEAR / n_days if n_days else 0.0
+    max_dd_idx = int(drawdown.argmin()) if n_days else -1
+
+    return {
+        'days': n_days,
+        'startDate': dates[0] if dates else '',
+        'endDate': dates[-1] if dates else '',
+        'initialCapital': _round(base, 2),
+        'finalValue': _round(float(equity[-1]) if n_days else base, 2),
+        'cumulativeReturnPct': _round(((equity[-1] / base - 1.0) * 100) if n_days else 0.0, 2),
+        'maxDrawdownPct': _round(float(drawdown.min()) * 100 if n_days else 0.0, 2),
+        'maxDrawdownDate': dates[max_dd_idx] if max_dd_idx >= 0 else '',
+        'sharpe': _round(sharpe, 3),
+        'sortino': _round(sortino, 3),
+        'dailyWinRate': _round(daily_win_rate * 100, 2),
+        'tradeWinRate': _round(trade_win_rate * 100, 2),
+        'closedTrades': int(trade_pnls.size),
+        'tradeCount': len(trades),
+        'tradedAmount': _round(traded_amount, 2),
+        'turnover': _round(turnover, 3),
+        'annualTurnover': _round(annual_turnover, 3),
+        'attribution': attribution,
+        'equityCurve': [
+            {
+                'date': day,
+                'value': _round(float(equity[j]), 2),
+                'returnPct': _round(float(returns[j]) * 100, 3),
+                'drawdownPct': _round(float(drawdown[j]) * 100, 3),
+            }
+            for j, day in enumerate(dates)
+        ],
+    }
@@ -14,6 +14,7 @@ import urllib.error
 import urllib.parse
 import urllib.request
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -26,6 +27,8 @@ from scripts.portfolio_advisor import (
     fetch_indices,
     load_portfolio_advice_cache,
 )
+from scripts.sim_analytics import compute_analytics
+from scripts.sim_journal import Journal
 from scripts.stock_screener import load_stock_screen_cache
 
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -35,6 +38,12 @@ TRADE_FILE = os.path.join(DATA_DIR, 'sim_auto_trade_log.json')
 SETTLE_FILE = os.path.join(DATA_DIR, 'sim_auto_settle_log.json')
 REVIEW_FILE = os.path.join(DATA_DIR, 'sim_auto_weekly_reviews.json')
 CONFIG_FILE = os.path.join(DATA_DIR, 'sim_auto_config.json')
+# 调仓提交前的预写记录：提交中途崩溃时据此补齐交易日志与持仓
+PENDING_COMMIT_FILE = os.path.join(DATA_DIR, 'sim_auto_pending_commit.json')
+# 追加式日志（JSONL）；上面三个 .json 仅作为旧版数据的迁移来源
+TRADE_JOURNAL = os.path.join(DATA_DIR, 'sim_auto_trade_log.jsonl')
+SETTLE_JOURNAL = os.path.join(DATA_DIR, 'sim_auto_settle_log.jsonl')
+REVIEW_JOURNAL = os.path.join(DATA_DIR, 'sim_auto_weekly_reviews.jsonl')
 INITIAL_CAPITAL = float(os.environ.get('SIM_AUTO_INITIAL_CAPITAL', 10000) or 10000)
 
 _HEADERS = {
@@ -184,6 +193,8 @@ def _write_json(path: str, payload: Any) -> None:
     try:
         with os.fdopen(fd, 'w', encoding='utf-8') as handle:
             json.dump(payload, handle, ensure_ascii=False, indent=2)
+            handle.flush()
+            os.fsync(handle.fileno())
         os.replace(tmp, path)
     except BaseException:
         try:
@@ -196,12 +207,16 @@ def _write_json(path: str, payload: Any) -> None:
 AUTO_TRADE_CONFIG = _load_auto_config()
 
 
+def _now() -> datetime:
+    return _providers['clock']()
+
+
 def today_str(now: Optional[datetime] = None) -> str:
-    return (now or datetime.now()).strftime('%Y-%m-%d')
+    return (now or _now()).strftime('%Y-%m-%d')
 
 
 def _iso_week_key(now: Optional[datetime] = None) -> str:
-    dt = now or datetime.now()
+    dt = now or _now()
     iso = dt.isocalendar()
     return '%04d-W%02d' % (iso[0], iso[1])
 
@@ -315,7 +330,7 @@ def fetch_stock_quote(code: str) -> Optional[Dict[str, Any]]:
             'nav': price,
             'estimate': price,
             'pct': float(data.get('f170', 0) or 0) / 100.0,
-            'time': datetime.now().isoformat(),
+            'time': _now().isoformat(),
             'prev_close': prev_close,
         }
     except Exception as exc:
@@ -323,14 +338,52 @@ def fetch_stock_quote(code: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+# 调仓前数据补齐：资金流按自然日缓存，同一天重复调用（提示词 / 兜底 / 仓位系数）只请求一次
+# 获取失败 / 为空只记 _FLOW_FAIL_TTL 秒，过后重新请求，一次偶发错误不会让当天的资金流补齐失效
+_ENRICH_MAX_WORKERS = int(os.environ.get('SIM_AUTO_ENRICH_WORKERS', 8) or 8)
+_FLOW_FAIL_TTL = float(os.environ.get('SIM_AUTO_FLOW_FAIL_TTL', 300) or 300)
+_capital_flow_cache: Dict[str, Any] = {'date': '', 'flows': {}, 'failed': {}}
+
+
+def _day_flow_cache() -> Dict[str, Dict[str, Any]]:
+    day = today_str()
+    if _capital_flow_cache['date'] != day:
+        _capital_flow_cache['date'] = day
+        _capital_flow_cache['flows'] = {}
+        _capital_flow_cache['failed'] = {}
+    return _capital_flow_cache['flows']
+
+
+def _flow_known(code: str) -> bool:
+    """当日已有资金流，或最近 _FLOW_FAIL_TTL 秒内刚失败过（暂不重试）。"""
+    if code in _day_flow_cache():
+        return True
+    failed_at = _capital_flow_cache['failed'].get(code)
+    return failed_at is not None and time.time() - failed_at < _FLOW_FAIL_TTL
+
+
+def _store_capital_flow(code: str, flow: Optional[Dict[str, Any]]) -> None:
+    if flow is None:
+        _capital_flow_cache['failed'][code] = time.time()
+    else:
+        _day_flow_cache()[code] = flow
+        _capital_flow_cache['failed'].pop(code, None)
+
+
+def _cached_capital_flow(code: str) -> Optional[Dict[str, Any]]:
+    if not _flow_known(code):
+        _store_capital_flow(code, _providers['capital_flow'](code))
+    return _day_flow_cache().get(code)
+
+
 def _default_portfolio() -> Dict[str, Any]:
     return {
         'mode': 'server_auto',
         'cash': round(INITIAL_CAPITAL, 2),
         'totalCash': round(INITIAL_CAPITAL, 2),
         'positions': [],
-        'createdAt': datetime.now().isoformat(),
-        'updatedAt': datetime.now().isoformat(),
+        'createdAt': _now().isoformat(),
+        'updatedAt': _now().isoformat(),
         'lastTradeDate': '',
         'lastTradeSummary': {},
         'lastReviewWeek': '',
@@ -351,31 +404,51 @@ def load_portfolio() -> Dict[str, Any]:
 
 
 def save_portfolio(portfolio: Dict[str, Any]) -> Dict[str, Any]:
-    portfolio['updatedAt'] = datetime.now().isoformat()
+    portfolio['updatedAt'] = _now().isoformat()
     _write_json(PORTFOLIO_FILE, portfolio)
     return portfolio
 
 
-def load_trade_log() -> List[Dict[str, Any]]:
-    data = _read_json(TRADE_FILE, [])
-    return data if isinstance(data, list) else []
+_trade_journal = Journal(TRADE_JOURNAL, legacy_path=TRADE_FILE)
+_settle_journal = Journal(SETTLE_JOURNAL, legacy_path=SETTLE_FILE)
+_review_journal = Journal(REVIEW_JOURNAL, legacy_path=REVIEW_FILE)
+
+
+def load_trade_log(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """交易记录，新 → 旧；limit 为空时返回完整历史。"""
+    if limit is None:
+        return _trade_journal.all()
+    return _trade_journal.latest(limit)
+
+
+def load_trades_between(start: str, end: str) -> List[Dict[str, Any]]:
+    """按日期区间（含端点）读取交易记录，新 → 旧。"""
+    return _trade_journal.by_date_range(start, end)
 
 
 def save_trade_log(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    _write_json(TRADE_FILE, items[:400])
+    _trade_journal.reset(reversed(items))
     return items
 
 
-def append_trade(entry: Dict[str, Any]) -> Dict[str, Any]:
-    log = load_trade_log()
+_last_entry_id = 0
+
+
+def _stamp_entry(entry: Dict[str, Any], with_time: bool = True) -> Dict[str, Any]:
+    """分配单调递增的毫秒 id；同一毫秒内的连续记录顺延 1。"""
+    global _last_entry_id
     payload = dict(entry)
-    payload['id'] = int(time.time() * 1000)
-    payload['time'] = datetime.now().isoformat()
-    log.insert(0, payload)
-    save_trade_log(log)
+    _last_entry_id = max(int(time.time() * 1000), _last_entry_id + 1)
+    payload['id'] = _last_entry_id
+    if with_time:
+        payload['time'] = _now().isoformat()
     return payload
 
 
+def append_trade(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return _trade_journal.append(_stamp_entry(entry))
+
+
 def _entry_sort_key(entry: Dict[str, Any]) -> Tuple[str, int]:
     timestamp = str(
         entry.get('createdAt')
@@ -391,7 +464,7 @@ def _entry_sort_key(entry: Dict[str, Any]) -> Tuple[str, int]:
     return (timestamp, entry_id)
 
 
-def _normalize_settle_log(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _normalize_settle_log(items: List[Dict[str, Any]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
     if not isinstance(items, list):
         return []
 
@@ -412,10 +485,10 @@ def _normalize_settle_log(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             continue
         seen_keys.add(dedupe_key)
         unique.append(item)
-    return unique[:104]
+    return unique if limit is None else unique[:limit]
 
 
-def _normalize_weekly_reviews(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _normalize_weekly_reviews(items: List[Dict[str, Any]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
     if not isinstance(items, list):
         return []
 
@@ -436,47 +509,49 @@ def _normalize_weekly_reviews(items: List[Dict[str, Any]]) -> List[Dict[str, Any
             continue
         seen_weeks.add(week_key)
         unique.append(item)
-    return unique[:52]
+    return unique if limit is None else unique[:limit]
+
 
+def _load_latest(journal: Journal, normalize, limit: Optional[int]) -> List[Dict[str, Any]]:
+    """给定 limit 时只归一化日志尾部；去重后不足 limit 条再成倍向前扩展，避免每次遍历全部历史。"""
+    if limit is None:
+        return normalize(journal.all())
+    total = journal.count()
+    window = max(limit * 2, 16)
+    while True:
+        items = normalize(journal.latest(window), limit)
+        if len(items) >= limit or window >= total:
+            return items
+        window *= 2
 
-def load_settle_log() -> List[Dict[str, Any]]:
-    data = _read_json(SETTLE_FILE, [])
-    return _normalize_settle_log(data)
+
+def load_settle_log(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """结算记录（同日/同周重复结算只保留最新一条），新 → 旧。"""
+    return _load_latest(_settle_journal, _normalize_settle_log, limit)
 
 
 def save_settle_log(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     normalized = _normalize_settle_log(items)
-    _write_json(SETTLE_FILE, normalized)
+    _settle_journal.reset(reversed(normalized))
     return normalized
 
 
 def append_settlement(entry: Dict[str, Any]) -> Dict[str, Any]:
-    log = load_settle_log()
-    payload = dict(entry)
-    payload['id'] = int(time.time() * 1000)
-    log.insert(0, payload)
-    save_settle_log(log)
-    return payload
+    return _settle_journal.append(_stamp_entry(entry, with_time=False))
 
 
-def load_weekly_reviews() -> List[Dict[str, Any]]:
-    data = _read_json(REVIEW_FILE, [])
-    return _normalize_weekly_reviews(data)
+def load_weekly_reviews(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    return _load_latest(_review_journal, _normalize_weekly_reviews, limit)
 
 
 def save_weekly_reviews(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     normalized = _normalize_weekly_reviews(items)
-    _write_json(REVIEW_FILE, normalized)
+    _review_journal.reset(reversed(normalized))
     return normalized
 
 
 def append_weekly_review(entry: Dict[str, Any]) -> Dict[str, Any]:
-    reviews = load_weekly_reviews()
-    payload = dict(entry)
-    payload['id'] = int(time.time() * 1000)
-    reviews.insert(0, payload)
-    save_weekly_reviews(reviews)
-    return payload
+    return _review_journal.append(_stamp_entry(entry, with_time=False))
 
 
 def reset_sim_auto_portfolio() -> Dict[str, Any]:
@@ -488,29 +563,33 @@ def reset_sim_auto_portfolio() -> Dict[str, Any]:
     return portfolio
 
 
-def _extract_hot_events() -> List[Dict[str, Any]]:
+def _load_hot_events_file() -> List[Dict[str, Any]]:
     hot_path = os.path.join(DATA_DIR, 'hot_events.json')
     data = _read_json(hot_path, {})
     events = data.get('events', []) if isinstance(data, dict) else []
     return events if isinstance(events, list) else []
 
 
+def _extract_hot_events() -> List[Dict[str, Any]]:
+    return _providers['hot_events']()
+
+
 def _extract_portfolio_fund_map() -> Dict[str, Dict[str, Any]]:
-    cache = load_portfolio_advice_cache() or {}
+    cache = _providers['portfolio_advice_cache']() or {}
     result = cache.get('result', {}) if isinstance(cache, dict) else {}
     funds = result.get('funds', []) if isinstance(result, dict) else []
     return {str(item.get('code')): item for item in funds if item.get('code')}
 
 
 def _extract_stock_screen_map() -> Dict[str, Dict[str, Any]]:
-    cache = load_stock_screen_cache() or {}
+    cache = _providers['stock_screen_cache']() or {}
     result = cache.get('result', {}) if isinstance(cache, dict) else {}
     picks = result.get('picks', []) if isinstance(result, dict) else []
     return {str(item.get('code')): item for item in picks if item.get('code')}
 
 
 def _extract_fund_pick_candidates() -> List[Dict[str, Any]]:
-    cache = load_fund_pick_cache() or {}
+    cache = _providers['fund_pick_cache']() or {}
     result = cache.get('result', {}) if isinstance(cache, dict) else {}
     fund_picks = result.get('fundPicks', []) if isinstance(result, dict) else []
     stock_picks = result.get('stockPicks', []) if isinstance(result, dict) else []
@@ -547,6 +626,10 @@ def _candidate_score(item: Dict[str, Any]) -> float:
 
 
 def _pick_trade_price(position_type: str, code: str) -> Optional[Dict[str, Any]]:
+    return _providers['quote'](position_type, code)
+
+
+def _fetch_live_price(position_type: str, code: str) -> Optional[Dict[str, Any]]:
     if position_type == 'stock':
         return fetch_stock_quote(code)
     return fetch_fund_estimate(code)
@@ -564,29 +647,36 @@ def _price_or_default(quote: Optional[Dict[str, Any]], position: Dict[str, Any])
     return float(position.get('lastNav') or position.get('costPrice') or 0)
 
 
-def _build_live_positions(portfolio: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], float]:
-    positions = portfolio.get('positions', []) or []
-    if not positions:
-        return [], round(float(portfolio.get('cash', 0) or 0), 2)
-
-    # 并发拉取行情
-    quotes: Dict[int, Optional[Dict[str, Any]]] = {}
-    with ThreadPoolExecutor(max_workers=min(6, len(positions))) as pool:
+def _fetch_quotes(items: List[Dict[str, Any]]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """并发拉取一组持仓/候选的行情，按代码返回。"""
+    targets: Dict[str, str] = {}
+    for item in items:
+        code = str(item.get('code', '') or '')
+        if code and code not in targets:
+            targets[code] = item.get('type', 'fund')
+    if not targets:
+        return {}
+    quotes: Dict[str, Optional[Dict[str, Any]]] = {}
+    with ThreadPoolExecutor(max_workers=min(6, len(targets))) as pool:
         futures = {
-            pool.submit(_pick_trade_price, pos.get('type', 'fund'), pos.get('code', '')): i
-            for i, pos in enumerate(positions)
+            pool.submit(_pick_trade_price, position_type, code): code
+            for code, position_type in targets.items()
         }
         for future in as_completed(futures):
-            idx = futures[future]
+            code = futures[future]
             try:
-                quotes[idx] = future.result()
+                quotes[code] = future.result()
             except Exception:
-                quotes[idx] = None
+                quotes[code] = None
+    return quotes
+
 
+def _value_positions(portfolio: Dict[str, Any], quotes: Dict[str, Optional[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], float]:
+    """用给定行情快照估值持仓（纯本地计算，不触网）。"""
     live_positions: List[Dict[str, Any]] = []
     total = float(portfolio.get('cash', 0) or 0)
-    for i, position in enumerate(positions):
-        quote = quotes.get(i)
+    for position in portfolio.get('positions', []) or []:
+        quote = quotes.get(str(position.get('code', '') or ''))
         price = _price_or_default(quote, position)
         value = _position_value(position, price)
         profit = value - float(position.get('costTotal', 0) or 0)
@@ -604,17 +694,24 @@ def _build_live_positions(portfolio: Dict[str, Any]) -> Tuple[List[Dict[str, Any
     return live_positions, round(total, 2)
 
 
+def _build_live_positions(portfolio: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], float]:
+    positions = portfolio.get('positions', []) or []
+    if not positions:
+        return [], round(float(portfolio.get('cash', 0) or 0), 2)
+    return _value_positions(portfolio, _fetch_quotes(positions))
+
+
 def _ensure_source_caches() -> None:
     # 自动模拟仓优先使用已有缓存，避免手动触发时阻塞在大任务上。
     # 正常 14:50 调度会先生成 fund_pick / portfolio_advice / stock_screen，
     # 14:55 再执行自动模拟仓调仓，
     # 此处只在缺少热点事件文件时补一次基础缓存。
-    load_fund_pick_cache()
-    load_stock_screen_cache()
-    load_portfolio_advice_cache()
+    _providers['fund_pick_cache']()
+    _providers['stock_screen_cache']()
+    _providers['portfolio_advice_cache']()
     hot_path = os.path.join(DATA_DIR, 'hot_events.json')
     if not os.path.exists(hot_path):
-        fetch_hot_events()
+        _providers['refresh_hot_events']()
 
 
 def _clamp(value: float, minimum: float, maximum: float) -> float:
@@ -697,7 +794,7 @@ def _candidate_buy_multiplier(candidate: Dict[str, Any], sell_result: Dict[str,
 
     # ---- 博弈面信号：买入候选的主力资金流向 ----
     if candidate.get('type') == 'stock':
-        flow = fetch_capital_flow(str(candidate.get('code', '')))
+        flow = _cached_capital_flow(str(candidate.get('code', '')))
         if flow:
             main_3d = flow.get('main_net_3d', 0)
             if main_3d > 0.5:  # 主力3日累计净流入 > 5000万
@@ -852,10 +949,11 @@ def _suggest_sell_pct(position: Dict[str, Any], suggestion: Dict[str, Any]) -> f
     return round(_clamp(base_pct, 10.0, 60.0), 2)
 
 
-def _apply_buy(portfolio: Dict[str, Any], candidate: Dict[str, Any], amount: float, reason: str, sizing_multiplier: Optional[float] = None, sizing_notes: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+def _apply_buy(portfolio: Dict[str, Any], candidate: Dict[str, Any], amount: float, reason: str, sizing_multiplier: Optional[float] = None, sizing_notes: Optional[List[str]] = None, quote: Optional[Dict[str, Any]] = None, record=append_trade) -> Optional[Dict[str, Any]]:
     if amount < 100:
         return None
-    quote = _pick_trade_price(candidate.get('type', 'fund'), candidate.get('code', ''))
+    if quote is None:
+        quote = _pick_trade_price(candidate.get('type', 'fund'), candidate.get('code', ''))
     if not quote:
         return None
     price = float(quote.get('estimate') or quote.get('nav') or 0)
@@ -890,7 +988,7 @@ def _apply_buy(portfolio: Dict[str, Any], candidate: Dict[str, Any], amount: flo
             'lastNavDate': today_str(),
         })
     portfolio['cash'] = round(float(portfolio.get('cash', 0) or 0) - amount, 2)
-    return append_trade({
+    return record({
         'date': today_str(),
         'action': 'buy',
         'code': candidate.get('code', ''),
@@ -907,9 +1005,10 @@ def _apply_buy(portfolio: Dict[str, Any], candidate: Dict[str, Any], amount: flo
     })
 
 
-def _apply_sell(portfolio: Dict[str, Any], position: Dict[str, Any], pct: float, reason: str, ai_source: str) -> Optional[Dict[str, Any]]:
+def _apply_sell(portfolio: Dict[str, Any], position: Dict[str, Any], pct: float, reason: str, ai_source: str, quote: Optional[Dict[str, Any]] = None, record=append_trade) -> Optional[Dict[str, Any]]:
     pct = max(1.0, min(100.0, float(pct or 0)))
-    quote = _pick_trade_price(position.get('type', 'fund'), position.get('code', ''))
+    if quote is None:
+        quote = _pick_trade_price(position.get('type', 'fund'), position.get('code', ''))
     price = _price_or_default(quote, position)
     if price <= 0:
         return None
@@ -932,7 +1031,7 @@ def _apply_sell(portfolio: Dict[str, Any], position: Dict[str, Any], pct: float,
             'lastNavDate': today_str(),
         }
     portfolio['cash'] = round(float(portfolio.get('cash', 0) or 0) + sell_amount, 2)
-    return append_trade({
+    return record({
         'date': today_str(),
         'action': 'sell',
         'code': position.get('code', ''),
@@ -947,6 +1046,135 @@ def _apply_sell(portfolio: Dict[str, Any], position: Dict[str, Any], pct: float,
     })
 
 
+class PortfolioEngine:
+    """单次调仓的内存账本。
+
+    - 运行开始时对持仓取一次行情快照，买入候选在首次用到时补进快照
+    - 买卖只修改内存中的 portfolio，估值用快照在本地重算
+    - commit() 先写预写记录，再一次性落盘交易日志 / 结算 / 持仓
+    """
+
+    def __init__(self, portfolio: Dict[str, Any], trade_day: str):
+        self.portfolio = portfolio
+        self.trade_day = trade_day
+        self.quotes: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.trades: List[Dict[str, Any]] = []
+
+    def snapshot(self, items: List[Dict[str, Any]]) -> None:
+        missing = [item for item in items if str(item.get('code', '') or '') not in self.quotes]
+        self.quotes.update(_fetch_quotes(missing))
+
+    def quote(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self.snapshot([item])
+        return self.quotes.get(str(item.get('code', '') or ''))
+
+    def valuation(self) -> Tuple[List[Dict[str, Any]], float]:
+        return _value_positions(self.portfolio, self.quotes)
+
+    def _stage(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        payload = _stamp_entry(entry)
+        self.trades.append(payload)
+        return payload
+
+    def buy(self, candidate: Dict[str, Any], amount: float, reason: str, sizing_multiplier: Optional[float] = None, sizing_notes: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        return _apply_buy(
+            self.portfolio, candidate, amount, reason,
+            sizing_multiplier=sizing_multiplier, sizing_notes=sizing_notes,
+            quote=self.quote(candidate) or {}, record=self._stage,
+        )
+
+    def sell(self, position: Dict[str, Any], pct: float, reason: str, ai_source: str) -> Optional[Dict[str, Any]]:
+        # 行情缺失时 _apply_sell 会回退到 lastNav / costPrice，这里传空 dict 避免再次触网
+        return _apply_sell(
+            self.portfolio, position, pct, reason, ai_source,
+            quote=self.quote(position) or {}, record=self._stage,
+        )
+
+    def commit(self, settlement: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.portfolio['updatedAt'] = _now().isoformat()
+        pending = {
+            'date': self.trade_day,
+            'portfolio': self.portfolio,
+            'trades': self.trades,
+            'settlement': _stamp_entry(settlement, with_time=False) if settlement else None,
+        }
+        _write_json(PENDING_COMMIT_FILE, pending)
+        _apply_pending_commit(pending)
+        return pending
+
+
+def _apply_pending_commit(pending: Dict[str, Any]) -> None:
+    """按 id 幂等地把预写记录落盘，然后删除预写文件。"""
+    trades = [item for item in pending.get('trades') or [] if isinstance(item, dict)]
+    recorded = {
+        item.get('id')
+        for day in {str(trade.get('date') or '') for trade in trades}
+        for item in _trade_journal.by_date(day)
+    }
+    for item in trades:
+        if item.get('id') not in recorded:
+            _trade_journal.append(item)
+    settlement = pending.get('settlement')
+    if isinstance(settlement, dict):
+        recorded = {item.get('id') for item in _settle_journal.by_date(str(settlement.get('date') or ''))}
+        if settlement.get('id') not in recorded:
+            _settle_journal.append(settlement)
+    if isinstance(pending.get('portfolio'), dict):
+        _write_json(PORTFOLIO_FILE, pending['portfolio'])
+    try:
+        os.unlink(PENDING_COMMIT_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def _recover_pending_commit() -> bool:
+    pending = _read_json(PENDING_COMMIT_FILE, None)
+    if not isinstance(pending, dict):
+        return False
+    print('[sim_auto] 发现未完成的调仓提交 (%s)，补齐落盘' % pending.get('date', ''))
+    _apply_pending_commit(pending)
+    return True
+
+
+def _prefetch_enrichment(engine: PortfolioEngine, items: List[Dict[str, Any]]) -> None:
+    """AI 调用前的数据补齐：持仓与候选按代码去重，行情与股票资金流放进同一个有界线程池并发拉取。
+
+    行情写入 engine 的快照，资金流写入当日缓存；已有的直接跳过。
+    """
+    quote_targets: Dict[str, str] = {}
+    flow_targets: List[str] = []
+    for item in items:
+        code = str(item.get('code', '') or '').strip()
+        if not code:
+            continue
+        position_type = item.get('type', 'fund')
+        if code not in engine.quotes and code not in quote_targets:
+            quote_targets[code] = position_type
+        if position_type == 'stock' and not _flow_known(code) and code not in flow_targets:
+            flow_targets.append(code)
+    jobs = len(quote_targets) + len(flow_targets)
+    if not jobs:
+        return
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=min(_ENRICH_MAX_WORKERS, jobs)) as pool:
+        futures = {
+            pool.submit(_pick_trade_price, position_type, code): ('quote', code)
+            for code, position_type in quote_targets.items()
+        }
+        futures.update({pool.submit(_providers['capital_flow'], code): ('flow', code) for code in flow_targets})
+        for future in as_completed(futures):
+            kind, code = futures[future]
+            try:
+                result = future.result()
+            except Exception:
+                result = None
+            if kind == 'quote':
+                engine.quotes[code] = result
+            else:
+                _store_capital_flow(code, result)
+    print('[sim_auto] 数据补齐: 行情 %d / 资金流 %d，耗时 %.1fs' % (len(quote_targets), len(flow_targets), time.time() - started))
+
+
 # AI 调用状态追踪
 _ai_call_status: Dict[str, Any] = {'last': 'unknown', 'okAt': '', 'failAt': '', 'error': ''}
 
@@ -964,6 +1192,10 @@ def _detect_ai_base(model: str) -> str:
 
 
 def _call_ai_json(system_prompt: str, user_prompt: str, temperature: float = 0.4) -> Optional[Dict[str, Any]]:
+    return _providers['ai'](system_prompt, user_prompt, temperature)
+
+
+def _request_ai_json(system_prompt: str, user_prompt: str, temperature: float = 0.4) -> Optional[Dict[str, Any]]:
     api_key = str(env('AI_API_KEY', '') or os.environ.get('AI_API_KEY', '') or '').strip()
     if not api_key:
         return None
@@ -997,15 +1229,15 @@ def _call_ai_json(system_prompt: str, user_prompt: str, temperature: float = 0.4
         parsed = json.loads(content)
         if isinstance(parsed, dict):
             _ai_call_status['last'] = 'ok'
-            _ai_call_status['okAt'] = datetime.now().isoformat()
+            _ai_call_status['okAt'] = _now().isoformat()
             return parsed
         _ai_call_status['last'] = 'invalid_response'
-        _ai_call_status['failAt'] = datetime.now().isoformat()
+        _ai_call_status['failAt'] = _now().isoformat()
         return None
     except Exception as exc:
         print('[sim_auto] AI 调用失败: %s' % exc)
         _ai_call_status['last'] = 'error'
-        _ai_call_status['failAt'] = datetime.now().isoformat()
+        _ai_call_status['failAt'] = _now().isoformat()
         _ai_call_status['error'] = str(exc)[:200]
         return None
 
@@ -1046,37 +1278,25 @@ def _build_sell_prompt(positions: List[Dict[str, Any]], fund_map: Dict[str, Dict
 
     # ---- 博弈面数据：主力资金流向 ----
     flow_lines = []
-    stock_positions = [p for p in positions if p.get('type') == 'stock']
-    if stock_positions:
-        flow_map: Dict[str, Optional[Dict[str, Any]]] = {}
-        with ThreadPoolExecutor(max_workers=min(4, len(stock_positions))) as pool:
-            futures = {
-                pool.submit(fetch_capital_flow, str(p.get('code', ''))): str(p.get('code', ''))
-                for p in stock_positions
-            }
-            for future in as_completed(futures):
-                code = futures[future]
-                try:
-                    flow_map[code] = future.result()
-                except Exception:
-                    flow_map[code] = None
-        for pos in stock_positions:
-            code = str(pos.get('code', ''))
-            flow = flow_map.get(code)
-            if flow:
-                flow_lines.append(
-                    '- {name}({code}): 主力3日净流入{main_3d:+.2f}亿, '
-                    '今日主力{main_today:+.2f}亿, '
-                    '散户3日{retail_3d:+.2f}亿, '
-                    '方向:{direction}'.format(
-                        name=pos.get('name', ''),
-                        code=code,
-                        main_3d=flow['main_net_3d'],
-                        main_today=flow['main_today'],
-                        retail_3d=flow['retail_net_3d'],
-                        direction='主力流入' if flow['main_direction'] == 'inflow' else '主力流出',
-                    )
+    for pos in positions:
+        if pos.get('type') != 'stock':
+            continue
+        code = str(pos.get('code', ''))
+        flow = _cached_capital_flow(code)
+        if flow:
+            flow_lines.append(
+                '- {name}({code}): 主力3日净流入{main_3d:+.2f}亿, '
+                '今日主力{main_today:+.2f}亿, '
+                '散户3日{retail_3d:+.2f}亿, '
+                '方向:{direction}'.format(
+                    name=pos.get('name', ''),
+                    code=code,
+                    main_3d=flow['main_net_3d'],
+                    main_today=flow['main_today'],
+                    retail_3d=flow['retail_net_3d'],
+                    direction='主力流入' if flow['main_direction'] == 'inflow' else '主力流出',
                 )
+            )
     if flow_lines:
         lines.append('\n## 博弈面·主力资金流向')
         lines.extend(flow_lines)
@@ -1133,7 +1353,7 @@ def _fallback_sell_advice(positions: List[Dict[str, Any]], fund_map: Dict[str, D
             continue
         # ---- 博弈面兜底：主力资金持续外逃 ----
         if item.get('type') == 'stock':
-            flow = fetch_capital_flow(code)
+            flow = _cached_capital_flow(code)
             if flow and flow.get('main_net_3d', 0) < -0.5:
                 # 主力3日累计净流出 > 5000万，主动减仓
                 pct = round(_clamp(20 + abs(flow['main_net_3d']) * 5, 15.0, 40.0), 2)
@@ -1162,8 +1382,16 @@ def _get_sell_decisions(portfolio: Dict[str, Any], live_positions: List[Dict[str
     return _fallback_sell_advice(live_positions, fund_map, stock_map)
 
 
-def _select_buy_candidates(portfolio: Dict[str, Any], live_positions: List[Dict[str, Any]], total_value: float) -> List[Dict[str, Any]]:
-    candidates = _extract_fund_pick_candidates()
+def _eligible_candidates(candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        item for item in candidates
+        if _candidate_score(item) >= (AUTO_TRADE_CONFIG['stockMinScore'] if item.get('type') == 'stock' else AUTO_TRADE_CONFIG['fundMinScore'])
+    ]
+
+
+def _select_buy_candidates(portfolio: Dict[str, Any], live_positions: List[Dict[str, Any]], total_value: float, candidates: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    if candidates is None:
+        candidates = _extract_fund_pick_candidates()
     if not candidates:
         return []
     current_weights = {}
@@ -1215,19 +1443,23 @@ def _select_buy_candidates(portfolio: Dict[str, Any], live_positions: List[Dict[
 
 
 def run_auto_trade(now: Optional[datetime] = None, force: bool = False) -> Dict[str, Any]:
-    current = now or datetime.now()
+    current = now or _now()
     if not force:
         if not is_trading_day(current.date()):
             return {'status': 'skipped', 'reason': 'non_trading_day'}
         if current.hour < 14 or (current.hour == 14 and current.minute < 55) or current.hour >= 16:
             return {'status': 'skipped', 'reason': 'outside_trade_window'}
     _ensure_source_caches()
+    _recover_pending_commit()
     portfolio = load_portfolio()
     trade_day = today_str(current)
     if not force and portfolio.get('lastTradeDate') == trade_day:
         return {'status': 'skipped', 'reason': 'already_traded_today'}
 
-    live_positions, total_value = _build_live_positions(portfolio)
+    engine = PortfolioEngine(portfolio, trade_day)
+    candidate_pool = _extract_fund_pick_candidates()
+    _prefetch_enrichment(engine, list(portfolio.get('positions', []) or []) + _eligible_candidates(candidate_pool))
+    live_positions, total_value = engine.valuation()
     sell_result = _get_sell_decisions(portfolio, live_positions)
     executed_sells = []
     for item in sell_result.get('sellAdvice', []) or []:
@@ -1241,27 +1473,25 @@ def run_auto_trade(now: Optional[datetime] = None, force: bool = False) -> Dict[
         pct = _suggest_sell_pct(position, item)
         if pct <= 0:
             continue
-        trade = _apply_sell(portfolio, position, pct, item.get('reason', '自动减仓'), 'auto_sell_ai')
+        trade = engine.sell(position, pct, item.get('reason', '自动减仓'), 'auto_sell_ai')
         if trade:
             executed_sells.append(trade)
-            save_portfolio(portfolio)
 
-    live_positions, total_value = _build_live_positions(portfolio)
-    buy_candidates = _select_buy_candidates(portfolio, live_positions, total_value)
+    live_positions, total_value = engine.valuation()
+    buy_candidates = _select_buy_candidates(portfolio, live_positions, total_value, candidate_pool)
+    engine.snapshot(buy_candidates)
     executed_buys = []
     for item in buy_candidates:
-        live_positions, total_value = _build_live_positions(portfolio)
         amount, sizing_multiplier, sizing_notes = _suggest_buy_amount(item, portfolio, live_positions, total_value, sell_result)
         if amount < 100:
             continue
         reason_core = item.get('reason') or item.get('advice') or item.get('planNote') or '高分候选标的'
         score_detail = item.get('scoreDetail', '')
         reason = '自动加仓: %s%s；仓位依据: %s' % (reason_core, score_detail, '，'.join(sizing_notes[:4]))
-        trade = _apply_buy(portfolio, item, amount, reason, sizing_multiplier=sizing_multiplier, sizing_notes=sizing_notes)
+        trade = engine.buy(item, amount, reason, sizing_multiplier=sizing_multiplier, sizing_notes=sizing_notes)
         if trade:
             executed_buys.append(trade)
-            save_portfolio(portfolio)
-            live_positions, total_value = _build_live_positions(portfolio)
+            live_positions, total_value = engine.valuation()
 
     portfolio['lastTradeDate'] = trade_day
     portfolio['lastTradeSummary'] = {
@@ -1271,17 +1501,16 @@ def run_auto_trade(now: Optional[datetime] = None, force: bool = False) -> Dict[
         'overview': sell_result.get('overview', ''),
         'riskAlert': sell_result.get('riskAlert', ''),
     }
-    save_portfolio(portfolio)
 
-    # ---- 每日结算快照（供收益日历展示） ----
-    live_positions, total_value = _build_live_positions(portfolio)
+    # ---- 每日结算快照（供收益日历展示），与交易一起提交 ----
+    live_positions, total_value = engine.valuation()
     position_value = round(total_value - float(portfolio.get('cash', 0) or 0), 2)
     settle_log = load_settle_log()
     prev_settle = next((s for s in settle_log if str(s.get('date', '')) < trade_day), None)
     prev_value = float(prev_settle.get('totalValue', portfolio.get('totalCash', INITIAL_CAPITAL)) if prev_settle else portfolio.get('totalCash', INITIAL_CAPITAL))
     daily_pnl = total_value - prev_value
     daily_pct = (daily_pnl / prev_value * 100) if prev_value else 0
-    append_settlement({
+    engine.commit({
         'date': trade_day,
         'kind': 'daily',
         'cash': round(float(portfolio.get('cash', 0) or 0), 2),
@@ -1423,12 +1652,13 @@ def _build_weekly_attribution(latest_review: Optional[Dict[str, Any]], latest_se
 
 
 def run_weekly_review(now: Optional[datetime] = None, force: bool = False) -> Dict[str, Any]:
-    current = now or datetime.now()
+    current = now or _now()
     if not force:
         if current.weekday() != 4:
             return {'status': 'skipped', 'reason': 'not_friday'}
         if current.hour < 15 or (current.hour == 15 and current.minute < 10):
             return {'status': 'skipped', 'reason': 'before_1510'}
+    _recover_pending_commit()
     portfolio = load_portfolio()
     week_key = _iso_week_key(current)
     if not force and portfolio.get('lastReviewWeek') == week_key:
@@ -1436,7 +1666,7 @@ def run_weekly_review(now: Optional[datetime] = None, force: bool = False) -> Di
 
     live_positions, total_value = _build_live_positions(portfolio)
     position_value = round(total_value - float(portfolio.get('cash', 0) or 0), 2)
-    settle_log = load_settle_log()
+    settle_log = load_settle_log(1)
     prev = settle_log[0] if settle_log else None
     start_value = float(prev.get('totalValue', portfolio.get('totalCash', INITIAL_CAPITAL)) if prev else portfolio.get('totalCash', INITIAL_CAPITAL))
     week_pnl = total_value - start_value
@@ -1462,7 +1692,7 @@ def run_weekly_review(now: Optional[datetime] = None, force: bool = False) -> Di
 
     week_end = today_str(current)
     week_start = (current - timedelta(days=4)).strftime('%Y-%m-%d')
-    trades = [_normalize_trade_entry(item, portfolio.get('totalCash', INITIAL_CAPITAL)) for item in load_trade_log() if week_start <= str(item.get('date', '')) <= week_end]
+    trades = [_normalize_trade_entry(item, portfolio.get('totalCash', INITIAL_CAPITAL)) for item in load_trades_between(week_start, week_end)]
     review = _call_ai_json(REVIEW_SYSTEM_PROMPT, _build_review_prompt(trades, week_start, week_end, start_value, total_value), temperature=0.45)
     if not review:
         review = _build_review_fallback(trades, start_value, total_value, week_start, week_end)
@@ -1477,7 +1707,7 @@ def run_weekly_review(now: Optional[datetime] = None, force: bool = False) -> Di
         'aiReview': review,
         'trades': trades,
         'settlement': settlement,
-        'createdAt': datetime.now().isoformat(),
+        'createdAt': _now().isoformat(),
     })
     portfolio['lastReviewWeek'] = week_key
     save_portfolio(portfolio)
@@ -1488,12 +1718,30 @@ def run_weekly_review(now: Optional[datetime] = None, force: bool = False) -> Di
     }
 
 
+# 绩效分析缓存：结算/交易日志版本不变时直接复用
+_analytics_cache: Dict[str, Any] = {'version': None, 'payload': None}
+
+
+def get_analytics_payload() -> Dict[str, Any]:
+    version = (_settle_journal.version(), _trade_journal.version())
+    if _analytics_cache['version'] != version:
+        portfolio = load_portfolio()
+        initial = float(portfolio.get('totalCash', INITIAL_CAPITAL) or INITIAL_CAPITAL)
+        _analytics_cache['payload'] = compute_analytics(load_settle_log(), load_trade_log(), initial)
+        _analytics_cache['version'] = version
+    return {
+        'status': 'ok',
+        'mode': 'server_auto',
+        'analytics': _analytics_cache['payload'],
+    }
+
+
 def get_status_payload() -> Dict[str, Any]:
     portfolio = load_portfolio()
     live_positions, total_value = _build_live_positions(portfolio)
     total_cash = float(portfolio.get('totalCash', INITIAL_CAPITAL) or INITIAL_CAPITAL)
     total_return = ((total_value - total_cash) / total_cash * 100) if total_cash else 0
-    raw_settle = load_settle_log()[:20]
+    raw_settle = load_settle_log(20)
     # 统一 settleLog 输出字段名：pnl / pct
     latest_settle = []
     for _se in raw_settle:
@@ -1501,9 +1749,9 @@ def get_status_payload() -> Dict[str, Any]:
         se['pnl'] = se.get('dailyPnl') if se.get('dailyPnl') is not None else se.get('weekPnl', 0)
         se['pct'] = se.get('dailyPct') if se.get('dailyPct') is not None else se.get('weekPct', 0)
         latest_settle.append(se)
-    raw_latest_reviews = load_weekly_reviews()[:12]
+    raw_latest_reviews = load_weekly_reviews(12)
     week_key_now = _iso_week_key()
-    all_trades_raw = [_normalize_trade_entry(item, total_cash) for item in load_trade_log()[:80]]
+    all_trades_raw = [_normalize_trade_entry(item, total_cash) for item in load_trade_log(80)]
     latest_trades = _compact_trade_entries(all_trades_raw)
 
     latest_reviews = []
@@ -1520,9 +1768,9 @@ def get_status_payload() -> Dict[str, Any]:
         raw_weekly_trades = [_normalize_trade_entry(item, total_cash) for item in list((latest_review_raw or {}).get('trades', []) if isinstance(latest_review_raw, dict) else [])[:20]]
     else:
         # 本周尚无周复盘，从 trade log 中筛选本周所有交易
-        now = datetime.now()
+        now = _now()
         week_monday = (now - timedelta(days=now.weekday())).strftime('%Y-%m-%d')
-        raw_weekly_trades = [_normalize_trade_entry(item, total_cash) for item in load_trade_log()[:200] if str(item.get('date', '') or '') >= week_monday]
+        raw_weekly_trades = [_normalize_trade_entry(item, total_cash) for item in load_trades_between(week_monday, today_str(now))]
     weekly_trades = _compact_trade_entries(raw_weekly_trades)
     weekly_attribution = _build_weekly_attribution(latest_review_raw if latest_review_week == week_key_now else None, latest_settle[0] if latest_settle else None, raw_weekly_trades)
     return {
@@ -1549,6 +1797,68 @@ def get_status_payload() -> Dict[str, Any]:
     }
 
 
+# ==================== 外部依赖注入（回放 / 压测） ====================
+
+_LIVE_PROVIDERS: Dict[str, Any] = {
+    'clock': datetime.now,
+    'quote': _fetch_live_price,
+    'capital_flow': fetch_capital_flow,
+    'ai': _request_ai_json,
+    'fund_pick_cache': load_fund_pick_cache,
+    'stock_screen_cache': load_stock_screen_cache,
+    'portfolio_advice_cache': load_portfolio_advice_cache,
+    'hot_events': _load_hot_events_file,
+    'refresh_hot_events': fetch_hot_events,
+}
+_providers: Dict[str, Any] = dict(_LIVE_PROVIDERS)
+
+_DATA_PATH_NAMES = (
+    'DATA_DIR', 'PORTFOLIO_FILE', 'TRADE_FILE', 'SETTLE_FILE', 'REVIEW_FILE', 'CONFIG_FILE',
+    'PENDING_COMMIT_FILE', 'TRADE_JOURNAL', 'SETTLE_JOURNAL', 'REVIEW_JOURNAL',
+    '_trade_journal', '_settle_journal', '_review_journal',
+)
+
+
+@contextmanager
+def sandbox(data_dir: str, **providers: Any):
+    """临时把数据目录与外部依赖（行情 / 资金流 / AI / 各类缓存 / 时钟）替换为注入实现。
+
+    退出时恢复原状态。仅供离线回放与压测使用，期间不要与定时任务并发。
+    """
+    global _trade_journal, _settle_journal, _review_journal
+    unknown = set(providers) - set(_LIVE_PROVIDERS)
+    if unknown:
+        raise ValueError('unknown providers: %s' % ', '.join(sorted(unknown)))
+    module_globals = globals()
+    saved_paths = {name: module_globals[name] for name in _DATA_PATH_NAMES}
+    saved_providers = dict(_providers)
+    saved_config = dict(AUTO_TRADE_CONFIG)
+    saved_flows = dict(_capital_flow_cache)
+    saved_analytics = dict(_analytics_cache)
+
+    os.makedirs(data_dir, exist_ok=True)
+    for name in ('PORTFOLIO_FILE', 'TRADE_FILE', 'SETTLE_FILE', 'REVIEW_FILE', 'CONFIG_FILE',
+                 'PENDING_COMMIT_FILE', 'TRADE_JOURNAL', 'SETTLE_JOURNAL', 'REVIEW_JOURNAL'):
+        module_globals[name] = os.path.join(data_dir, os.path.basename(saved_paths[name]))
+    module_globals['DATA_DIR'] = data_dir
+    _trade_journal = Journal(TRADE_JOURNAL)
+    _settle_journal = Journal(SETTLE_JOURNAL)
+    _review_journal = Journal(REVIEW_JOURNAL)
+    _providers.update(providers)
+    _capital_flow_cache.update({'date': '', 'flows': {}, 'failed': {}})
+    _analytics_cache.update({'version': None, 'payload': None})
+    try:
+        yield
+    finally:
+        module_globals.update(saved_paths)
+        _providers.clear()
+        _providers.update(saved_providers)
+        AUTO_TRADE_CONFIG.clear()
+        AUTO_TRADE_CONFIG.update(saved_config)
+        _capital_flow_cache.update(saved_flows)
+        _analytics_cache.update(saved_analytics)
+
+
 if __name__ == '__main__':
     try:
         print(json.dumps(run_auto_trade(force=True), ensure_ascii=False, indent=2))
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""自动模拟仓追加式日志（JSONL）。
+
+每条交易 / 结算 / 周复盘记录占一行，只追加不重写：
+- 写入 O(1)，不再截断历史，完整记录可用于收益归因
+- 每行写完即 fsync，进程中途崩溃最多丢最后一行（读取时跳过半行）
+- 内存中维护按日期 / ISO 周的索引，读取时按文件偏移增量同步，
+  多个 gunicorn worker 共享同一文件也能看到彼此的写入
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def _week_key_for_date(date_text: str) -> str:
+    try:
+        iso = datetime.strptime(date_text[:10], '%Y-%m-%d').isocalendar()
+    except Exception:
+        return ''
+    return '%04d-W%02d' % (iso[0], iso[1])
+
+
+class Journal:
+    """单个 JSONL 日志文件 + 内存索引。
+
+    entries 按写入顺序（旧 → 新）保存；latest() 返回新 → 旧的视图，
+    与旧版 JSON 数组的排列顺序一致。
+    """
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.RLock()
+        self._entries: List[Dict[str, Any]] = []
+        self._by_date: Dict[str, List[int]] = {}
+        self._by_week: Dict[str, List[int]] = {}
+        self._offset = 0
+        self._inode: Optional[int] = None
+
+    # ---- 内部 ----
+    def _reset_index(self) -> None:
+        self._entries = []
+        self._by_date = {}
+        self._by_week = {}
+        self._offset = 0
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        idx = len(self._entries)
+        self._entries.append(entry)
+        date_text = str(entry.get('date') or '')[:10]
+        if date_text:
+            self._by_date.setdefault(date_text, []).append(idx)
+        week_key = str(entry.get('week') or '') or _week_key_for_date(date_text)
+        if week_key:
+            self._by_week.setdefault(week_key, []).append(idx)
+
+    def _migrate_legacy(self) -> None:
+        """首次使用时把旧版 JSON 数组（新 → 旧）导入为 JSONL（旧 → 新）。"""
+        if not self.legacy_path or os.path.exists(self.path) or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as handle:
+                legacy = json.load(handle)
+        except Exception:
+            return
+        if not isinstance(legacy, list):
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as handle:
+            for item in reversed(legacy):
+                if isinstance(item, dict):
+                    handle.write(json.dumps(item, ensure_ascii=False) + '\n')
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, self.path)
+        print('[sim_journal] 已迁移 %s → %s (%d 条)' % (
+            os.path.basename(self.legacy_path), os.path.basename(self.path), len(legacy)))
+
+    def _sync(self) -> None:
+        """增量读取其他进程追加的新行；文件被重置/替换时整体重建索引。"""
+        self._migrate_legacy()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._entries or self._offset:
+                self._reset_index()
+            self._inode = None
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset_index()
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, 'rb') as handle:
+            handle.seek(self._offset)
+            chunk = handle.read()
+        # 只消费完整行，末尾半行（正在写入或崩溃残留）留待下次
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return
+        for raw in chunk[:end].split(b'\n'):
+            if not raw.strip():
+                continue
+            try:
+                entry = json.loads(raw.decode('utf-8'))
+            except Exception:
+                continue
+            if isinstance(entry, dict):
+                self._index(entry)
+        self._offset += end + 1
+
+    # ---- 写入 ----
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            self._sync()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                if size > 0:
+                    with open(self.path, 'rb') as handle:
+                        handle.seek(size - 1)
+                        if handle.read(1) != b'\n':
+                            # 上次崩溃留下的半行：先补换行，避免与新记录粘连
+                            line = b'\n' + line
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._sync()
+        return entry
+
+    def reset(self, entries: Iterable[Dict[str, Any]] = ()) -> None:
+        """原子替换整个日志（仅用于重置模拟仓）。"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as handle:
+                for item in entries:
+                    handle.write(json.dumps(item, ensure_ascii=False) + '\n')
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp, self.path)
+            self._reset_index()
+            self._inode = None
+            self._sync()
+
+    # ---- 读取 ----
+    def version(self) -> tuple:
+        """文件身份 + 已同步偏移；任何追加或重置都会改变它，可作为派生结果的缓存键。"""
+        with self._lock:
+            self._sync()
+            return (self._inode, self._offset)
+
+    def count(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._entries)
+
+    def all(self) -> List[Dict[str, Any]]:
+        """全部历史，新 → 旧。"""
+        with self._lock:
+            self._sync()
+            return [dict(item) for item in reversed(self._entries)]
+
+    def latest(self, limit: int) -> List[Dict[str, Any]]:
+        """最近 limit 条，新 → 旧。"""
+        with self._lock:
+            self._sync()
+            if limit <= 0:
+                return []
+            return [dict(item) for item in reversed(self._entries[-limit:])]
+
+    def by_date(self, date_text: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._sync()
+            return [dict(self._entries[i]) for i in reversed(self._by_date.get(date_text, []))]
+
+    def by_date_range(self, start: str, end: str) -> List[Dict[str, Any]]:
+        """start <= date <= end（含端点），新 → 旧。"""
+        with self._lock:
+            self._sync()
+            indexes = [
+                i
+                for day, idxs in self._by_date.items()
+                if start <= day <= end
+                for i in idxs
+            ]
+            return [dict(self._entries[i]) for i in sorted(indexes, reverse=True)]
+
+    def by_week(self, week_key: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._sync()
+            return [dict(self._entries[i]) for i in reversed(self._by_week.get(week_key, []))]
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+自动模拟仓离线回放 / 压测
+
+在临时数据目录里逐日调用 run_auto_trade（周五加跑 run_weekly_review），
+行情、资金流、fund_pick / stock_screen / 行动指南缓存、热点事件和 AI 回复
+全部来自录制文件或按种子生成的合成数据，不触网、不改动 data/。
+
+用法:
+  # 合成 250 个交易日（固定种子，可复现）
+  python -m scripts.sim_replay --days 250 --seed 7
+
+  # 回放录制文件，并覆盖仓位参数做对比
+  python -m scripts.sim_replay --recording rec.json --config '{"targetBuyPct": 0.15}'
+
+  # 把合成场景保存为录制文件
+  python -m scripts.sim_replay --days 120 --save-recording rec.json
+
+录制文件格式:
+  {"days": [{"date": "2026-03-02",
+             "quotes": {"600519": {"nav": 1500.0, "pct": 0.8}},
+             "capitalFlow": {"600519": {"main_net_3d": 0.3, ...}},
+             "fundPick": {...}, "stockScreen": {...}, "portfolioAdvice": {...},
+             "hotEvents": [...],
+             "ai": {"sell": {...} | null, "review": {...} | null}}]}
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from scripts import sim_auto_trader as trader
+from scripts.sim_analytics import compute_analytics
+
+
+# ==================== 合成场景 ====================
+
+def _trading_days(start, count):
+    day = start
+    days = []
+    while len(days) < count:
+        if trader.is_trading_day(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def build_synthetic_recording(days=250, seed=7, funds=8, stocks=12, start='2025-01-02'):
+    """几何布朗运动行情 + 随机候选池 + 规则化 AI 回复（约三成交易日 AI 不可用，走规则兜底）。"""
+    rng = random.Random(seed)
+    universe = (
+        [{'code': '%06d' % (110000 + i), 'name': '合成基金%d' % i, 'type': 'fund', 'nav': 1.0 + rng.random()} for i in range(funds)]
+        + [{'code': '%06d' % (600000 + i), 'name': '合成股票%d' % i, 'type': 'stock', 'nav': 10.0 + rng.random() * 40} for i in range(stocks)]
+    )
+    for item in universe:
+        item['drift'] = rng.gauss(0.0003, 0.0008)
+        item['vol'] = 0.008 if item['type'] == 'fund' else 0.022
+
+    recorded = []
+    for day in _trading_days(datetime.strptime(start, '%Y-%m-%d').date(), days):
+        quotes, flows = {}, {}
+        for item in universe:
+            ret = item['drift'] + item['vol'] * rng.gauss(0, 1)
+            item['nav'] = round(item['nav'] * math.exp(ret), 4)
+            quotes[item['code']] = {'nav': item['nav'], 'pct': round(ret * 100, 2)}
+            if item['type'] == 'stock':
+                main_3d = round(rng.gauss(0, 0.5), 2)
+                flows[item['code']] = {
+                    'main_net_3d': main_3d,
+                    'retail_net_3d': round(-main_3d * 0.6, 2),
+                    'main_today': round(main_3d / 3, 2),
+                    'main_direction': 'inflow' if main_3d > 0 else 'outflow',
+                    'days': 3,
+                }
+
+        fund_picks = [
+            {'code': f['code'], 'name': f['name'], 'confidence': rng.randint(55, 92), 'reason': '合成候选'}
+            for f in rng.sample([u for u in universe if u['type'] == 'fund'], 3)
+        ]
+        screen_picks = [
+            {'code': s['code'], 'name': s['name'], 'score': rng.randint(60, 90),
+             'rrRatio': round(rng.uniform(1.0, 2.4), 2), 'stopLoss': round(s['nav'] * 0.93, 2),
+             'riskLevel': rng.choice(['低', '中', '高']), 'reason': '合成形态'}
+            for s in rng.sample([u for u in universe if u['type'] == 'stock'], 4)
+        ]
+
+        sell = None
+        if rng.random() > 0.3:
+            held = rng.sample(universe, 3)
+            sell = {
+                'overview': '合成 AI 判断',
+                'sellAdvice': [
+                    {'code': h['code'], 'action': rng.choice(['hold', 'hold', 'sell_part', 'sell_all']),
+                     'pct': rng.choice([0, 20, 35]), 'reason': '合成减仓理由', 'confidence': rng.randint(55, 85)}
+                    for h in held
+                ],
+                'riskAlert': rng.choice(['', '波动较大，谨慎', '市场企稳回暖']),
+            }
+
+        recorded.append({
+            'date': day.strftime('%Y-%m-%d'),
+            'quotes': quotes,
+            'capitalFlow': flows,
+            'fundPick': {'result': {'fundPicks': fund_picks, 'stockPicks': []}},
+            'stockScreen': {'result': {'picks': screen_picks}},
+            'portfolioAdvice': {'result': {'funds': []}},
+            'hotEvents': [],
+            'ai': {'sell': sell, 'review': None},
+        })
+    return {'seed': seed, 'days': recorded}
+
+
+# ==================== 回放 ====================
+
+class _ReplayDay:
+    """当前回放日的注入实现；每个交易日切换 day 即可。"""
+
+    def __init__(self):
+        self.day = {}
+        self.clock = datetime.now()
+
+    def quote(self, position_type, code):
+        q = (self.day.get('quotes') or {}).get(code)
+        if not q:
+            return None
+        return {'code': code, 'nav': q['nav'], 'estimate': q['nav'], 'pct': q.get('pct', 0), 'time': self.clock.isoformat()}
+
+    def capital_flow(self, code):
+        return (self.day.get('capitalFlow') or {}).get(code)
+
+    def ai(self, system_prompt, user_prompt, temperature=0.4):
+        canned = self.day.get('ai') or {}
+        if system_prompt == trader.SELL_SYSTEM_PROMPT:
+            return canned.get('sell')
+        if system_prompt == trader.REVIEW_SYSTEM_PROMPT:
+            return canned.get('review')
+        return None
+
+    def providers(self):
+        return {
+            'clock': lambda: self.clock,
+            'quote': self.quote,
+            'capital_flow': self.capital_flow,
+            'ai': self.ai,
+            'fund_pick_cache': lambda: self.day.get('fundPick'),
+            'stock_screen_cache': lambda: self.day.get('stockScreen'),
+            'portfolio_advice_cache': lambda: self.day.get('portfolioAdvice'),
+            'hot_events': lambda: list(self.day.get('hotEvents') or []),
+            'refresh_hot_events': lambda: None,
+        }
+
+
+def run_replay(recording, config=None, data_dir=None, keep=False):
+    work_dir = data_dir or tempfile.mkdtemp(prefix='sim_replay_')
+    replay = _ReplayDay()
+    statuses = {}
+    try:
+        with trader.sandbox(work_dir, **replay.providers()):
+            if config:
+                trader.update_auto_trade_config(config)
+            started = time.perf_counter()
+            for day in recording['days']:
+                replay.day = day
+                replay.clock = datetime.strptime(day['date'], '%Y-%m-%d').replace(hour=14, minute=56)
+                result = trader.run_auto_trade(now=replay.clock)
+                statuses[result.get('status')] = statuses.get(result.get('status'), 0) + 1
+                if replay.clock.weekday() == 4:
+                    replay.clock = replay.clock.replace(hour=15, minute=15)
+                    trader.run_weekly_review(now=replay.clock)
+            elapsed = time.perf_counter() - started
+            portfolio = trader.load_portfolio()
+            initial = float(portfolio.get('totalCash', trader.INITIAL_CAPITAL) or trader.INITIAL_CAPITAL)
+            analytics = compute_analytics(trader.load_settle_log(), trader.load_trade_log(), initial)
+            config_used = trader.get_auto_trade_config()
+    finally:
+        if not keep and not data_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    n_days = len(recording['days'])
+    analytics.pop('equityCurve', None)
+    return {
+        'days': n_days,
+        'elapsedSec': round(elapsed, 3),
+        'daysPerSec': round(n_days / elapsed, 1) if elapsed > 0 else None,
+        'msPerDay': round(elapsed * 1000 / n_days, 2) if n_days else None,
+        'statuses': statuses,
+        'finalCash': round(float(portfolio.get('cash', 0) or 0), 2),
+        'openPositions': len(portfolio.get('positions') or []),
+        'config': config_used,
+        'analytics': analytics,
+        'dataDir': work_dir if (keep or data_dir) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自动模拟仓离线回放 / 压测')
+    parser.add_argument('--recording', help='录制文件路径（缺省时生成合成场景）')
+    parser.add_argument('--days', type=int, default=250, help='合成场景交易日数')
+    parser.add_argument('--seed', type=int, default=7, help='合成场景随机种子')
+    parser.add_argument('--config', default='', help='覆盖 AUTO_TRADE_CONFIG 的 JSON')
+    parser.add_argument('--save-recording', default='', help='把使用的场景写入该路径')
+    parser.add_argument('--data-dir', default='', help='指定回放数据目录（默认临时目录并在结束后删除）')
+    parser.add_argument('--keep', action='store_true', help='保留临时数据目录')
+    args = parser.parse_args()
+
+    if args.recording:
+        with open(args.recording, 'r', encoding='utf-8') as f:
+            recording = json.load(f)
+    else:
+        recording = build_synthetic_recording(days=args.days, seed=args.seed)
+    if args.save_recording:
+        with open(args.save_recording, 'w', encoding='utf-8') as f:
+            json.dump(recording, f, ensure_ascii=False)
+
+    config = json.loads(args.config) if args.config else None
+    # 执行器自身的进度日志转到 stderr，stdout 只输出报告 JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_replay(recording, config=config, data_dir=args.data_dir or None, keep=args.keep)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+SimHash 近似查重索引（分段鸽巢索引，仅依赖标准库）
+- 64 位指纹切成 max_distance + 1 段，海明距离 ≤ max_distance 的两个指纹至少有一段完全相同
+- 每段一张 {段值: [指纹]} 哈希表，查询只取同段值的候选，再用 distance 精确确认
+- 候选数与索引规模基本无关，跨周期缓存越积越多也不会拖慢去重
+
+用法:
+    from scripts.simhash_index import SimhashIndex
+
+    index = SimhashIndex(max_distance=5)
+    index[fingerprint] = title
+    index.find(other)        # 距离 ≤ 5 的已有指纹，没有时为 None
+"""
+
+
+def _popcount_distance(h1, h2):
+    return bin(h1 ^ h2).count('1')
+
+
+class SimhashIndex:
+    """{指纹: 值} 映射 + 按段的候选表；迭代 / items() / len() 与 dict 一致"""
+
+    def __init__(self, max_distance=5, bits=64, distance=None):
+        self.max_distance = max_distance
+        self.bits = bits
+        self.distance = distance or _popcount_distance
+        blocks = max_distance + 1
+        base, extra = divmod(bits, blocks)
+        self._masks = []   # [(shift, mask)]
+        shift = 0
+        for i in range(blocks):
+            width = base + (1 if i < extra else 0)
+            self._masks.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables = [{} for _ in self._masks]
+        self._values = {}
+
+    def _keys(self, fp):
+        return [(fp >> shift) & mask for shift, mask in self._masks]
+
+    def find(self, fp):
+        """返回距离 ≤ max_distance 的一个已有指纹（优先完全相同），没有时为 None"""
+        if fp in self._values:
+            return fp
+        seen = set()
+        for table, key in zip(self._tables, self._keys(fp)):
+            for candidate in table.get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if self.distance(fp, candidate) <= self.max_distance:
+                    return candidate
+        return None
+
+    def __setitem__(self, fp, value):
+        if fp not in self._values:
+            for table, key in zip(self._tables, self._keys(fp)):
+                table.setdefault(key, []).append(fp)
+        self._values[fp] = value
+
+    def __getitem__(self, fp):
+        return self._values[fp]
+
+    def __delitem__(self, fp):
+        del self._values[fp]
+        for table, key in zip(self._tables, self._keys(fp)):
+            bucket = table[key]
+            bucket.remove(fp)
+            if not bucket:
+                del table[key]
+
+    def get(self, fp, default=None):
+        return self._values.get(fp, default)
+
+    def __contains__(self, fp):
+        return fp in self._values
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def items(self):
+        return self._values.items()
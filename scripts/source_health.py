@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+数据源健康度登记 + 熔断器（进程内共享，仅依赖标准库）
+- 每个数据源滚动记录最近 WINDOW 次结果：成功率、p50 / p95 耗时、连续失败次数
+- 连续失败达到 BREAKER_FAILURES 次后熔断（open），冷却期内直接跳过，不再占用每轮采集时间
+- 冷却期结束进入半开（half_open），放行一次探测：成功恢复（closed），失败则加倍冷却后重新熔断；
+  探测放行后一个冷却期内都没有 record()（本轮被放弃）时视为过期，重新放行探测
+- stats() 汇总全部数据源状态，供 /api/status 展示
+
+用法:
+    from scripts import source_health
+
+    if source_health.allow('sentiment:小红书'):
+        started = time.monotonic()
+        items = fetch()
+        source_health.record('sentiment:小红书', bool(items), time.monotonic() - started)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+WINDOW = 20
+BREAKER_FAILURES = int(os.environ.get('SOURCE_BREAKER_FAILURES', '3'))
+BREAKER_COOLDOWN = float(os.environ.get('SOURCE_BREAKER_COOLDOWN', '600'))
+MAX_COOLDOWN = float(os.environ.get('SOURCE_BREAKER_MAX_COOLDOWN', '3600'))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+_lock = threading.Lock()
+_sources = {}
+
+
+class _Health:
+    __slots__ = ('outcomes', 'calls', 'failures', 'consecutive', 'state', 'opened_at', 'cooldown',
+                 'probing', 'probe_at', 'skipped', 'last_error', 'last_ok')
+
+    def __init__(self):
+        self.outcomes = deque(maxlen=WINDOW)   # (ok, latency_seconds)
+        self.calls = 0
+        self.failures = 0
+        self.consecutive = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self.probing = False
+        self.probe_at = 0.0
+        self.skipped = 0
+        self.last_error = ''
+        self.last_ok = None
+
+
+def _get(name):
+    health = _sources.get(name)
+    if health is None:
+        health = _sources[name] = _Health()
+    return health
+
+
+def allow(name, now=None):
+    """本轮是否放行该数据源；熔断冷却结束后只放行一次探测"""
+    now = time.time() if now is None else now
+    with _lock:
+        health = _get(name)
+        if health.state == CLOSED:
+            return True
+        if health.state == OPEN and now - health.opened_at >= health.cooldown:
+            health.state = HALF_OPEN
+            health.probing = False
+        if health.state == HALF_OPEN and (not health.probing or now - health.probe_at >= health.cooldown):
+            health.probing = True
+            health.probe_at = now
+            return True
+        health.skipped += 1
+        return False
+
+
+def record(name, ok, latency=None, error='', now=None):
+    now = time.time() if now is None else now
+    with _lock:
+        health = _get(name)
+        health.calls += 1
+        health.outcomes.append((bool(ok), latency))
+        if ok:
+            health.consecutive = 0
+            health.last_ok = now
+            if health.state != CLOSED:
+                print(f'  🔌 {name}: 探测成功，恢复采集')
+            health.state = CLOSED
+            health.cooldown = BREAKER_COOLDOWN
+            health.probing = False
+            return
+        health.failures += 1
+        health.consecutive += 1
+        health.last_error = str(error or '')[:200]
+        if health.state == HALF_OPEN:
+            # 探测失败：加倍冷却
+            health.cooldown = min(health.cooldown * 2, MAX_COOLDOWN)
+            health.state = OPEN
+            health.opened_at = now
+            health.probing = False
+            print(f'  ⛔ {name}: 探测失败，熔断 {health.cooldown:.0f}s')
+        elif health.state == CLOSED and health.consecutive >= BREAKER_FAILURES:
+            health.state = OPEN
+            health.opened_at = now
+            print(f'  ⛔ {name}: 连续失败 {health.consecutive} 次，熔断 {health.cooldown:.0f}s')
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def stats(now=None):
+    """{name: {state, successRate, p50Ms, p95Ms, consecutiveFailures, ...}}"""
+    now = time.time() if now is None else now
+    out = {}
+    with _lock:
+        for name, health in sorted(_sources.items()):
+            outcomes = list(health.outcomes)
+            latencies = [lat * 1000 for ok, lat in outcomes if lat is not None]
+            entry = {
+                'state': health.state,
+                'calls': health.calls,
+                'failures': health.failures,
+                'skipped': health.skipped,
+                'consecutiveFailures': health.consecutive,
+                'successRate': round(sum(1 for ok, _ in outcomes if ok) / len(outcomes), 3) if outcomes else None,
+                'p50Ms': round(_percentile(latencies, 50)) if latencies else None,
+                'p95Ms': round(_percentile(latencies, 95)) if latencies else None,
+                'lastError': health.last_error,
+                'lastOkAgoSec': round(now - health.last_ok) if health.last_ok else None,
+            }
+            if health.state == OPEN:
+                entry['retryInSec'] = max(0, round(health.opened_at + health.cooldown - now))
+            out[name] = entry
+    return out
+
+
+def reset(name=None):
+    with _lock:
+        if name is None:
+            _sources.clear()
+        else:
+            _sources.pop(name, None)
@@ -47,6 +47,11 @@ def _timeout_adapter_send(self, request, stream=False, timeout=None, verify=True
     return _orig_adapter_send(self, request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
 _requests.adapters.HTTPAdapter.send = _timeout_adapter_send
 
+try:
+    from scripts.hedge import hedged_call
+except ImportError:  # 作为独立脚本运行
+    from hedge import hedged_call
+
 try:
     from tqdm import tqdm
 except Exception:
@@ -388,6 +393,8 @@ _KLINE_EXECUTOR = ThreadPoolExecutor(max_workers=1)
 _eastmoney_fail_count = 0
 _USE_SINA_ONLY = True   # 默认 sina，东方财富作为备用
 _adaptive_sleep = 0.0   # 指数退避额外等待秒数
+KLINE_HEDGE_DELAY = float(os.environ.get('KLINE_HEDGE_DELAY', '2'))
+KLINE_DEADLINE = float(os.environ.get('KLINE_DEADLINE', '18'))
 
 
 def _code_to_sina_symbol(code):
@@ -432,6 +439,26 @@ def _fetch_kline_sina(code, days, start_date, end_date):
     return df.dropna().sort_values('date').reset_index(drop=True).tail(days).copy()
 
 
+def _fetch_kline_eastmoney(code, days, start_date, end_date):
+    """eastmoney 日K (stock_zh_a_hist)"""
+    df = ak.stock_zh_a_hist(
+        symbol=code, period='daily',
+        start_date=start_date, end_date=end_date, adjust='qfq',
+    )
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df[['日期', '开盘', '最高', '最低', '收盘', '成交量']].copy()
+    df.columns = ['date', 'open', 'high', 'low', 'close', 'volume']
+    df['date'] = pd.to_datetime(df['date'])
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.dropna().sort_values('date').reset_index(drop=True).tail(days).copy()
+
+
+def _kline_ok(df):
+    return df is not None and not df.empty
+
+
 def _fetch_kline_inner(code, days, start_date, end_date):
     global _eastmoney_fail_count, _USE_SINA_ONLY, _adaptive_sleep
 
@@ -444,68 +471,29 @@ def _fetch_kline_inner(code, days, start_date, end_date):
     if _adaptive_sleep > 0:
         time.sleep(_adaptive_sleep)
 
+    # 对冲请求: 主数据源 KLINE_HEDGE_DELAY 秒内没有结果(或已失败)才请求备用数据源，先到先用
     # 默认走 sina (不容易被封), eastmoney 作为备用
-    if _USE_SINA_ONLY:
-        try:
-            df = _fetch_kline_sina(code, days, start_date, end_date)
-            if df is not None and not df.empty:
-                _adaptive_sleep = max(_adaptive_sleep - 0.05, 0.0)
-                _kline_cache_put(code, start_date, end_date, df)
-                return df
-        except Exception:
-            pass
-        # sina 也失败了，尝试 eastmoney
-        try:
-            df = ak.stock_zh_a_hist(
-                symbol=code, period='daily',
-                start_date=start_date, end_date=end_date, adjust='qfq',
-            )
-            if df is not None and not df.empty:
-                df = df[['日期', '开盘', '最高', '最低', '收盘', '成交量']].copy()
-                df.columns = ['date', 'open', 'high', 'low', 'close', 'volume']
-                df['date'] = pd.to_datetime(df['date'])
-                for col in ['open', 'high', 'low', 'close', 'volume']:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                df = df.dropna().sort_values('date').reset_index(drop=True).tail(days).copy()
-                _kline_cache_put(code, start_date, end_date, df)
-                return df
-        except Exception:
-            pass
-        _adaptive_sleep = min(_adaptive_sleep + 0.1, 2.0)
-        return pd.DataFrame()
-
-    # 非 sina-only 模式 (eastmoney 为主)
-    try:
-        df = ak.stock_zh_a_hist(
-            symbol=code, period='daily',
-            start_date=start_date, end_date=end_date, adjust='qfq',
-        )
-        if df is not None and not df.empty:
+    sina = ('sina', lambda: _fetch_kline_sina(code, days, start_date, end_date))
+    eastmoney = ('eastmoney', lambda: _fetch_kline_eastmoney(code, days, start_date, end_date))
+    attempts = [sina, eastmoney] if _USE_SINA_ONLY else [eastmoney, sina]
+    errors = []
+    df = hedged_call(attempts, delay=KLINE_HEDGE_DELAY, deadline=KLINE_DEADLINE,
+                     accept=_kline_ok, default=pd.DataFrame(), errors=errors)
+
+    if not _USE_SINA_ONLY:
+        if any(name == 'eastmoney' for name, _ in errors):
+            _eastmoney_fail_count += 1
+            if _eastmoney_fail_count >= 5:
+                _USE_SINA_ONLY = True
+                print(f'[stock_screen] ⚠️ 东方财富API连续{_eastmoney_fail_count}次失败，切换至新浪数据源')
+        elif _kline_ok(df):
             _eastmoney_fail_count = 0
-            _adaptive_sleep = max(_adaptive_sleep - 0.05, 0.0)
-            df = df[['日期', '开盘', '最高', '最低', '收盘', '成交量']].copy()
-            df.columns = ['date', 'open', 'high', 'low', 'close', 'volume']
-            df['date'] = pd.to_datetime(df['date'])
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            df = df.dropna().sort_values('date').reset_index(drop=True).tail(days).copy()
-            _kline_cache_put(code, start_date, end_date, df)
-            return df
-    except Exception:
-        _eastmoney_fail_count += 1
-        _adaptive_sleep = min(_adaptive_sleep + 0.1, 2.0)
-        if _eastmoney_fail_count >= 5 and not _USE_SINA_ONLY:
-            _USE_SINA_ONLY = True
-            print(f'[stock_screen] ⚠️ 东方财富API连续{_eastmoney_fail_count}次失败，切换至新浪数据源')
 
-    # Fallback to sina
-    try:
-        df = _fetch_kline_sina(code, days, start_date, end_date)
-        if df is not None and not df.empty:
-            _kline_cache_put(code, start_date, end_date, df)
-            return df
-    except Exception:
-        pass
+    if _kline_ok(df):
+        _adaptive_sleep = max(_adaptive_sleep - 0.05, 0.0)
+        _kline_cache_put(code, start_date, end_date, df)
+        return df
+    _adaptive_sleep = min(_adaptive_sleep + 0.1, 2.0)
     return pd.DataFrame()
 
 
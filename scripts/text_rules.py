@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+文本规则引擎（正则规则表 → 单条带命名分组的交替正则，仅依赖标准库）
+- 规则表是纯数据：[(pattern, value)]，按类别（kind）登记
+- 全部规则预编译为一条 (?P<r0>...)|(?P<r1>...)|... 正则，每段文本只扫描一遍
+- 一次扫描同时得到情绪标签、紧急度加成、数据加成等全部结果
+
+类别的取值方式:
+- pick='first'：按登记顺序第一条命中的规则生效（情绪分级：极度看多 > 偏多 > ...）
+- pick='sum'  ：所有命中规则的 value 相加（每条规则最多计一次，与逐条 re.search 一致）
+
+用法:
+    from scripts.text_rules import RuleSet
+
+    rules = RuleSet()
+    rules.add_table('sentiment', [(r'暴涨|大涨', '极度看多'), (r'下跌|利空', '偏空')], pick='first')
+    rules.add_table('urgency', [(r'突发|快讯', 3), (r'战争|袭击', 5)])
+    rules.compile()
+
+    rules.evaluate('突发：原油暴涨')   # {'sentiment': '极度看多', 'urgency': 3}
+"""
+
+import re
+
+
+class RuleSet:
+    def __init__(self, ignore_case=False):
+        self.ignore_case = ignore_case
+        self._rules = []     # [(kind, pattern, value)]
+        self._picks = {}     # kind -> 'first' | 'sum'
+        self._combined = None
+        self._singles = []
+
+    def add_table(self, kind, table, pick='sum'):
+        if pick not in ('first', 'sum'):
+            raise ValueError(f'unknown pick mode: {pick}')
+        self._picks[kind] = pick
+        for pattern, value in table:
+            self._rules.append((kind, pattern, value))
+        self._combined = None
+        return self
+
+    def compile(self):
+        alternation = '|'.join(f'(?P<r{idx}>{pattern})' for idx, (_, pattern, _) in enumerate(self._rules))
+        self._combined = re.compile(alternation or r'(?!)')
+        self._singles = [re.compile(pattern) for _, pattern, _ in self._rules]
+        return self
+
+    def hits(self, text):
+        """命中的规则序号集合（与逐条 re.search 的结果一致）"""
+        if self._combined is None:
+            self.compile()
+        if not text:
+            return set()
+        if self.ignore_case:
+            text = text.lower()
+        found = set()
+        total = len(self._rules)
+        search, singles = self._combined.search, self._singles
+        pos = 0
+        while len(found) < total:
+            m = search(text, pos)
+            if m is None:
+                break
+            start = m.start()
+            first = int(m.lastgroup[1:])
+            found.add(first)
+            # 交替分支只报告同一起点上最靠前的规则，其余规则在该起点补查一次
+            for idx in range(first + 1, total):
+                if idx not in found and singles[idx].match(text, start):
+                    found.add(idx)
+            pos = start + 1
+        return found
+
+    def evaluate(self, text):
+        """{kind: 结果}：first 类别未命中时为 None，sum 类别未命中时为 0"""
+        result = {kind: (None if pick == 'first' else 0) for kind, pick in self._picks.items()}
+        for idx in sorted(self.hits(text)):
+            kind, _, value = self._rules[idx]
+            if self._picks[kind] == 'first':
+                if result[kind] is None:
+                    result[kind] = value
+            else:
+                result[kind] += value
+        return result
@@ -13,6 +13,11 @@ from urllib.request import urlopen, Request
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import xml.etree.ElementTree as ET
 
+try:
+    from scripts import quote_cache
+except ImportError:  # 作为独立脚本运行
+    import quote_cache
+
 # ==================== 路径 ====================
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(ROOT_DIR, 'data')
@@ -848,27 +853,16 @@ def _fetch_actual_market():
             secids_dict[secid] = {'asset_id': asset_id}
     if not secids_dict:
         return {}
-    secids_str = ','.join(secids_dict.keys())
-    url = f'https://push2.eastmoney.com/api/qt/ulist.np/get?fltt=2&fields=f2,f3,f4,f12,f14&secids={secids_str}'
     results = {}
     try:
-        req = Request(url, headers=_HEADERS)
-        with urlopen(req, context=_CTX, timeout=10) as resp:
-            data = json.loads(resp.read().decode())
-        items_list = (data.get('data') or {}).get('diff') or []
-        for it in items_list:
-            code = str(it.get('f12', ''))
-            pct = it.get('f3')
-            price = it.get('f2')
-            name = it.get('f14', '')
-            if pct is None:
+        quotes = quote_cache.get_quotes(secids_dict, timeout=10)
+        for secid, info in secids_dict.items():
+            it = quotes.get(secid)
+            if it is None or it.get('f3') is None:
                 continue
-            for secid, info in secids_dict.items():
-                if secid.split('.')[-1] == code or secid.endswith('.' + code):
-                    results[info['asset_id']] = {
-                        'pct': float(pct), 'price': price, 'name': name,
-                    }
-                    break
+            results[info['asset_id']] = {
+                'pct': float(it['f3']), 'price': it.get('f2'), 'name': it.get('f14', ''),
+            }
     except Exception as e:
         print(f'  [trump] ⚠️ 实际行情获取失败: {e}')
     return results
@@ -19,13 +19,16 @@ sys.path.insert(0, ROOT_DIR)
 from scripts.infra import infra, env  # noqa: F401
 
 from flask import Flask, jsonify, send_from_directory, request
+from scripts import http_client, quote_cache, source_health
 from scripts.collector import collect_and_save, load_cache, load_us_market_cache, fetch_us_market, CACHE_FILE
 from scripts.analyzer import load_analysis_cache, analyze_and_save, ANALYSIS_CACHE
 from scripts.fetch_events import main as fetch_hot_events
 from scripts.fetch_realtime_breaking import main as fetch_realtime_breaking
+from scripts.fetch_social_media import main as fetch_social_trends
 from scripts.fund_pick import run_fund_pick, load_fund_pick_cache
 from scripts.portfolio_advisor import run_portfolio_advice, load_portfolio_advice_cache
 from scripts.sim_auto_trader import (
+    get_analytics_payload as get_sim_auto_analytics_payload,
     get_auto_trade_config,
     get_status_payload as get_sim_auto_status_payload,
     run_auto_trade as run_sim_auto_trade,
@@ -203,6 +206,8 @@ def api_status():
     rt_updated = None
     rt_count = 0
     rt_sources_ok = []
+    rt_generation = None
+    rt_provisional = False
     if os.path.exists(rt_path):
         try:
             with open(rt_path, 'r', encoding='utf-8') as f:
@@ -210,6 +215,8 @@ def api_status():
             rt_updated = rd.get('updated_at')
             rt_count = len(rd.get('breaking', []))
             rt_sources_ok = rd.get('meta', {}).get('sources_ok', [])
+            rt_generation = rd.get('meta', {}).get('generation')
+            rt_provisional = bool(rd.get('meta', {}).get('provisional'))
         except Exception:
             pass
 
@@ -276,6 +283,8 @@ def api_status():
                 'stale': rt_age is not None and rt_age > rt_stale_thr,
                 'item_count': rt_count,
                 'sources_ok': rt_sources_ok,
+                'generation': rt_generation,
+                'provisional': rt_provisional,
             },
             'sentiment': {
                 'last_updated': cache.get('fetch_time') if cache else None,
@@ -293,6 +302,12 @@ def api_status():
         },
         'threads': threads_alive,
         'is_trading_hours': trading,
+        # 共享 HTTP 客户端按主机的请求 / 字节 / 延迟 / 连接复用统计（本 worker 进程）
+        'http': http_client.stats(),
+        # 各数据源滚动成功率 / p50·p95 耗时 / 连续失败 / 熔断状态（本 worker 进程）
+        'sources': source_health.stats(),
+        # 东方财富行情共享缓存：批量请求数 / 命中 / 合并等待（本 worker 进程）
+        'quotes': quote_cache.stats(),
     })
 
 
@@ -829,6 +844,12 @@ def api_sim_auto_status():
     return jsonify(payload)
 
 
+@app.route('/api/sim-auto/analytics')
+def api_sim_auto_analytics():
+    """返回自动模拟仓绩效分析（净值曲线、回撤、Sharpe/Sortino、来源归因）。"""
+    return jsonify(get_sim_auto_analytics_payload())
+
+
 @app.route('/api/sim-auto/trigger', methods=['POST'])
 def api_sim_auto_trigger():
     """自动模拟仓仅允许定时执行，不再开放手动触发。"""
@@ -1013,6 +1034,11 @@ def scheduler_loop():
                         print(f'[定时任务] ⚠️ 热点事件采集失败: {e}')
                     # 2. 采集舆情数据（不自动触发 AI 分析）
                     collect_and_save(run_analysis=False)
+                    # 2b. 社媒趋势（并发采集，/api/social-trends 的兜底数据）
+                    try:
+                        fetch_social_trends()
+                    except Exception as e:
+                        print(f'[定时任务] ⚠️ 社媒趋势采集失败: {e}')
                     print(f'[定时任务] 采集完成，下次: {interval}秒({interval//60}分钟)后')
 
                     # 3. 板块深度分析：每日 11:30 和 14:50 各执行一次